@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Persistent metadata cache of downloaded assets for conditional refresh across runs."""
+
+import time
+import sqlite3
+import threading
+
+
+class AssetCacheEntry:
+    """Cached metadata of one asset."""
+
+    __slots__ = ('url', 'etag', 'last_modified', 'sha256', 'path', 'fetched_at')
+
+    def __init__(self, url, etag, last_modified, sha256, path, fetched_at):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.sha256 = sha256
+        self.path = path
+        self.fetched_at = fetched_at
+
+    def get_conditional_headers(self):
+        """Return request headers for revalidating the asset."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class AssetCache:
+    """
+    SQLite store mapping asset URLs to validators, content hash and local path.
+
+    Used by AssetDownloader to skip transfers of assets that did not change
+    since a previous run.
+    """
+
+    def __init__(self, path, ttl=0, batch_size=200):
+        """
+        Initialization of the cache.
+
+        Args:
+            path (str): Path to the cache database
+            ttl (float): Seconds during which a cached asset is reused without revalidation
+            batch_size (int): Number of updates per transaction
+        """
+        self.path = path
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.conn = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS assets ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, sha256 TEXT, "
+                "path TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS assets_path ON assets (path)")
+        return self.conn
+
+    def _changed(self):
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.conn.commit()
+            self._pending = 0
+
+    def get(self, url):
+        """
+        Get cached metadata of an asset.
+
+        Args:
+            url (str): Canonical URL of the asset
+
+        Returns:
+            AssetCacheEntry: Cached entry or None
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT url, etag, last_modified, sha256, path, fetched_at FROM assets WHERE url = ?", (url,)
+            ).fetchone()
+        return AssetCacheEntry(*row) if row else None
+
+    def get_owner(self, path):
+        """
+        Get the URL whose cached copy is stored at a path.
+
+        Args:
+            path (str): Local path of an asset
+
+        Returns:
+            str: Canonical URL or None if no cached asset uses the path
+        """
+        with self._lock:
+            row = self._connect().execute("SELECT url FROM assets WHERE path = ? LIMIT 1", (path,)).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, entry):
+        """Check if an entry may be reused without revalidation."""
+        return self.ttl > 0 and time.time() - entry.fetched_at < self.ttl
+
+    def put(self, url, path, sha256, etag=None, last_modified=None):
+        """
+        Store metadata of a downloaded asset.
+
+        Args:
+            url (str): Canonical URL of the asset
+            path (str): Local path of the asset
+            sha256 (str): Hash of the content
+            etag (str): ETag header of the response
+            last_modified (str): Last-Modified header of the response
+        """
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO assets (url, etag, last_modified, sha256, path, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, sha256, path, time.time())
+            )
+            self._changed()
+
+    def touch(self, url):
+        """Mark a cached asset as revalidated now."""
+        with self._lock:
+            self._connect().execute("UPDATE assets SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._changed()
+
+    def commit(self):
+        """Commit pending updates."""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self._pending = 0
+
+    def close(self):
+        """Commit pending updates and close the database."""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self.conn.close()
+                self.conn = None
+                self._pending = 0
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Deduplicated, concurrent download of page assets for RobopolScraper."""
+
+import os
+import re
+import hashlib
+import threading
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from cancellation import ScrapeCancelled
+
+# Ports implied by the URL scheme
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Chunk size for downloads with a size limit
+READ_CHUNK_SIZE = 65536
+
+# Single-pass CSS tokenizer: comments and strings are consumed so that
+# references inside them are ignored
+CSS_TOKEN_PATTERN = re.compile(r"""
+      /\*.*?(?:\*/|$)
+    | @import\s+(?:url\(\s*)?(?:"([^"]*)"|'([^']*)'|([^\s;'"()]+))
+    | url\(\s*(?:"([^"]*)"|'([^']*)'|([^\s'"()]*))\s*\)
+    | "(?:[^"\\\n]|\\.)*"
+    | '(?:[^'\\\n]|\\.)*'
+""", re.VERBOSE | re.DOTALL | re.IGNORECASE)
+
+
+def canonicalize_url(url):
+    """
+    Normalize a URL so that equivalent asset URLs compare equal.
+
+    Lowercases scheme and host, drops default ports and the fragment.
+
+    Args:
+        url (str): Absolute URL
+
+    Returns:
+        str: Canonical URL
+    """
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').lower()
+        port = parts.port
+    except ValueError:
+        return url
+
+    netloc = host
+    if port is not None and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{host}:{port}"
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+
+def find_css_references(css_text):
+    """
+    Find URLs referenced from a stylesheet.
+
+    Args:
+        css_text (str): Content of the stylesheet
+
+    Returns:
+        list: (url, is_import) pairs in order of appearance, without
+            duplicates, data: URIs and fragment-only references
+    """
+    references = {}
+    for match in CSS_TOKEN_PATTERN.finditer(css_text):
+        groups = match.groups()
+        if match.group(0).startswith('@'):
+            ref, is_import = groups[0] or groups[1] or groups[2], True
+        else:
+            ref, is_import = groups[3] or groups[4] or groups[5], False
+        if not ref:
+            continue
+        ref = ref.strip()
+        if not ref or ref.startswith('#') or ref[:5].lower() == 'data:':
+            continue
+        references[ref] = references.get(ref, False) or is_import
+    return list(references.items())
+
+
+def read_limited(response, max_bytes):
+    """
+    Read a streamed response body unless it exceeds a size limit.
+
+    The Content-Length header is checked first, so oversized files declared
+    by the server are not transferred at all. The response is closed.
+
+    Args:
+        response (requests.Response): Response requested with stream=True
+        max_bytes (int): Maximum body size in bytes
+
+    Returns:
+        bytes: Body of the response or None if it is too large
+    """
+    try:
+        try:
+            if int(response.headers.get('Content-Length', 0)) > max_bytes:
+                return None
+        except ValueError:
+            pass
+
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                return None
+            chunks.append(chunk)
+        return b''.join(chunks)
+    finally:
+        response.close()
+
+
+class AssetDownloader:
+    """
+    Work queue for asset downloads shared by all pages of a crawl.
+
+    Every asset is downloaded at most once per crawl, identified by its
+    canonical URL; later references reuse the path of the first download.
+    Downloads run on a thread pool (global concurrency) and each page submits
+    at most a limited number of downloads at a time (per-page concurrency).
+
+    Stylesheets can be scanned for url() and @import references, which are
+    queued as further assets. References are recorded per stylesheet, so a
+    stylesheet shared by many pages is scanned only once per crawl.
+    """
+
+    def __init__(self, fetch, writer, max_workers=8, max_per_page=4,
+                 status_callback=None, count_callback=None, cache=None, executor=None):
+        """
+        Initialization of the downloader.
+
+        Args:
+            fetch (callable): Function returning a requests.Response for a URL
+            writer (AsyncFileWriter): Writer for downloaded files
+            max_workers (int): Maximum number of concurrent downloads
+            max_per_page (int): Maximum number of concurrent downloads of one page
+            status_callback (callable): Function for recording status messages
+            count_callback (callable): Function called with a stats key after each download
+            cache (AssetCache): Persistent cache used to skip unchanged assets across runs
+            executor (ThreadPoolExecutor): Worker pool shared with other downloaders; it is
+                not shut down by close() and max_workers does not apply to it
+        """
+        self.fetch = fetch
+        self.writer = writer
+        self.max_workers = max_workers
+        self.max_per_page = max_per_page
+        self.status_callback = status_callback or (lambda message: None)
+        self.count_callback = count_callback or (lambda key: None)
+        self.cache = cache
+
+        self._executor = executor
+        self._shared_executor = executor is not None
+        self._lock = threading.Lock()
+        self._assets = {}
+        self._used_names = {}
+        self._references = {}
+        self._tasks = set()
+        self._cancelled = False
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='AssetDownloader')
+            return self._executor
+
+    def reset(self):
+        """Forget downloaded assets (for a new crawl)."""
+        with self._lock:
+            self._assets.clear()
+            self._used_names.clear()
+            self._references.clear()
+            self._cancelled = False
+
+    def cancel(self):
+        """Drop queued downloads; pages waiting for them get no path."""
+        with self._lock:
+            self._cancelled = True
+            tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+
+    def close(self):
+        """Wait for running downloads and stop the worker threads."""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None and not self._shared_executor:
+            executor.shutdown(wait=True)
+        if self.cache is not None:
+            self.cache.close()
+
+    def _get_target_path(self, directory, filename, canonical_url):
+        """
+        Get a unique file path for an asset in a directory.
+
+        A filename already used by a different URL in this crawl, or holding
+        the cached copy of a different URL, gets a suffix derived from the
+        hash of the URL, so the result does not depend on timing.
+        Must be called with the lock held.
+        """
+        used = self._used_names.setdefault(directory, {})
+        owner = used.get(filename)
+        if owner is None and self.cache is not None:
+            owner = self.cache.get_owner(os.path.join(directory, filename))
+        if owner is not None and owner != canonical_url:
+            stem, ext = os.path.splitext(filename)
+            digest = hashlib.sha1(canonical_url.encode('utf-8')).hexdigest()[:10]
+            filename = f"{stem}-{digest}{ext}"
+        used[filename] = canonical_url
+        return os.path.join(directory, filename)
+
+    def _claim_cached_path(self, path, canonical_url):
+        """Reserve the path of a cached copy for its URL; False if another URL of this crawl uses it."""
+        directory, filename = os.path.split(path)
+        with self._lock:
+            used = self._used_names.setdefault(directory, {})
+            owner = used.get(filename)
+            if owner is not None and owner != canonical_url:
+                return False
+            used[filename] = canonical_url
+            return True
+
+    def _fetch_asset(self, url, canonical_url, path, stats_key, max_bytes=None):
+        """
+        Download one asset and schedule it for writing.
+
+        Returns:
+            tuple: (path, content); content is None when a cached file is reused
+                without a transfer, path is None on error
+        """
+        # Reuse or revalidate the copy from a previous run
+        entry = self.cache.get(canonical_url) if self.cache is not None else None
+        if entry is not None and not os.path.exists(entry.path):
+            entry = None
+        if entry is not None and not self._claim_cached_path(entry.path, canonical_url):
+            # The file was taken over by another URL; download again to the reserved path
+            entry = None
+        if entry is not None and self.cache.is_fresh(entry):
+            self.count_callback('cached_assets')
+            return entry.path, None
+
+        headers = entry.get_conditional_headers() if entry is not None else {}
+        kwargs = {'headers': headers} if headers else {}
+        if max_bytes is not None:
+            kwargs['stream'] = True
+        response = self.fetch(url, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self.cache.touch(canonical_url)
+            self.count_callback('cached_assets')
+            return entry.path, None
+        if response.status_code != 200:
+            response.close()
+            self.status_callback(f"Invalid server response: {response.status_code} for {url}")
+            return None, None
+
+        if max_bytes is None:
+            content = response.content
+        else:
+            content = read_limited(response, max_bytes)
+            if content is None:
+                self.status_callback(f"Skipped {url}: larger than {max_bytes} bytes")
+                self.count_callback('oversized_assets')
+                return None, None
+        if self.cache is not None:
+            digest = hashlib.sha256(content).hexdigest()
+            if entry is not None and entry.sha256 == digest:
+                # Content did not change, keep the existing file
+                path = entry.path
+                self.count_callback('cached_assets')
+            else:
+                self.writer.write(path, content)
+                self.count_callback(stats_key)
+            self.cache.put(canonical_url, path, digest,
+                           response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return path, content
+
+        self.writer.write(path, content)
+        self.count_callback(stats_key)
+        return path, content
+
+    def _download(self, url, canonical_url, path, stats_key, scan_css, max_bytes=None):
+        """Download one asset and queue the references of a stylesheet."""
+        try:
+            path, content = self._fetch_asset(url, canonical_url, path, stats_key, max_bytes)
+            if path and scan_css:
+                if content is None:
+                    with open(path, 'rb') as f:
+                        content = f.read()
+                self._queue_css_references(url, canonical_url, path, content)
+            return path
+        except ScrapeCancelled:
+            return None
+        except Exception as e:
+            self.status_callback(f"Error downloading {url}: {e}")
+            return None
+
+    def _queue_css_references(self, url, canonical_url, path, content):
+        """
+        Queue assets referenced from a downloaded stylesheet.
+
+        Runs on a worker thread, so references are only submitted, never
+        waited for. Referenced files are saved next to the stylesheet;
+        imported stylesheets are scanned in turn.
+        """
+        directory = os.path.dirname(path)
+        references = {}
+        for ref, is_import in find_css_references(content.decode('utf-8', errors='replace')):
+            ref_url = urljoin(url, ref)
+            if urlsplit(ref_url).scheme not in DEFAULT_PORTS:
+                continue
+            filename = os.path.basename(urlsplit(ref_url).path) or f"asset_{len(references)}"
+            stats_key = 'downloaded_css' if is_import else 'downloaded_css_assets'
+            ref_canonical, future = self._submit(ref_url, directory, filename, stats_key, is_import)
+            references[ref_canonical] = future
+
+        with self._lock:
+            self._references[canonical_url] = list(references.items())
+
+    def _submit(self, url, directory, filename, stats_key, scan_css, page_slots=None, max_bytes=None):
+        """
+        Reserve an asset and submit its download unless it is already reserved.
+
+        Returns:
+            tuple: (canonical URL, future resolving to the path of the asset)
+        """
+        canonical_url = canonicalize_url(url)
+
+        # Reserve the asset so that no other page downloads it again
+        with self._lock:
+            if self._cancelled:
+                future = Future()
+                future.set_result(None)
+                return canonical_url, future
+            future = self._assets.get(canonical_url)
+            if future is not None:
+                return canonical_url, future
+            path = self._get_target_path(directory, filename, canonical_url)
+            future = self._assets[canonical_url] = Future()
+
+        # Limit the number of downloads of this page in flight
+        if page_slots is not None:
+            page_slots.acquire()
+        task = self._get_executor().submit(self._download, url, canonical_url, path, stats_key, scan_css, max_bytes)
+        with self._lock:
+            self._tasks.add(task)
+        task.add_done_callback(lambda task: self._finish(task, future, page_slots))
+        return canonical_url, future
+
+    def submit(self, url, directory, filename, stats_key):
+        """
+        Queue a download without waiting for it (e.g. documents linked from pages).
+
+        Args:
+            url (str): URL of the file
+            directory (str): Target directory
+            filename (str): Preferred file name
+            stats_key (str): Stats key counted for the download
+
+        Returns:
+            Future: Resolves to the path of the file or None on error
+        """
+        return self._submit(url, directory, filename, stats_key, False)[1]
+
+    def wait(self):
+        """Wait until all queued downloads have finished."""
+        while True:
+            with self._lock:
+                tasks = list(self._tasks)
+            if not tasks:
+                return
+            futures.wait(tasks)
+
+    def _finish(self, task, future, page_slots):
+        """Pass the result of a finished download to its reservation."""
+        with self._lock:
+            self._tasks.discard(task)
+        if page_slots is not None:
+            page_slots.release()
+        future.set_result(None if task.cancelled() else task.result())
+
+    def download(self, assets, directory, stats_key, scan_css=False, max_bytes=None):
+        """
+        Download assets of a page.
+
+        Args:
+            assets (list): (url, filename) pairs in page order
+            directory (str): Target directory for new downloads
+            stats_key (str): Stats key counted for every new download
+            scan_css (bool): Whether the assets are stylesheets whose url() and
+                @import references should be downloaded too
+            max_bytes (int): Assets larger than this are skipped (None = no limit)
+
+        Returns:
+            list: Paths of the page's assets (including assets downloaded
+                earlier in the crawl and assets referenced from stylesheets),
+                without duplicates
+        """
+        page_slots = threading.BoundedSemaphore(self.max_per_page)
+        pending = []
+        seen = set()
+
+        for url, filename in assets:
+            if urlsplit(url).scheme not in DEFAULT_PORTS:
+                continue
+            if canonicalize_url(url) in seen:
+                continue
+            canonical_url, future = self._submit(url, directory, filename, stats_key, scan_css, page_slots,
+                                                 max_bytes)
+            seen.add(canonical_url)
+            pending.append((canonical_url, future))
+
+        # Wait for the assets, following references of stylesheets
+        paths = []
+        for canonical_url, future in pending:
+            path = future.result()
+            if path and path not in paths:
+                paths.append(path)
+            with self._lock:
+                references = self._references.get(canonical_url, ())
+            for reference in references:
+                if reference[0] not in seen:
+                    seen.add(reference[0])
+                    pending.append(reference)
+        return paths
@@ -0,0 +1,728 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark harness for RobopolScraper.
+
+Starts a local HTTP server that generates a synthetic website and runs the
+scraper end to end against it. Each configuration is executed in a separate
+process so that CPU time and peak RSS are measured for the scraper alone.
+Results are appended to a JSON Lines file so runs can be compared over time.
+
+Usage:
+    python benchmark.py                       # run all presets
+    python benchmark.py --configs small assets
+    python benchmark.py --pages 500 --fanout 8 --latency 0.01
+    python benchmark.py --compare bench_results.jsonl
+    python benchmark.py --configs memory --trace-memory   # peak Python heap per page
+    python benchmark.py --configs latency --protocol http2  # HTTP/2 (needs httpx[http2])
+    python benchmark.py --configs assets --check-replay      # record, replay offline and compare
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Seconds a benchmark run may take before its worker process is terminated
+WORKER_TIMEOUT = 3600
+
+# Predefined benchmark configurations
+PRESETS = {
+    'small': {'pages': 100, 'fanout': 5, 'page_size': 10000, 'assets': 0, 'latency': 0.0, 'error_rate': 0.0},
+    'fanout': {'pages': 300, 'fanout': 30, 'page_size': 10000, 'assets': 0, 'latency': 0.0, 'error_rate': 0.0},
+    'large-pages': {'pages': 50, 'fanout': 5, 'page_size': 1000000, 'assets': 0, 'latency': 0.0, 'error_rate': 0.0},
+    'assets': {'pages': 50, 'fanout': 5, 'page_size': 10000, 'assets': 10, 'latency': 0.0, 'error_rate': 0.0},
+    'latency': {'pages': 50, 'fanout': 5, 'page_size': 10000, 'assets': 2, 'latency': 0.02, 'error_rate': 0.0},
+    'errors': {'pages': 100, 'fanout': 5, 'page_size': 10000, 'assets': 0, 'latency': 0.0, 'error_rate': 0.1},
+    'memory': {'pages': 30, 'fanout': 5, 'page_size': 3000000, 'assets': 10, 'latency': 0.005, 'error_rate': 0.0},
+}
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua robot sensor motor servo").split()
+
+# Smallest valid GIF, used as the payload of every synthetic image
+PIXEL_GIF = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00'
+             b'\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+
+
+class SyntheticSite:
+    """Deterministic generator of pages and assets for a synthetic website."""
+
+    def __init__(self, pages=100, fanout=5, page_size=10000, assets=0,
+                 latency=0.0, error_rate=0.0, seed=42):
+        """
+        Initialization of the synthetic site.
+
+        Args:
+            pages (int): Number of HTML pages on the site
+            fanout (int): Number of links on each page
+            page_size (int): Approximate size of each page in bytes
+            assets (int): Number of images referenced by each page
+            latency (float): Delay in seconds before every response
+            error_rate (float): Probability that a request fails with 503
+            seed (int): Seed making the site and errors reproducible
+        """
+        self.pages = max(1, pages)
+        self.fanout = fanout
+        self.page_size = page_size
+        self.assets = assets
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+
+        # Number of requests seen per path, used for reproducible transient errors
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def page_path(self, page_id):
+        """Return the URL path of a page."""
+        return "/" if page_id == 0 else f"/p/{page_id}"
+
+    def should_fail(self, path):
+        """Decide deterministically whether this request for a path fails."""
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            attempt = self._attempts.get(path, 0)
+            self._attempts[path] = attempt + 1
+        return random.Random(f"{self.seed}:{path}:{attempt}").random() < self.error_rate
+
+    def render_page(self, page_id):
+        """
+        Generate HTML of a page.
+
+        Args:
+            page_id (int): Index of the page
+
+        Returns:
+            bytes: Encoded HTML content
+        """
+        rng = random.Random(self.seed * 1000003 + page_id)
+
+        links = []
+        for _ in range(self.fanout):
+            target = rng.randrange(self.pages)
+            links.append(f'<li><a href="{self.page_path(target)}">Page {target}</a></li>')
+
+        images = [f'<img src="/assets/{page_id}-{num}.gif" alt="">' for num in range(self.assets)]
+
+        head = (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Page {page_id}</title>"
+                f"<link rel=\"stylesheet\" href=\"/assets/site.css\"></head><body>"
+                f"<nav><ul>{''.join(links)}</ul></nav><main><h1>Page {page_id}</h1>{''.join(images)}")
+        tail = "</main><footer>Synthetic site</footer></body></html>"
+
+        # Fill the page with paragraphs up to the requested size
+        parts = [head]
+        size = len(head) + len(tail)
+        while size < self.page_size:
+            paragraph = "<p>" + " ".join(rng.choice(WORDS) for _ in range(60)) + "</p>"
+            parts.append(paragraph)
+            size += len(paragraph)
+        parts.append(tail)
+
+        return "".join(parts).encode('utf-8')
+
+    def resolve(self, path):
+        """
+        Resolve a request path to a response.
+
+        Args:
+            path (str): Requested URL path
+
+        Returns:
+            tuple: (status, content_type, body)
+        """
+        if self.should_fail(path):
+            return 503, 'text/plain', b'Service Unavailable'
+
+        if path == '/':
+            return 200, 'text/html; charset=utf-8', self.render_page(0)
+
+        if path.startswith('/p/'):
+            try:
+                page_id = int(path[3:].strip('/'))
+            except ValueError:
+                page_id = -1
+            if 0 < page_id < self.pages:
+                return 200, 'text/html; charset=utf-8', self.render_page(page_id)
+
+        if path == '/assets/site.css':
+            return 200, 'text/css', b'body { font-family: sans-serif; }\n'
+
+        if path.startswith('/assets/') and path.endswith('.gif'):
+            return 200, 'image/gif', PIXEL_GIF
+
+        return 404, 'text/plain', b'Not Found'
+
+
+class _SyntheticRequestHandler(BaseHTTPRequestHandler):
+    """Request handler serving pages of the server's SyntheticSite."""
+
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body are sent in separate writes
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        site = self.server.site
+        if site.latency > 0:
+            time.sleep(site.latency)
+
+        status, content_type, body = site.resolve(self.path.split('?', 1)[0])
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+
+
+class SyntheticSiteServer:
+    """Local HTTP server for a SyntheticSite, running in a background thread."""
+
+    def __init__(self, site, host='127.0.0.1', port=0):
+        self.site = site
+        self.httpd = ThreadingHTTPServer((host, port), _SyntheticRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.site = site
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class SyntheticSiteH2Server:
+    """
+    Local cleartext HTTP/2 server (h2c with prior knowledge) for a SyntheticSite.
+
+    Every stream is answered on its own thread, so the site latency overlaps
+    for requests multiplexed over one connection. Requires the h2 package.
+    """
+
+    def __init__(self, site, host='127.0.0.1', port=0):
+        import h2.config
+        import h2.connection
+        import h2.events
+        self._h2 = h2
+        self.site = site
+        self.sock = socket.create_server((host, port))
+        self.thread = None
+        self._running = False
+
+    @property
+    def base_url(self):
+        host, port = self.sock.getsockname()[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._running = True
+        self.thread = threading.Thread(target=self._accept, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self.sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _accept(self):
+        while self._running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        """Read frames of one connection and start a responder per request."""
+        h2 = self._h2
+        connection = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        # Guards the connection state; notified when the peer opens flow-control windows
+        state = threading.Condition()
+        with state:
+            connection.initiate_connection()
+            conn.sendall(connection.data_to_send())
+
+        try:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                with state:
+                    for event in connection.receive_data(data):
+                        if isinstance(event, h2.events.RequestReceived):
+                            headers = dict((name.decode() if isinstance(name, bytes) else name,
+                                            value.decode() if isinstance(value, bytes) else value)
+                                           for name, value in event.headers)
+                            threading.Thread(target=self._respond, daemon=True,
+                                             args=(conn, connection, state, event.stream_id,
+                                                   headers.get(':path', '/'))).start()
+                        elif isinstance(event, h2.events.DataReceived):
+                            connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                        elif isinstance(event, h2.events.ConnectionTerminated):
+                            return
+                    state.notify_all()
+                    conn.sendall(connection.data_to_send())
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def _respond(self, conn, connection, state, stream_id, path):
+        """Send the response of one stream, respecting flow control."""
+        if self.site.latency > 0:
+            time.sleep(self.site.latency)
+        status, content_type, body = self.site.resolve(path.split('?', 1)[0])
+
+        try:
+            with state:
+                connection.send_headers(stream_id, [(':status', str(status)), ('content-type', content_type),
+                                                    ('content-length', str(len(body)))],
+                                        end_stream=not body)
+                conn.sendall(connection.data_to_send())
+                while body:
+                    window = min(connection.local_flow_control_window(stream_id),
+                                 connection.max_outbound_frame_size)
+                    if window <= 0:
+                        state.wait(1.0)
+                        continue
+                    chunk, body = body[:window], body[window:]
+                    connection.send_data(stream_id, chunk, end_stream=not body)
+                    conn.sendall(connection.data_to_send())
+        except (OSError, self._h2.exceptions.H2Error):
+            pass
+
+
+def _peak_rss_mb():
+    """Return peak resident set size of the current process in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _directory_size(path):
+    """Return total size in bytes of all files below a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _trace_page_memory(scraper, page_peaks, asset_phase):
+    """
+    Record Python heap growth of every page processed by a scraper.
+
+    Wraps scraper.scrape_url and scraper.download_page_assets; tracemalloc
+    must be running. The heap still held by a page when its asset downloads
+    start is what concurrent pages multiply while waiting on the network.
+
+    Args:
+        scraper (RobopolScraper): Scraper to trace
+        page_peaks (list): Receives the peak heap growth of each page
+        asset_phase (list): Receives the heap growth of each page at the start of its downloads
+    """
+    import tracemalloc
+
+    scrape_url = scraper.scrape_url
+    download_page_assets = scraper.download_page_assets
+    page_start = [0]
+
+    def traced_scrape_url(url):
+        page_start[0], _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            return scrape_url(url)
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            page_peaks.append(peak - page_start[0])
+
+    def traced_download_page_assets(*args, **kwargs):
+        current, _ = tracemalloc.get_traced_memory()
+        asset_phase.append(current - page_start[0])
+        return download_page_assets(*args, **kwargs)
+
+    scraper.scrape_url = traced_scrape_url
+    scraper.download_page_assets = traced_download_page_assets
+
+
+def _scraper_worker(base_url, work_dir, config, result_queue, trace_memory=False, protocol='http1'):
+    """Run one scrape in a child process and report its metrics."""
+    import logging
+    import tracemalloc
+    logging.disable(logging.CRITICAL)
+
+    from scraper import RobopolScraper
+
+    output_dir = os.path.join(work_dir, 'html')
+    download_images = config.get('assets', 0) > 0
+    scraper = RobopolScraper(
+        output_dir=output_dir,
+        base_url=base_url,
+        status_callback=lambda message: None,
+        progress_callback=lambda *args: None,
+        recursive=True,
+        download_images=download_images,
+        images_dir=os.path.join(work_dir, 'images') if download_images else None,
+        http2='h2c' if protocol == 'http2' else False
+    )
+
+    # Time to response of every request (pages and assets)
+    request_times = []
+    send = scraper.session.send
+
+    def timed_send(request, **kwargs):
+        start = time.perf_counter()
+        try:
+            return send(request, **kwargs)
+        finally:
+            request_times.append(time.perf_counter() - start)
+
+    scraper.session.send = timed_send
+
+    # Tracing slows the scraper down, so it is only enabled on request
+    page_peaks = []
+    asset_phase = []
+    if trace_memory:
+        tracemalloc.start()
+        _trace_page_memory(scraper, page_peaks, asset_phase)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    scraper.run_scraper(output_json=os.path.join(work_dir, 'scraped_data.json'))
+    wall_time = time.perf_counter() - wall_start
+    cpu_time = time.process_time() - cpu_start
+
+    metrics = {
+        'pages': scraper.stats['successful_scrapes'],
+        'failed': scraper.stats['failed_scrapes'],
+        'wall_seconds': wall_time,
+        'cpu_seconds': cpu_time,
+        'peak_rss_mb': _peak_rss_mb(),
+        'requests': len(request_times),
+    }
+    if request_times:
+        request_times.sort()
+        metrics['request_p50_ms'] = request_times[len(request_times) // 2] * 1000
+        metrics['request_p95_ms'] = request_times[int(len(request_times) * 0.95)] * 1000
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        metrics['peak_heap_mb'] = peak / (1024 * 1024)
+        metrics['peak_page_heap_mb'] = max(page_peaks, default=0) / (1024 * 1024)
+        metrics['asset_phase_heap_mb'] = max(asset_phase, default=0) / (1024 * 1024)
+    result_queue.put(metrics)
+
+
+def _wait_for_metrics(process, result_queue, timeout):
+    """
+    Wait for the metrics of a worker process.
+
+    Raises:
+        RuntimeError: If the worker exits without metrics or does not finish in time
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return result_queue.get(timeout=1.0)
+        except queue.Empty:
+            pass
+        if process.exitcode is not None:
+            # Metrics put just before the exit may still be on the way
+            try:
+                return result_queue.get(timeout=1.0)
+            except queue.Empty:
+                raise RuntimeError(f"worker exited with code {process.exitcode} without reporting metrics")
+        if time.monotonic() > deadline:
+            process.terminate()
+            process.join()
+            raise RuntimeError(f"worker did not finish within {timeout} seconds")
+
+
+def run_benchmark(name, config, seed=42, trace_memory=False, protocol='http1', timeout=WORKER_TIMEOUT):
+    """
+    Run a single benchmark configuration end to end.
+
+    Args:
+        name (str): Name of the configuration
+        config (dict): Synthetic site parameters
+        seed (int): Seed for the synthetic site
+        trace_memory (bool): Measure the peak Python heap of the worker and of
+            each page with tracemalloc (slows the run down)
+        protocol (str): 'http1' or 'http2' (h2c server and the scraper's httpx backend)
+        timeout (float): Seconds after which the worker process is terminated
+
+    Returns:
+        dict: Benchmark result record
+
+    Raises:
+        RuntimeError: If the worker process crashed or timed out
+    """
+    site = SyntheticSite(seed=seed, **config)
+    work_dir = tempfile.mkdtemp(prefix='robopol-bench-')
+    try:
+        server_class = SyntheticSiteH2Server if protocol == 'http2' else SyntheticSiteServer
+        with server_class(site) as server:
+            ctx = multiprocessing.get_context('spawn')
+            result_queue = ctx.Queue()
+            process = ctx.Process(target=_scraper_worker,
+                                  args=(server.base_url, work_dir, config, result_queue, trace_memory,
+                                        protocol))
+            process.start()
+            try:
+                metrics = _wait_for_metrics(process, result_queue, timeout)
+            finally:
+                process.join()
+
+        metrics['bytes_written'] = _directory_size(work_dir)
+        metrics['pages_per_sec'] = (metrics['pages'] / metrics['wall_seconds']
+                                    if metrics['wall_seconds'] > 0 else 0.0)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'name': name,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'seed': seed,
+        'config': config,
+        'trace_memory': trace_memory,
+        'protocol': protocol,
+        'metrics': metrics,
+    }
+
+
+def _crawl_summary(work_dir, name, base_url, protocol, **kwargs):
+    """Crawl the synthetic site and return (sorted (url, title, images) of records, stats)."""
+    from scraper import RobopolScraper
+
+    output_dir = os.path.join(work_dir, name)
+    scraper = RobopolScraper(
+        output_dir=output_dir,
+        base_url=base_url,
+        status_callback=lambda message: None,
+        progress_callback=lambda *args: None,
+        download_images=True,
+        images_dir=os.path.join(output_dir, 'images'),
+        http2='h2c' if protocol == 'http2' else False,
+        http_cache_dir=os.path.join(work_dir, 'recording'),
+        **kwargs
+    )
+    try:
+        scraper.run_scraper(output_json=os.path.join(output_dir, 'scraped_data.json'))
+    finally:
+        scraper.close()
+    with open(os.path.join(output_dir, 'scraped_data.json'), 'r', encoding='utf-8') as f:
+        records = json.load(f)['scraped_data']
+    return sorted((r['url'], r['title'], len(r['downloaded_images'])) for r in records), scraper.stats
+
+
+def check_record_replay(config, seed=42, protocol='http1'):
+    """
+    Record a crawl of the synthetic site with assets and replay it offline.
+
+    Args:
+        config (dict): Synthetic site parameters
+        seed (int): Seed for the synthetic site
+        protocol (str): 'http1' or 'http2'
+
+    Returns:
+        dict: Pages and images of the recorded and the replayed crawl
+
+    Raises:
+        RuntimeError: If the replayed crawl differs from the recorded one
+    """
+    site = SyntheticSite(seed=seed, **dict(config, assets=max(config.get('assets', 0), 1)))
+    work_dir = tempfile.mkdtemp(prefix='robopol-replay-')
+    try:
+        server_class = SyntheticSiteH2Server if protocol == 'http2' else SyntheticSiteServer
+        with server_class(site) as server:
+            base_url = server.base_url
+            recorded, recorded_stats = _crawl_summary(work_dir, 'record', base_url, protocol)
+        # The server is stopped, so every response has to come from the recording
+        replayed, replayed_stats = _crawl_summary(work_dir, 'replay', base_url, protocol,
+                                                  http_cache_mode='replay')
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    result = {key: (recorded_stats[key], replayed_stats[key])
+              for key in ('successful_scrapes', 'downloaded_images')}
+    if recorded != replayed or result['downloaded_images'][0] != result['downloaded_images'][1]:
+        raise RuntimeError(f"replay differs from the recording: {result}")
+    return result
+
+
+def _git_commit():
+    """Return the short hash of the current git commit, if available."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def load_results(path):
+    """Load benchmark records from a JSON Lines file."""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def format_result(record, baseline=None):
+    """Format one result record as a table row, optionally relative to a baseline."""
+    m = record['metrics']
+    rss = f"{m['peak_rss_mb']:8.1f}" if m.get('peak_rss_mb') is not None else "       -"
+    page_heap = "          -"
+    if m.get('peak_page_heap_mb') is not None:
+        page_heap = f"{m['peak_page_heap_mb']:5.1f}/{m.get('asset_phase_heap_mb', 0):5.1f}"
+    latency = "           -"
+    if m.get('request_p50_ms') is not None:
+        latency = f"{m['request_p50_ms']:5.1f}/{m['request_p95_ms']:6.1f}"
+    name = record['name'] + ('/h2' if record.get('protocol') == 'http2' else '')
+    row = (f"{name:<12} {m['pages']:>6} {m['failed']:>6} {m['pages_per_sec']:>9.1f} "
+           f"{m['cpu_seconds']:>8.2f} {rss} {page_heap} {latency} {m['bytes_written'] / (1024 * 1024):>9.2f}")
+    if baseline:
+        base = baseline['metrics']
+        if base.get('pages_per_sec'):
+            row += f"  ({m['pages_per_sec'] / base['pages_per_sec'] - 1:+.1%} pages/s vs {baseline.get('commit')})"
+    return row
+
+
+def main():
+    """Run benchmark configurations from the command line."""
+    parser = argparse.ArgumentParser(description="RobopolScraper benchmark suite")
+    parser.add_argument('--configs', nargs='+', choices=sorted(PRESETS),
+                        help="Preset configurations to run (default: all)")
+    parser.add_argument('--pages', type=int, help="Number of pages (custom configuration)")
+    parser.add_argument('--fanout', type=int, default=5, help="Links per page")
+    parser.add_argument('--page-size', type=int, default=10000, help="Approximate page size in bytes")
+    parser.add_argument('--assets', type=int, default=0, help="Images per page")
+    parser.add_argument('--latency', type=float, default=0.0, help="Server latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument('--seed', type=int, default=42, help="Seed of the synthetic site")
+    parser.add_argument('--repeat', type=int, default=1, help="Number of runs per configuration")
+    parser.add_argument('--output', default='bench_results.jsonl', help="JSON Lines file for results")
+    parser.add_argument('--compare', help="Results file with baseline runs to compare against")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Measure peak Python heap per page and heap held during its asset "
+                             "downloads with tracemalloc (slower)")
+    parser.add_argument('--protocol', choices=('http1', 'http2'), default='http1',
+                        help="HTTP version of the server and the scraper (http2 needs httpx[http2])")
+    parser.add_argument('--timeout', type=float, default=WORKER_TIMEOUT,
+                        help="Seconds after which a run is aborted")
+    parser.add_argument('--check-replay', action='store_true',
+                        help="Instead of measuring, record each configuration with assets, replay it "
+                             "offline and check that the results match")
+    args = parser.parse_args()
+
+    if args.pages:
+        configs = {'custom': {'pages': args.pages, 'fanout': args.fanout, 'page_size': args.page_size,
+                              'assets': args.assets, 'latency': args.latency, 'error_rate': args.error_rate}}
+    else:
+        names = args.configs or sorted(PRESETS)
+        configs = {name: PRESETS[name] for name in names}
+
+    if args.check_replay:
+        import logging
+        logging.disable(logging.CRITICAL)
+        failed_checks = 0
+        for name, config in configs.items():
+            try:
+                result = check_record_replay(config, seed=args.seed, protocol=args.protocol)
+            except RuntimeError as e:
+                print(f"{name:<12} replay failed: {e}")
+                failed_checks += 1
+                continue
+            pages, images = result['successful_scrapes'][0], result['downloaded_images'][0]
+            print(f"{name:<12} replay ok: {pages} pages, {images} images ({args.protocol})")
+        sys.exit(1 if failed_checks else 0)
+
+    # Latest baseline record per configuration
+    baselines = {}
+    if args.compare:
+        for record in load_results(args.compare):
+            baselines[(record['name'], record.get('protocol', 'http1'),
+                       json.dumps(record['config'], sort_keys=True))] = record
+
+    print(f"{'config':<12} {'pages':>6} {'failed':>6} {'pages/s':>9} {'cpu s':>8} {'rss MB':>8} "
+          f"{'page/dl MB':>11} {'req p50/p95':>12} {'written MB':>9}")
+    failed_runs = 0
+    for name, config in configs.items():
+        for _ in range(args.repeat):
+            try:
+                record = run_benchmark(name, config, seed=args.seed, trace_memory=args.trace_memory,
+                                       protocol=args.protocol, timeout=args.timeout)
+            except RuntimeError as e:
+                print(f"{name:<12} failed: {e}")
+                failed_runs += 1
+                continue
+            baseline = baselines.get((name, args.protocol, json.dumps(config, sort_keys=True)))
+            print(format_result(record, baseline))
+            with open(args.output, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+
+    print(f"Results appended to {args.output}")
+    if failed_runs:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
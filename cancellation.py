@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cooperative cancellation of a running crawl.
+
+A CancelToken is shared by everything that can block for a long time:
+throttling and retry sleeps wait on it, asset queues drop pending work when
+it is cancelled and CancellableHTTPAdapter shuts down the sockets of
+in-flight requests, so blocked reads return immediately instead of running
+into the request timeout.
+"""
+
+import socket
+import weakref
+import threading
+from requests.adapters import HTTPAdapter
+
+
+class ScrapeCancelled(Exception):
+    """Raised inside the scraper when a stop was requested."""
+
+
+class CancelToken:
+    """Cancellation flag with interruptible sleeps and cancel callbacks."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def add_callback(self, callback):
+        """Register a function called (without arguments) on cancellation."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def cancel(self):
+        """Cancel the token and run the registered callbacks."""
+        self._event.set()
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback()
+
+    def reset(self):
+        """Clear the cancellation (for a new run)."""
+        self._event.clear()
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            ScrapeCancelled: If the token was cancelled
+        """
+        if self._event.is_set():
+            raise ScrapeCancelled()
+
+    def sleep(self, seconds):
+        """
+        Sleep unless the token is cancelled first.
+
+        Raises:
+            ScrapeCancelled: If the token is cancelled before the time elapses
+        """
+        if self._event.wait(seconds):
+            raise ScrapeCancelled()
+
+
+def _registering_pool_class(pool_class, register):
+    """Create a connection pool class that reports every new connection."""
+
+    class RegisteringPool(pool_class):
+        def _new_conn(self):
+            conn = super()._new_conn()
+            register(conn)
+            return conn
+
+    return RegisteringPool
+
+
+class CancellableHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter whose in-flight requests are aborted on cancellation.
+
+    Connections created by the adapter are tracked; abort() shuts down their
+    sockets, which makes blocked reads in other threads fail immediately.
+    """
+
+    def __init__(self, cancel_token, *args, **kwargs):
+        """
+        Initialization of the adapter.
+
+        Args:
+            cancel_token (CancelToken): Token that aborts the requests of the adapter
+            *args, **kwargs: Arguments of requests.adapters.HTTPAdapter
+        """
+        self.cancel_token = cancel_token
+        self._connections = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+        cancel_token.add_callback(self.abort)
+
+    def _register(self, conn):
+        with self._connections_lock:
+            self._connections.add(conn)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _registering_pool_class(pool_class, self._register)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, *args, **kwargs):
+        self.cancel_token.raise_if_cancelled()
+        return super().send(request, *args, **kwargs)
+
+    def abort(self):
+        """Shut down the sockets of all connections of the adapter."""
+        with self._connections_lock:
+            connections = list(self._connections)
+        for conn in connections:
+            sock = getattr(conn, 'sock', None)
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
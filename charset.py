@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fast character encoding detection of HTML documents.
+
+The encoding is taken from the first reliable source, in order: the charset
+of the Content-Type header, a byte order mark, a <meta> declaration in the
+first few KB, strict UTF-8 validation and, as a last resort, statistical
+detection over a bounded prefix of the document. The content itself is
+never decoded here, so callers can pass the bytes straight to the parser.
+"""
+
+import re
+import codecs
+
+try:
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
+
+# Number of bytes searched for a <meta> declaration
+SNIFF_BYTES = 4096
+
+# Number of bytes examined by statistical detection
+DETECT_BYTES = 65536
+
+# Encoding used when nothing else applies
+FALLBACK_ENCODING = 'cp1252'
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET = re.compile(
+    rb'<meta[^>]+?charset\s*=\s*["\']?\s*([\w.:-]+)|<\?xml[^>]+encoding\s*=\s*["\']([\w.:-]+)',
+    re.IGNORECASE
+)
+
+# Labels that browsers decode differently from their Python codec
+ENCODING_OVERRIDES = {
+    'iso8859-1': 'cp1252',
+    'ascii': 'cp1252',
+}
+
+# A document declaring UTF-16 in a <meta> tag cannot actually be UTF-16 (the tag
+# would not be readable as ASCII); only applied to <meta> labels, not to headers
+META_ENCODING_OVERRIDES = {
+    'utf-16': 'utf-8',
+    'utf-16-le': 'utf-8',
+    'utf-16-be': 'utf-8',
+}
+
+
+def normalize_encoding(label):
+    """
+    Map an encoding label to a Python codec name.
+
+    Args:
+        label (str or bytes): Encoding label from a header or document
+
+    Returns:
+        str: Codec name or None if the label is unknown
+    """
+    if isinstance(label, bytes):
+        label = label.decode('ascii', errors='ignore')
+    try:
+        name = codecs.lookup(label.strip()).name
+    except (LookupError, ValueError):
+        return None
+    return ENCODING_OVERRIDES.get(name, name)
+
+
+def is_utf8(content):
+    """Check if bytes are valid UTF-8."""
+    try:
+        content.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte sequence cut off at the end still counts as UTF-8
+        return e.start >= len(content) - 3 and e.reason == 'unexpected end of data'
+    return True
+
+
+def detect_encoding(content, content_type=None):
+    """
+    Detect the encoding of an HTML document.
+
+    Args:
+        content (bytes): Raw document
+        content_type (str): Content-Type header of the response
+
+    Returns:
+        tuple: (encoding, source) where source is 'header', 'bom', 'meta',
+            'utf-8', 'detected' or 'fallback'
+    """
+    if content_type:
+        match = HEADER_CHARSET.search(content_type)
+        if match:
+            encoding = normalize_encoding(match.group(1))
+            if encoding:
+                return encoding, 'header'
+
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding, 'bom'
+
+    match = META_CHARSET.search(content, 0, SNIFF_BYTES)
+    if match:
+        encoding = normalize_encoding(match.group(1) or match.group(2))
+        if encoding:
+            return META_ENCODING_OVERRIDES.get(encoding, encoding), 'meta'
+
+    # Only a prefix is validated; the parser falls back on its own if a
+    # later part of the document turns out not to be UTF-8
+    if is_utf8(content[:DETECT_BYTES]):
+        return 'utf-8', 'utf-8'
+
+    if charset_normalizer is not None:
+        best = charset_normalizer.from_bytes(content[:DETECT_BYTES]).best()
+        if best is not None:
+            encoding = normalize_encoding(best.encoding)
+            if encoding:
+                return encoding, 'detected'
+
+    return FALLBACK_ENCODING, 'fallback'
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fast discovery of the URL inventory of a site.
+
+Discovery uses the session, throttling and URL filters of a RobopolScraper
+but never saves HTML, builds a parse tree or downloads assets. Responses are
+streamed through LinkTokenizer, a minimal scanner of link tags working on
+raw bytes, and reading stops at </body>; non-HTML responses are closed right
+after their headers. Every URL is recorded with its HTTP status, crawl depth
+and content type in a CSV file; the link graph of the site can be saved as
+well (see link_graph.py).
+
+Usage:
+    python discovery.py https://example.com --output urls.csv
+    python discovery.py https://example.com --output urls.csv --max-depth 3 --graph graph.npz
+"""
+
+import os
+import re
+import csv
+import html
+import time
+import logging
+import argparse
+from collections import deque
+
+from cancellation import ScrapeCancelled
+from charset import detect_encoding
+from url_classifier import route_content_type, PAGE
+
+logger = logging.getLogger('RobopolScraper')
+
+# Columns of the URL inventory
+INVENTORY_FIELDS = ('url', 'status', 'depth', 'content_type')
+
+# Start of the only markup the tokenizer looks at, other tags are skipped unparsed
+TAG_START_PATTERN = re.compile(rb'<(?:!--|/?(?:a|area|base|body|html|script|style)[\s/>])', re.IGNORECASE)
+TAG_PATTERN = re.compile(rb'<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>', re.DOTALL)
+HREF_PATTERN = re.compile(rb'''\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''', re.IGNORECASE)
+RAW_TEXT_END = {
+    b'script': re.compile(rb'</script\s*>', re.IGNORECASE),
+    b'style': re.compile(rb'</style\s*>', re.IGNORECASE),
+}
+
+# Tags longer than this are treated as text
+MAX_TAG_BYTES = 65536
+
+
+class LinkTokenizer:
+    """
+    Incremental scanner of link hrefs in raw HTML.
+
+    Collects href values of <a> and <area> tags and the first <base> href,
+    skipping comments and the content of <script> and <style>. Scanning
+    ends at </body> (or </html>), after which done is True.
+    """
+
+    def __init__(self):
+        self.links = []
+        self.base_href = None
+        self.done = False
+        self._buffer = b''
+        self._raw_text_end = None
+
+    def feed(self, data):
+        """
+        Scan the next chunk of the document.
+
+        Args:
+            data (bytes): Chunk of the raw document
+        """
+        buffer = self._buffer + data
+        pos = 0
+        while not self.done:
+            # Inside <script> or <style>: skip to the end tag
+            if self._raw_text_end is not None:
+                match = self._raw_text_end.search(buffer, pos)
+                if match is None:
+                    pos = max(pos, len(buffer) - 16)
+                    break
+                pos = match.end()
+                self._raw_text_end = None
+                continue
+
+            start_match = TAG_START_PATTERN.search(buffer, pos)
+            if start_match is None:
+                # Keep a possible incomplete tag start at the end of the chunk
+                pos = max(pos, len(buffer) - 8)
+                break
+            start = start_match.start()
+            match = TAG_PATTERN.match(buffer, start)
+            if match is None:
+                # Incomplete tag or comment: wait for more data, unless it is a stray '<'
+                terminator = b'-->' if buffer.startswith(b'<!--', start) else b'>'
+                if buffer.find(terminator, start) < 0 and len(buffer) - start < MAX_TAG_BYTES:
+                    pos = start
+                    break
+                pos = start + 1
+                continue
+
+            pos = match.end()
+            name = match.group(2)
+            if name is None:
+                continue
+            name = name.lower()
+            if match.group(1):
+                if name in (b'body', b'html'):
+                    self.done = True
+            elif name in (b'a', b'area'):
+                href = HREF_PATTERN.search(match.group(3))
+                if href:
+                    self.links.append(href.group(1) or href.group(2) or href.group(3) or b'')
+            elif name == b'base' and self.base_href is None:
+                href = HREF_PATTERN.search(match.group(3))
+                if href:
+                    self.base_href = href.group(1) or href.group(2) or href.group(3)
+            elif name in RAW_TEXT_END:
+                self._raw_text_end = RAW_TEXT_END[name]
+        self._buffer = buffer[pos:]
+
+    def get_links(self, encoding='utf-8'):
+        """Return the collected hrefs decoded and with character references resolved."""
+        return [html.unescape(link.decode(encoding, errors='replace')).strip() for link in self.links]
+
+    def get_base_href(self, encoding='utf-8'):
+        if self.base_href is None:
+            return None
+        return html.unescape(self.base_href.decode(encoding, errors='replace')).strip()
+
+
+class SiteDiscovery:
+    """Breadth-first discovery of the URLs of a site."""
+
+    def __init__(self, scraper, max_depth=None, chunk_size=16384):
+        """
+        Initialization of the discovery.
+
+        Args:
+            scraper (RobopolScraper): Scraper providing the base URL, session,
+                throttling, URL filters, max_pages and the optional link graph
+            max_depth (int): Maximum link depth from the base URL (None = unlimited)
+            chunk_size (int): Number of bytes read from a response at a time
+        """
+        self.scraper = scraper
+        self.max_depth = max_depth
+        self.chunk_size = chunk_size
+        self.stats = {'urls': 0, 'pages': 0, 'errors': 0, 'filtered_urls': 0}
+
+    def fetch_links(self, url):
+        """
+        Fetch a URL and scan it for links.
+
+        Args:
+            url (str): URL to fetch
+
+        Returns:
+            tuple: (status, content_type, links) with status None on network errors
+
+        Raises:
+            ScrapeCancelled: If a stop was requested
+        """
+        try:
+            response = self.scraper._http_get(url, stream=True)
+        except ScrapeCancelled:
+            raise
+        except Exception as e:
+            self.scraper.status_callback(f"Error fetching {url}: {e}")
+            return None, None, []
+
+        content_type = response.headers.get('Content-Type')
+        links = []
+        try:
+            if response.status_code == 200 and route_content_type(content_type) == PAGE:
+                tokenizer = LinkTokenizer()
+                encoding = None
+                for chunk in response.iter_content(self.chunk_size):
+                    if encoding is None:
+                        encoding, _ = detect_encoding(chunk, content_type)
+                    tokenizer.feed(chunk)
+                    if tokenizer.done:
+                        break
+
+                # Relative links resolve against the final URL after redirects
+                base_url = response.url
+                base_href = tokenizer.get_base_href(encoding or 'utf-8')
+                if base_href:
+                    base_url = self.scraper.normalize_link(base_href, base_url) or base_url
+                for href in tokenizer.get_links(encoding or 'utf-8'):
+                    link = self.scraper.normalize_link(href, base_url)
+                    if link is not None:
+                        links.append(link)
+        except ScrapeCancelled:
+            raise
+        except Exception as e:
+            self.scraper.cancel_token.raise_if_cancelled()
+            self.scraper.status_callback(f"Error reading {url}: {e}")
+        finally:
+            response.close()
+        return response.status_code, content_type, links
+
+    def run(self, output_csv):
+        """
+        Discover the URLs reachable from the base URL of the scraper.
+
+        Args:
+            output_csv (str): Path to the CSV file with the URL inventory
+
+        Returns:
+            dict: Discovery statistics (stopped is True after request_stop)
+        """
+        scraper = self.scraper
+        start_time = time.time()
+        queue = deque([(scraper.base_url, 0)])
+        seen = {scraper.base_url}
+        filtered = set()
+        stopped = False
+
+        scraper.status_callback(f"Discovering URLs from {scraper.base_url}")
+        try:
+            with open(output_csv, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(INVENTORY_FIELDS)
+
+                while queue:
+                    if scraper.stop_requested or (scraper.max_pages is not None
+                                                  and self.stats['urls'] >= scraper.max_pages):
+                        stopped = scraper.stop_requested
+                        break
+                    url, depth = queue.popleft()
+
+                    try:
+                        status, content_type, links = self.fetch_links(url)
+                    except ScrapeCancelled:
+                        stopped = True
+                        break
+
+                    writer.writerow((url, status if status is not None else '', depth, content_type or ''))
+                    self.stats['urls'] += 1
+                    if status is None:
+                        self.stats['errors'] += 1
+                    elif status == 200 and route_content_type(content_type) == PAGE:
+                        self.stats['pages'] += 1
+
+                    # Filtered links are left out of the graph, as in a full crawl
+                    page_links = []
+                    for link in links:
+                        if link in filtered:
+                            continue
+                        if link not in seen and scraper.should_filter_url(link):
+                            seen.add(link)
+                            filtered.add(link)
+                            self.stats['filtered_urls'] += 1
+                            continue
+                        page_links.append(link)
+                    if scraper.link_graph is not None and page_links:
+                        scraper.link_graph.add_links(url, set(page_links))
+
+                    # Queue links of pages below the depth limit
+                    if self.max_depth is None or depth < self.max_depth:
+                        for link in page_links:
+                            if link not in seen:
+                                seen.add(link)
+                                queue.append((link, depth + 1))
+
+                    if self.stats['urls'] % 100 == 0:
+                        scraper.status_callback(f"Discovered {self.stats['urls']} URLs, {len(queue)} queued")
+                    scraper._update_progress(self.stats['urls'], self.stats['urls'] + len(queue))
+
+            if scraper.link_graph is not None:
+                scraper.save_link_graph()
+        finally:
+            scraper.close()
+
+        self.stats['duration_seconds'] = time.time() - start_time
+        if stopped:
+            self.stats['stopped'] = True
+        scraper.status_callback(f"Discovery finished: {self.stats['urls']} URLs in "
+                                f"{self.stats['duration_seconds']:.2f} seconds, saved to {output_csv}")
+        return self.stats
+
+
+def main():
+    """Discover the URLs of a site from the command line."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Discover the URL inventory of a site")
+    parser.add_argument('base_url', help="URL to start from")
+    parser.add_argument('--output', default='urls.csv', help="CSV file with url, status, depth and content type")
+    parser.add_argument('--graph', help="Also save the link graph to this .npz file (requires numpy)")
+    parser.add_argument('--max-depth', type=int, help="Maximum link depth from the base URL")
+    parser.add_argument('--max-pages', type=int, help="Maximum number of URLs")
+    parser.add_argument('--delay', type=float, default=0.0, help="Delay between requests in seconds")
+    parser.add_argument('--no-filter-eshop', action='store_true', help="Do not filter e-shop pages")
+    parser.add_argument('--no-filter-english', action='store_true', help="Do not filter English pages")
+    parser.add_argument('--include', action='append', help="Regex pattern for including URLs")
+    parser.add_argument('--exclude', action='append', help="Regex pattern for excluding URLs")
+    args = parser.parse_args()
+
+    from scraper import RobopolScraper
+
+    scraper = RobopolScraper(
+        output_dir=os.path.dirname(os.path.abspath(args.output)),
+        base_url=args.base_url,
+        status_callback=logger.info,
+        filter_eshop=not args.no_filter_eshop,
+        filter_english=not args.no_filter_english,
+        url_include_patterns=args.include,
+        url_exclude_patterns=args.exclude,
+        request_delay=args.delay,
+        link_graph_path=args.graph,
+        max_pages=args.max_pages,
+    )
+    SiteDiscovery(scraper, max_depth=args.max_depth).run(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Distributed crawling with a coordinator and multiple workers.
+
+The coordinator keeps the frontier and the set of seen URLs and serves them
+over HTTP. The frontier is split into partitions by a hash of the URL host and
+every registered worker owns a share of the partitions, so requests to one
+host normally come from one worker. Workers lease batches of URLs, scrape them
+with RobopolScraper and send back the page records together with newly
+discovered links. When the frontier is exhausted the coordinator merges all
+records into one JSON file in the same format as RobopolScraper.run_scraper.
+
+Usage:
+    python distributed.py coordinator --base-url https://example.com --output scraped_data.json
+    python distributed.py worker --coordinator http://10.0.0.1:8765 --output-dir scrap
+"""
+
+import os
+import json
+import time
+import zlib
+import socket
+import logging
+import argparse
+import threading
+from collections import deque
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from cancellation import ScrapeCancelled
+from records import PageRecord
+
+logger = logging.getLogger('RobopolScraper')
+
+
+def get_partition(url, num_partitions):
+    """
+    Get the frontier partition of a URL.
+
+    Uses a hash of the host that is stable across processes and machines.
+
+    Args:
+        url (str): URL to assign
+        num_partitions (int): Number of partitions
+
+    Returns:
+        int: Partition index
+    """
+    return zlib.crc32(urlparse(url).netloc.lower().encode('utf-8')) % num_partitions
+
+
+class CrawlCoordinator:
+    """Shared frontier, seen-set and result store of a distributed crawl."""
+
+    def __init__(self, base_url, scraper_config=None, num_partitions=64,
+                 lease_timeout=300.0, allow_steal=True, status_callback=None):
+        """
+        Initialization of the coordinator.
+
+        Args:
+            base_url (str): Base URL to start scraping from
+            scraper_config (dict): RobopolScraper settings sent to every worker
+            num_partitions (int): Number of frontier partitions
+            lease_timeout (float): Seconds after which unfinished URLs are handed out again
+            allow_steal (bool): Whether idle workers take URLs from partitions of other workers
+            status_callback (callable): Function for recording status messages
+        """
+        self.base_url = base_url
+        self.scraper_config = dict(scraper_config or {}, base_url=base_url)
+        self.num_partitions = num_partitions
+        self.lease_timeout = lease_timeout
+        self.allow_steal = allow_steal
+        self.status_callback = status_callback or logger.info
+
+        self.partitions = [deque() for _ in range(num_partitions)]
+        self.seen_urls = set()
+        self.leases = {}
+        self.workers = {}
+        self.worker_stats = {}
+        self.scraped_data = []
+        self.failed_urls = 0
+        self.skipped_urls = 0
+        self.start_time = time.time()
+        self.finished = threading.Event()
+
+        self._lock = threading.Lock()
+        self._owned = {}
+
+        self._enqueue(base_url)
+
+    def _enqueue(self, url):
+        if url in self.seen_urls:
+            return False
+        self.seen_urls.add(url)
+        self.partitions[get_partition(url, self.num_partitions)].append(url)
+        return True
+
+    def _rebalance(self):
+        """Assign partitions to active workers round-robin."""
+        worker_ids = sorted(self.workers)
+        self._owned = {worker_id: [] for worker_id in worker_ids}
+        for partition in range(self.num_partitions):
+            if worker_ids:
+                self._owned[worker_ids[partition % len(worker_ids)]].append(partition)
+
+    def _expire(self, now):
+        """Return expired leases to the frontier and drop silent workers."""
+        for url, (worker_id, expiry) in list(self.leases.items()):
+            if expiry < now:
+                del self.leases[url]
+                self.partitions[get_partition(url, self.num_partitions)].appendleft(url)
+
+        silent = [worker_id for worker_id, last_seen in self.workers.items()
+                  if now - last_seen > self.lease_timeout]
+        for worker_id in silent:
+            del self.workers[worker_id]
+            self.status_callback(f"Worker {worker_id} timed out")
+        if silent:
+            self._rebalance()
+
+    def _check_finished(self):
+        if not self.leases and not any(self.partitions):
+            self.finished.set()
+
+    def register(self, worker_id):
+        """
+        Register a worker.
+
+        Args:
+            worker_id (str): Unique ID of the worker
+
+        Returns:
+            dict: Scraper configuration for the worker
+        """
+        with self._lock:
+            is_new = worker_id not in self.workers
+            self.workers[worker_id] = time.monotonic()
+            if is_new:
+                self._rebalance()
+                self.status_callback(f"Worker {worker_id} registered ({len(self.workers)} active)")
+        return {'config': self.scraper_config}
+
+    def lease(self, worker_id, batch_size=10):
+        """
+        Hand out a batch of URLs to a worker.
+
+        URLs come from the partitions owned by the worker first. If they are
+        empty and stealing is allowed, URLs from other partitions are used.
+
+        Args:
+            worker_id (str): ID of the worker
+            batch_size (int): Maximum number of URLs
+
+        Returns:
+            dict: {'urls': [...], 'done': bool}
+        """
+        with self._lock:
+            now = time.monotonic()
+            if worker_id not in self.workers:
+                self.workers[worker_id] = now
+                self._rebalance()
+            self.workers[worker_id] = now
+            self._expire(now)
+
+            owned = self._owned.get(worker_id, [])
+            candidates = owned
+            if self.allow_steal:
+                candidates = owned + [p for p in range(self.num_partitions) if p not in owned]
+
+            urls = []
+            for partition in candidates:
+                frontier = self.partitions[partition]
+                while frontier and len(urls) < batch_size:
+                    urls.append(frontier.popleft())
+                if len(urls) >= batch_size:
+                    break
+
+            expiry = now + self.lease_timeout
+            for url in urls:
+                self.leases[url] = (worker_id, expiry)
+
+            self._check_finished()
+            return {'urls': urls, 'done': self.finished.is_set()}
+
+    def complete(self, worker_id, results, stats=None):
+        """
+        Accept results of a leased batch.
+
+        Args:
+            worker_id (str): ID of the worker
+            results (list): Items {'url', 'data', 'links', 'skipped'}; data is None for
+                failed pages and for skipped non-HTML URLs (skipped is True)
+            stats (dict): Cumulative statistics of the worker
+
+        Returns:
+            dict: {'accepted': int, 'new_urls': int}
+        """
+        with self._lock:
+            self.workers[worker_id] = time.monotonic()
+            if stats:
+                self.worker_stats[worker_id] = stats
+
+            accepted = 0
+            new_urls = 0
+            for result in results:
+                url = result.get('url')
+                if self.leases.pop(url, None) is None:
+                    # Lease expired and the URL was handed out again
+                    continue
+                accepted += 1
+
+                data = result.get('data')
+                if data is None and result.get('skipped'):
+                    self.skipped_urls += 1
+                elif data is None:
+                    self.failed_urls += 1
+                else:
+                    record = PageRecord.from_dict(data)
+                    record['worker'] = worker_id
+                    self.scraped_data.append(record)
+
+                for link in result.get('links') or []:
+                    if self._enqueue(link):
+                        new_urls += 1
+
+            self._check_finished()
+            return {'accepted': accepted, 'new_urls': new_urls}
+
+    def get_status(self):
+        """Return progress counters of the crawl."""
+        with self._lock:
+            return {
+                'workers': len(self.workers),
+                'seen_urls': len(self.seen_urls),
+                'queued_urls': sum(len(p) for p in self.partitions),
+                'leased_urls': len(self.leases),
+                'scraped_pages': len(self.scraped_data),
+                'failed_urls': self.failed_urls,
+                'skipped_urls': self.skipped_urls,
+                'done': self.finished.is_set(),
+            }
+
+    def get_result_stats(self):
+        """Return summary statistics merged from all workers, with the keys of a local crawl."""
+        from scraper import RESULT_STATS
+
+        stats = {'total_urls': len(self.scraped_data) + self.failed_urls + self.skipped_urls}
+        for key in RESULT_STATS:
+            stats[key] = sum(worker_stats.get(key, 0) for worker_stats in self.worker_stats.values())
+
+        # Pages are counted once, also when a lease expired and a URL was scraped twice
+        stats['successful_scrapes'] = len(self.scraped_data)
+        stats['failed_scrapes'] = self.failed_urls
+        stats['duration_seconds'] = time.time() - self.start_time
+        stats['workers'] = len(self.worker_stats)
+        return stats
+
+    def save_results(self, output_json):
+        """Merge results of all workers into one JSON file."""
+        from scraper import save_results_json
+
+        with self._lock:
+            save_results_json(output_json, self.get_result_stats(), self.scraped_data)
+        self.status_callback(f"Results saved to {output_json}")
+
+
+class _CoordinatorRequestHandler(BaseHTTPRequestHandler):
+    """JSON API of the coordinator."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/status':
+            self._send_json(200, self.server.coordinator.get_status())
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        coordinator = self.server.coordinator
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            worker_id = request['worker_id']
+
+            if self.path == '/register':
+                response = coordinator.register(worker_id)
+            elif self.path == '/lease':
+                response = coordinator.lease(worker_id, int(request.get('batch_size', 10)))
+            elif self.path == '/complete':
+                response = coordinator.complete(worker_id, request.get('results', []), request.get('stats'))
+            else:
+                self._send_json(404, {'error': 'Not found'})
+                return
+        except (KeyError, ValueError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        self._send_json(200, response)
+
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+
+
+class CoordinatorServer:
+    """HTTP server exposing a CrawlCoordinator to workers."""
+
+    def __init__(self, coordinator, host='0.0.0.0', port=8765):
+        self.coordinator = coordinator
+        self.httpd = ThreadingHTTPServer((host, port), _CoordinatorRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.coordinator = coordinator
+        self.thread = None
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def run_until_finished(self, output_json=None, grace_period=5.0):
+        """
+        Serve workers until the crawl is finished and save merged results.
+
+        Args:
+            output_json (str): Path to output JSON file
+            grace_period (float): Seconds to keep answering so workers learn the crawl is done
+
+        Returns:
+            str: Path to output JSON file or None
+        """
+        self.start()
+        try:
+            while not self.coordinator.finished.wait(10):
+                status = self.coordinator.get_status()
+                self.coordinator.status_callback(
+                    f"Workers: {status['workers']}, scraped: {status['scraped_pages']}, "
+                    f"queued: {status['queued_urls']}, leased: {status['leased_urls']}"
+                )
+            time.sleep(grace_period)
+        finally:
+            self.stop()
+
+        if output_json:
+            self.coordinator.save_results(output_json)
+            return output_json
+        return None
+
+
+class CrawlWorker:
+    """Worker that scrapes URLs leased from a coordinator."""
+
+    def __init__(self, coordinator_url, output_dir="scrap", worker_id=None,
+                 batch_size=10, status_callback=None, **scraper_options):
+        """
+        Initialization of the worker.
+
+        Args:
+            coordinator_url (str): Base URL of the coordinator
+            output_dir (str): Local directory for output files
+            worker_id (str): Unique ID of the worker (default: host name and PID)
+            batch_size (int): Number of URLs leased at once
+            status_callback (callable): Function for recording status messages
+            **scraper_options: Local RobopolScraper settings (e.g. download_images, images_dir)
+        """
+        self.coordinator_url = coordinator_url.rstrip('/')
+        self.output_dir = output_dir
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.status_callback = status_callback or logger.info
+        self.scraper_options = scraper_options
+        self.session = requests.Session()
+        self.scraper = None
+
+    def _call(self, endpoint, payload, retries=5):
+        """POST a request to the coordinator, retrying on connection problems."""
+        payload = dict(payload, worker_id=self.worker_id)
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.post(f"{self.coordinator_url}/{endpoint}", json=payload, timeout=60)
+                response.raise_for_status()
+                return response.json()
+            except requests.RequestException as e:
+                if attempt == retries:
+                    raise
+                self.status_callback(f"Coordinator request failed ({e}), retrying...")
+                time.sleep(min(30, 2 ** attempt))
+
+    def run(self, idle_delay=1.0):
+        """
+        Scrape leased URLs until the coordinator reports the crawl as finished.
+
+        Args:
+            idle_delay (float): Seconds to wait when no URLs are available
+        """
+        from scraper import RobopolScraper
+
+        config = self._call('register', {})['config']
+        options = dict(config, **self.scraper_options)
+        options['recursive'] = True
+        self.scraper = RobopolScraper(output_dir=self.output_dir, status_callback=self.status_callback,
+                                      **options)
+        self.status_callback(f"Worker {self.worker_id} started")
+
+        # Run state of the scraper (start time, page store crawl); URLs come from the coordinator
+        self.scraper.start_run()
+        self.scraper.queue.clear()
+        stopped = False
+        try:
+            while not self.scraper.stop_requested:
+                batch = self._call('lease', {'batch_size': self.batch_size})
+                if batch['done']:
+                    break
+                if not batch['urls']:
+                    time.sleep(idle_delay)
+                    continue
+
+                results = []
+                try:
+                    for url in batch['urls']:
+                        failed_scrapes = self.scraper.stats['failed_scrapes']
+                        data, links = self.scraper.scrape_url(url)
+                        result = {'url': url, 'data': data.to_dict() if data else None, 'links': links}
+                        if data is None and self.scraper.stats['failed_scrapes'] == failed_scrapes:
+                            # Routed away from the page pipeline (non-HTML), not a failure
+                            result['skipped'] = True
+                        results.append(result)
+                except ScrapeCancelled:
+                    # Unfinished URLs are handed out again after the lease expires
+                    stopped = True
+                    self.scraper.writer.flush()
+                    self._call('complete', {'results': results, 'stats': self.scraper.stats})
+                    break
+
+                # Records are kept by the coordinator only
+                self.scraper.scraped_data.clear()
+                self.scraper.asset_downloader.wait()
+                self.scraper.writer.flush()
+
+                self._call('complete', {'results': results, 'stats': self.scraper.stats})
+
+            self.scraper.finish_run(stopped=stopped or self.scraper.stop_requested)
+        finally:
+            self.scraper.close()
+
+        self.status_callback(f"Worker {self.worker_id} finished")
+
+
+def main():
+    """Run a coordinator or a worker from the command line."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Distributed crawling with RobopolScraper")
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    coordinator_parser = subparsers.add_parser('coordinator', help="Run the coordinator")
+    coordinator_parser.add_argument('--base-url', required=True, help="Base URL to start scraping from")
+    coordinator_parser.add_argument('--host', default='0.0.0.0', help="Address to listen on")
+    coordinator_parser.add_argument('--port', type=int, default=8765, help="Port to listen on")
+    coordinator_parser.add_argument('--output', default='scraped_data.json', help="Merged output JSON file")
+    coordinator_parser.add_argument('--partitions', type=int, default=64, help="Number of frontier partitions")
+    coordinator_parser.add_argument('--lease-timeout', type=float, default=300.0,
+                                    help="Seconds before unfinished URLs are handed out again")
+    coordinator_parser.add_argument('--no-steal', action='store_true',
+                                    help="Never hand out URLs of partitions owned by other workers")
+    coordinator_parser.add_argument('--no-filter-eshop', action='store_true', help="Do not filter e-shop pages")
+    coordinator_parser.add_argument('--no-filter-english', action='store_true', help="Do not filter English pages")
+    coordinator_parser.add_argument('--include', action='append', help="Regex pattern for including URLs")
+    coordinator_parser.add_argument('--exclude', action='append', help="Regex pattern for excluding URLs")
+    coordinator_parser.add_argument('--delay', type=float, default=0.0, help="Delay between requests in seconds")
+
+    worker_parser = subparsers.add_parser('worker', help="Run a worker")
+    worker_parser.add_argument('--coordinator', required=True, help="URL of the coordinator")
+    worker_parser.add_argument('--output-dir', default='scrap', help="Local directory for HTML files")
+    worker_parser.add_argument('--worker-id', help="Unique ID of the worker")
+    worker_parser.add_argument('--batch-size', type=int, default=10, help="Number of URLs leased at once")
+
+    args = parser.parse_args()
+
+    if args.mode == 'coordinator':
+        coordinator = CrawlCoordinator(
+            args.base_url,
+            scraper_config={
+                'filter_eshop': not args.no_filter_eshop,
+                'filter_english': not args.no_filter_english,
+                'url_include_patterns': args.include,
+                'url_exclude_patterns': args.exclude,
+                'request_delay': args.delay,
+            },
+            num_partitions=args.partitions,
+            lease_timeout=args.lease_timeout,
+            allow_steal=not args.no_steal
+        )
+        server = CoordinatorServer(coordinator, host=args.host, port=args.port)
+        server.run_until_finished(args.output)
+    else:
+        worker = CrawlWorker(args.coordinator, output_dir=args.output_dir,
+                             worker_id=args.worker_id, batch_size=args.batch_size)
+        worker.run()
+
+
+if __name__ == "__main__":
+    main()
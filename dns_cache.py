@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+In-process DNS cache.
+
+Python resolves the host name again for every new connection, and asset
+workers open many connections to the same few CDN hosts. DNSCache keeps
+getaddrinfo results for a fixed time (the system resolver does not report
+record TTLs) and lets one lookup per name run at a time, so concurrent
+connections to a new host share it. Failed lookups are not cached.
+
+install() routes socket.getaddrinfo, which urllib3 and httpx use for new
+connections, through one shared cache until the matching uninstall().
+"""
+
+import time
+import socket
+import threading
+
+_original_getaddrinfo = socket.getaddrinfo
+_shared_cache = None
+_install_count = 0
+_install_lock = threading.Lock()
+
+
+class DNSCache:
+    """TTL cache of getaddrinfo results."""
+
+    def __init__(self, ttl=300.0, max_entries=4096, resolver=None):
+        """
+        Initialization of the cache.
+
+        Args:
+            ttl (float): Seconds for which a resolved address is reused
+            max_entries (int): Maximum number of cached lookups
+            resolver (callable): Function with the signature of socket.getaddrinfo
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.resolver = resolver or _original_getaddrinfo
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lookups = {}
+        self._lock = threading.Lock()
+
+    def _get_cached(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return list(entry[1])
+        return None
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """Resolve an address like socket.getaddrinfo, using cached results."""
+        key = (host, port, family, type, proto, flags)
+        with self._lock:
+            result = self._get_cached(key)
+            if result is not None:
+                return result
+            lookup_lock = self._lookups.setdefault(key, threading.Lock())
+
+        # Concurrent lookups of one name wait for the first one
+        with lookup_lock:
+            with self._lock:
+                result = self._get_cached(key)
+                if result is not None:
+                    return result
+
+            result = self.resolver(host, port, family, type, proto, flags)
+
+            with self._lock:
+                self.misses += 1
+                self._lookups.pop(key, None)
+                if len(self._entries) >= self.max_entries:
+                    # Entries are kept in insertion order, drop the oldest
+                    del self._entries[next(iter(self._entries))]
+                self._entries[key] = (time.monotonic() + self.ttl, tuple(result))
+        return result
+
+    def clear(self):
+        """Forget all cached addresses."""
+        with self._lock:
+            self._entries.clear()
+
+
+def install(ttl=300.0):
+    """
+    Route socket.getaddrinfo through a shared DNS cache.
+
+    Calls are reference counted; every install() needs a matching
+    uninstall(). The TTL of the first installation applies.
+
+    Args:
+        ttl (float): Seconds for which a resolved address is reused
+
+    Returns:
+        DNSCache: The shared cache
+    """
+    global _shared_cache, _install_count
+    with _install_lock:
+        if _install_count == 0:
+            _shared_cache = DNSCache(ttl)
+            socket.getaddrinfo = _shared_cache.getaddrinfo
+        _install_count += 1
+        return _shared_cache
+
+
+def uninstall():
+    """Restore socket.getaddrinfo after the last installation is removed."""
+    global _shared_cache, _install_count
+    with _install_lock:
+        if _install_count == 0:
+            return
+        _install_count -= 1
+        if _install_count == 0:
+            socket.getaddrinfo = _original_getaddrinfo
+            _shared_cache = None
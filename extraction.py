@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Text extraction from parsed pages for RobopolScraper."""
+
+import re
+from bs4 import NavigableString, CData, Tag
+
+# Maximum length of the content snippet stored in each record
+SNIPPET_LENGTH = 500
+
+# Tags whose content is never part of the main text
+BOILERPLATE_TAGS = {
+    'script', 'style', 'noscript', 'template', 'nav', 'footer', 'header', 'aside',
+    'form', 'button', 'select', 'iframe', 'svg', 'canvas', 'object', 'embed',
+}
+
+# Tags that start a new text block
+BLOCK_TAGS = {
+    'address', 'article', 'blockquote', 'body', 'dd', 'div', 'dl', 'dt', 'figcaption',
+    'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'main', 'ol', 'p', 'pre',
+    'section', 'table', 'td', 'th', 'tr', 'ul', 'br', 'hr',
+}
+
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+# Class or id values marking navigation, ads and similar page furniture
+BOILERPLATE_MARKER = re.compile(
+    r'(?:^|[-_\s])(?:nav|navbar|navigation|menu|footer|sidebar|breadcrumbs?|cookies?|banner|'
+    r'share|social|advert|ads|comments?|related|popup|modal|newsletter)(?:[-_\s]|$)',
+    re.IGNORECASE
+)
+
+
+def extract_snippet(node, max_length=SNIPPET_LENGTH):
+    """
+    Extract a text snippet from a node, stopping once the budget is reached.
+
+    Produces the same result as truncating
+    ``node.get_text(strip=True, separator=" ")`` to ``max_length`` characters
+    (with "..." appended when truncated), but only walks as many strings as
+    needed.
+
+    Args:
+        node (Tag): Element to extract text from
+        max_length (int): Maximum snippet length
+
+    Returns:
+        str: Text snippet
+    """
+    parts = []
+    length = -1
+    for text in node.stripped_strings:
+        parts.append(text)
+        length += len(text) + 1
+        if length > max_length:
+            break
+
+    content = " ".join(parts)
+    return content[:max_length] + "..." if len(content) > max_length else content
+
+
+def _is_boilerplate(tag):
+    """Check if a tag is page furniture based on its name, role, class or id."""
+    if tag.name in BOILERPLATE_TAGS:
+        return True
+    attrs = tag.attrs
+    if not attrs:
+        return False
+    if attrs.get('role') in ('navigation', 'banner', 'contentinfo', 'complementary'):
+        return True
+    if attrs.get('aria-hidden') == 'true' or 'hidden' in attrs:
+        return True
+    classes = attrs.get('class')
+    if classes and BOILERPLATE_MARKER.search(" ".join(classes)):
+        return True
+    element_id = attrs.get('id')
+    return bool(element_id and BOILERPLATE_MARKER.search(element_id))
+
+
+# Stack marker of elements that are not blocks
+_INLINE = object()
+
+
+class _BlockCollector:
+    """Splits a tree into text blocks with their link density."""
+
+    def __init__(self):
+        self.blocks = []
+        self.parts = []
+        self.chars = 0
+        self.link_chars = 0
+        self.tag = None
+
+    def flush(self):
+        if self.parts:
+            self.blocks.append((self.tag, " ".join(self.parts), self.chars, self.link_chars))
+        self.parts = []
+        self.chars = 0
+        self.link_chars = 0
+
+    def collect(self, node, in_link=False):
+        # Walk with an explicit stack; deeply nested pages exceed the recursion limit.
+        # Entries: (children iterator, inside a link, tag to restore after a block or _INLINE)
+        stack = [(iter(node.children), in_link, _INLINE)]
+        while stack:
+            children, in_link, parent_tag = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if parent_tag is not _INLINE:
+                    self.flush()
+                    self.tag = parent_tag
+            elif isinstance(child, Tag):
+                if _is_boilerplate(child):
+                    continue
+                if child.name in BLOCK_TAGS:
+                    stack.append((iter(child.children), in_link, self.tag))
+                    self.flush()
+                    self.tag = child.name
+                else:
+                    stack.append((iter(child.children), in_link or child.name == 'a', _INLINE))
+            elif type(child) in (NavigableString, CData):
+                text = child.strip()
+                if text:
+                    self.parts.append(text)
+                    self.chars += len(text)
+                    if in_link:
+                        self.link_chars += len(text)
+
+
+def extract_main_text(soup, min_block_length=25, max_link_density=0.5):
+    """
+    Extract the main text of a page without boilerplate.
+
+    Scripts, styles, navigation, headers, footers and elements marked as menus,
+    ads and similar are skipped. The remaining text is split into blocks and
+    blocks that are too short or consist mostly of link text are dropped.
+    The tree is not modified.
+
+    Args:
+        soup (BeautifulSoup): Analyzed page content
+        min_block_length (int): Minimum length of a kept block (headings excepted)
+        max_link_density (float): Maximum share of link text in a kept block
+
+    Returns:
+        str: Main text with one block per line
+    """
+    root = soup.body or soup
+    collector = _BlockCollector()
+    collector.collect(root)
+    collector.flush()
+
+    lines = []
+    for tag, text, chars, link_chars in collector.blocks:
+        if chars == 0 or link_chars / chars > max_link_density:
+            continue
+        if chars < min_block_length and tag not in HEADING_TAGS:
+            continue
+        lines.append(text)
+
+    return "\n".join(lines)
+
+
+def release_tree(soup):
+    """
+    Destroy a parsed page so its memory is freed immediately.
+
+    BeautifulSoup.decompose() on the document object itself leaves its
+    children as reference cycles that only the garbage collector reclaims;
+    decomposing the top-level children first frees the tree at once.
+
+    Args:
+        soup (BeautifulSoup): Parsed page, unusable afterwards
+    """
+    for child in list(soup.contents):
+        child.decompose()
+    soup.decompose()
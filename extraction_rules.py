@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Declarative extraction of structured data from scraped pages.
+
+A schema describes fields to extract with CSS selectors, XPath expressions or
+regular expressions, grouped by URL pattern. The schema is compiled once and
+applied to the already parsed page, so no second parse pass is needed (XPath
+rules are the exception: they require lxml and parse the page once more).
+
+Example schema (JSON):
+
+    {
+        "metadata": true,
+        "rules": [
+            {
+                "url_pattern": "/product/",
+                "fields": {
+                    "price": {"css": ".price", "regex": "([0-9]+[.,][0-9]+)"},
+                    "images": {"css": ".gallery img", "attr": "src", "all": true},
+                    "sku": {"regex": "SKU:\\\\s*(\\\\w+)"},
+                    "published": {"xpath": "//time/@datetime"}
+                }
+            }
+        ]
+    }
+"""
+
+import re
+import json
+import soupsieve
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    etree = None
+    lxml_html = None
+
+
+def _format_xpath_scalar(value):
+    """Convert a scalar XPath result to a string value."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else str(value)
+    return value
+
+
+class FieldRule:
+    """Compiled extraction rule of a single field."""
+
+    def __init__(self, name, spec):
+        """
+        Compile a field rule.
+
+        Args:
+            name (str): Field name
+            spec (dict or str): Field specification; a string is a CSS selector.
+                Keys: css, xpath, regex, attr, all, default
+
+        Raises:
+            ValueError: If the specification is invalid
+        """
+        if isinstance(spec, str):
+            spec = {'css': spec}
+
+        self.name = name
+        self.attr = spec.get('attr')
+        self.all = bool(spec.get('all', False))
+        self.default = spec.get('default')
+        self.selector = None
+        self.xpath = None
+        self.regex = None
+
+        try:
+            if spec.get('css'):
+                self.selector = soupsieve.compile(spec['css'])
+            if spec.get('xpath'):
+                if etree is None:
+                    raise ValueError("XPath rules require the 'lxml' package")
+                self.xpath = etree.XPath(spec['xpath'])
+            if spec.get('regex'):
+                self.regex = re.compile(spec['regex'], re.DOTALL)
+        except (soupsieve.SelectorSyntaxError, re.error) as e:
+            raise ValueError(f"Invalid rule for field '{name}': {e}")
+        except Exception as e:
+            if etree is not None and isinstance(e, etree.XPathSyntaxError):
+                raise ValueError(f"Invalid rule for field '{name}': {e}")
+            raise
+
+        if not (self.selector or self.xpath or self.regex):
+            raise ValueError(f"Rule for field '{name}' needs css, xpath or regex")
+
+    def _apply_regex(self, values):
+        """Apply the regex to values, keeping group 1 (or the whole match)."""
+        results = []
+        for value in values:
+            for match in self.regex.finditer(value):
+                results.append(match.group(1) if match.groups() else match.group(0))
+                if not self.all:
+                    break
+        return results
+
+    def extract(self, soup, get_html_text, get_lxml_tree):
+        """
+        Extract the field value from a page.
+
+        Args:
+            soup (BeautifulSoup): Parsed page
+            get_html_text (callable): Returns the raw HTML of the page as str (decoded on demand)
+            get_lxml_tree (callable): Returns the lxml tree of the page (parsed on demand)
+
+        Returns:
+            Value of the field, list of values if 'all' is set, or the default
+        """
+        if self.selector is not None:
+            elements = self.selector.select(soup, limit=0 if self.all else 1)
+            if self.attr:
+                values = [element.get(self.attr) for element in elements]
+                values = [" ".join(v) if isinstance(v, list) else v for v in values if v is not None]
+            else:
+                values = [element.get_text(" ", strip=True) for element in elements]
+        elif self.xpath is not None:
+            values = []
+            results = self.xpath(get_lxml_tree())
+            if isinstance(results, (str, float, bool)):
+                # Scalar result of count(), string(), boolean() etc. is one value
+                results = [_format_xpath_scalar(results)]
+            for result in results:
+                if isinstance(result, str):
+                    values.append(str(result).strip())
+                elif hasattr(result, 'text_content'):
+                    values.append(result.text_content().strip())
+                if values and not self.all:
+                    break
+        else:
+            values = [get_html_text()]
+
+        if self.regex is not None:
+            values = self._apply_regex(values)
+
+        if self.all:
+            return values
+        return values[0] if values else self.default
+
+
+class ExtractionRule:
+    """Set of field rules applied to URLs matching a pattern."""
+
+    def __init__(self, spec):
+        pattern = spec.get('url_pattern')
+        self.url_pattern = re.compile(pattern) if pattern else None
+        self.fields = [FieldRule(name, field_spec) for name, field_spec in spec.get('fields', {}).items()]
+
+    def matches(self, url):
+        return self.url_pattern is None or bool(self.url_pattern.search(url))
+
+
+def extract_metadata(soup):
+    """
+    Extract built-in structured metadata of a page.
+
+    Args:
+        soup (BeautifulSoup): Parsed page
+
+    Returns:
+        dict: {'json_ld': [...], 'opengraph': {...}, 'meta': {...}}
+    """
+    json_ld = []
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or "")
+        except (TypeError, ValueError):
+            continue
+        if isinstance(data, list):
+            json_ld.extend(data)
+        else:
+            json_ld.append(data)
+
+    opengraph = {}
+    meta = {}
+    for tag in soup.find_all('meta', content=True):
+        prop = tag.get('property')
+        if prop and prop.startswith(('og:', 'article:', 'product:')):
+            opengraph[prop] = tag['content']
+            continue
+        name = tag.get('name') or tag.get('itemprop')
+        if name:
+            meta[name.lower()] = tag['content']
+
+    canonical = soup.find('link', rel='canonical', href=True)
+    if canonical:
+        meta['canonical'] = canonical['href']
+
+    return {'json_ld': json_ld, 'opengraph': opengraph, 'meta': meta}
+
+
+class ExtractionSchema:
+    """Compiled extraction schema applied to every scraped page."""
+
+    def __init__(self, schema):
+        """
+        Compile an extraction schema.
+
+        Args:
+            schema (dict): Schema with 'rules' (list of {url_pattern, fields})
+                and 'metadata' (bool, built-in JSON-LD/OpenGraph/meta extraction)
+
+        Raises:
+            ValueError: If a rule is invalid
+        """
+        self.metadata = bool(schema.get('metadata', True))
+        self.rules = [ExtractionRule(rule) for rule in schema.get('rules', [])]
+
+    @classmethod
+    def from_file(cls, path):
+        """Load and compile a schema from a JSON file."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def extract(self, soup, url, html_content):
+        """
+        Extract all fields matching a page.
+
+        Args:
+            soup (BeautifulSoup): Parsed page
+            url (str): URL of the page
+            html_content (bytes or str): Raw HTML of the page; bytes are decoded
+                with the encoding detected by the parser
+
+        Returns:
+            dict: {'fields': {...}} plus 'metadata' when enabled
+        """
+        html_text = []
+        lxml_tree = []
+
+        def get_html_text():
+            if not html_text:
+                text = html_content
+                if isinstance(text, bytes):
+                    text = text.decode(soup.original_encoding or 'utf-8', errors='replace')
+                html_text.append(text)
+            return html_text[0]
+
+        def get_lxml_tree():
+            if not lxml_tree:
+                lxml_tree.append(lxml_html.fromstring(get_html_text()))
+            return lxml_tree[0]
+
+        fields = {}
+        for rule in self.rules:
+            if not rule.matches(url):
+                continue
+            for field in rule.fields:
+                if field.name not in fields:
+                    fields[field.name] = field.extract(soup, get_html_text, get_lxml_tree)
+
+        result = {'fields': fields}
+        if self.metadata:
+            result['metadata'] = extract_metadata(soup)
+        return result
@@ -188,6 +188,20 @@ class ScraperGUI:
         self.toggle_css_options()
         self.toggle_js_options()
         
+        # Retry and throttling settings
+        ttk.Label(self.advanced_tab, text="Retries:").grid(row=5, column=0, sticky=tk.W, padx=10, pady=5)
+        
+        retry_frame = ttk.Frame(self.advanced_tab)
+        retry_frame.grid(row=5, column=1, sticky=tk.W, padx=10, pady=5, columnspan=3)
+        
+        self.max_retries_var = tk.IntVar(value=3)
+        ttk.Spinbox(retry_frame, from_=0, to=10, increment=1, textvariable=self.max_retries_var, width=10).pack(side=tk.LEFT)
+        ttk.Label(retry_frame, text="Retries on 429/5xx and network errors").pack(side=tk.LEFT, padx=10)
+        
+        self.adaptive_throttle_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.advanced_tab, text="Adaptive throttling (slow down when the server struggles)",
+                        variable=self.adaptive_throttle_var).grid(row=6, column=1, sticky=tk.W, padx=10, pady=5, columnspan=3)
+        
         # Set dynamic layout
         self.advanced_tab.columnconfigure(1, weight=1)
     
@@ -392,6 +406,8 @@ class ScraperGUI:
         request_delay = self.delay_var.get()
         url_include_patterns = self.get_include_patterns()
         url_exclude_patterns = self.get_exclude_patterns()
+        max_retries = self.max_retries_var.get()
+        adaptive_throttle = self.adaptive_throttle_var.get()
         
         # Image download settings
         download_images = False
@@ -458,7 +474,9 @@ class ScraperGUI:
             download_css=download_css,
             download_js=download_js,
             styles_dir=styles_dir,
-            scripts_dir=scripts_dir
+            scripts_dir=scripts_dir,
+            max_retries=max_retries,
+            adaptive_throttle=adaptive_throttle
         )
         
         # Update UI
@@ -486,8 +504,8 @@ class ScraperGUI:
             
             if result is True:  # Scraping completed successfully
                 self.root.after(0, lambda: self.update_status(f"Scraping successfully completed. Results saved to {json_path}"))
-            elif result is False:  # Scraping was stopped
-                self.root.after(0, lambda: self.update_status("Scraping stopped by user."))
+            elif result is False:  # Scraping was stopped, partial results were saved
+                self.root.after(0, lambda: self.update_status(f"Scraping stopped by user. Partial results saved to {json_path}"))
             else:  # Result is the JSON path or None in case of error
                 self.root.after(0, lambda: self.update_status(f"Scraping completed. Results saved to {result}" if result else "Error during scraping"))
         except Exception as e:
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Optional HTTP/2 transport for the scraper's requests session.
+
+HTTP2Adapter is a requests transport adapter that sends requests through an
+httpx client with HTTP/2 enabled, so page and asset requests to one host are
+multiplexed over a single connection instead of one request per pooled
+HTTP/1.1 connection. Responses are converted to requests.Response objects,
+so retries, streaming and the rest of the scraper work unchanged. Requests
+through a proxy or with a client certificate are sent over HTTP/1.1 by the
+regular adapter.
+
+Requires the httpx package with HTTP/2 support (pip install httpx[http2]).
+"""
+
+import socket
+import weakref
+import logging
+import threading
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+from requests.exceptions import ConnectionError, ConnectTimeout, ReadTimeout
+
+from cancellation import CancellableHTTPAdapter
+from http_cache import RecordingHTTPAdapter
+
+try:
+    import httpx
+    import httpcore
+except ImportError:
+    httpx = None
+else:
+    # httpx logs every request at INFO level
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+# httpcore versions whose connection pool keeps its network backend in _network_backend
+TRACKING_HTTPCORE_VERSIONS = ('1.',)
+
+# Connection-specific headers, not allowed in HTTP/2 requests
+HOP_BY_HOP_HEADERS = frozenset(('connection', 'keep-alive', 'proxy-connection', 'transfer-encoding',
+                                'upgrade', 'host'))
+
+
+def _convert_error(error, request):
+    """Convert an httpx exception to the matching requests exception."""
+    if isinstance(error, httpx.ConnectTimeout):
+        return ConnectTimeout(error, request=request)
+    if isinstance(error, httpx.TimeoutException):
+        return ReadTimeout(error, request=request)
+    return ConnectionError(error, request=request)
+
+
+class _StreamedBody:
+    """File-like body of a streamed httpx response, used as Response.raw."""
+
+    def __init__(self, response, request):
+        self._response = response
+        self._request = request
+        self._chunks = response.iter_bytes()
+        self._buffer = b''
+
+    def read(self, amt=None, decode_content=None):
+        try:
+            while amt is None or len(self._buffer) < amt:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._buffer += chunk
+        except httpx.HTTPError as e:
+            raise _convert_error(e, self._request)
+        if amt is None:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self):
+        self._response.close()
+
+
+def _tracking_backend(register):
+    """Create an httpcore network backend that reports the socket of every new connection."""
+
+    class TrackingBackend(httpcore.SyncBackend):
+        def connect_tcp(self, *args, **kwargs):
+            stream = super().connect_tcp(*args, **kwargs)
+            register(stream.get_extra_info('socket'))
+            return stream
+
+    return TrackingBackend()
+
+
+class HTTP2Adapter(CancellableHTTPAdapter):
+    """Transport adapter sending requests over HTTP/2 with httpx."""
+
+    def __init__(self, cancel_token, *args, prior_knowledge=False, **kwargs):
+        """
+        Initialization of the adapter.
+
+        Args:
+            cancel_token (CancelToken): Token that aborts the requests of the adapter
+            prior_knowledge (bool): Also use HTTP/2 for plain http:// URLs without
+                negotiation (h2c), e.g. for local test servers
+            *args, **kwargs: Arguments of requests.adapters.HTTPAdapter
+
+        Raises:
+            ImportError: If httpx is not installed
+        """
+        if httpx is None:
+            raise ImportError("HTTP/2 support requires the 'httpx[http2]' package")
+        self.prior_knowledge = prior_knowledge
+        self._clients = {}
+        self._client_lock = threading.Lock()
+        self._sockets = weakref.WeakSet()
+        super().__init__(cancel_token, *args, **kwargs)
+
+    def _get_client(self, verify):
+        """Get the client for a TLS verification setting (one client per value)."""
+        with self._client_lock:
+            client = self._clients.get(verify)
+            if client is None:
+                limits = httpx.Limits(max_connections=self._pool_maxsize * self._pool_connections,
+                                      max_keepalive_connections=self._pool_maxsize)
+                transport = httpx.HTTPTransport(http2=True, http1=not self.prior_knowledge,
+                                                verify=verify, limits=limits)
+                # httpx has no public option for the network backend of its pool; without
+                # socket tracking abort() cannot interrupt reads and a stop waits for them
+                pool = getattr(transport, '_pool', None)
+                if (httpcore.__version__.startswith(TRACKING_HTTPCORE_VERSIONS)
+                        and hasattr(pool, '_network_backend')):
+                    pool._network_backend = _tracking_backend(self._register_socket)
+                client = self._clients[verify] = httpx.Client(transport=transport)
+            return client
+
+    def _register_socket(self, sock):
+        with self._connections_lock:
+            self._sockets.add(sock)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        # Proxies and client certificates are only supported by the HTTP/1.1 adapter
+        if cert or (proxies and select_proxy(request.url, proxies)):
+            return super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert,
+                                proxies=proxies)
+
+        self.cancel_token.raise_if_cancelled()
+        client = self._get_client(verify)
+
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        else:
+            timeout = httpx.Timeout(timeout)
+        headers = [(key, value) for key, value in request.headers.items()
+                   if key.lower() not in HOP_BY_HOP_HEADERS]
+
+        try:
+            httpx_request = client.build_request(request.method, request.url, headers=headers,
+                                                 content=request.body, timeout=timeout)
+            httpx_response = client.send(httpx_request, stream=True)
+        except httpx.HTTPError as e:
+            raise _convert_error(e, request)
+
+        response = Response()
+        response.status_code = httpx_response.status_code
+        response.reason = httpx_response.reason_phrase
+        response.headers = CaseInsensitiveDict(httpx_response.headers.items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = _StreamedBody(httpx_response, request)
+        if not stream:
+            try:
+                response.content
+            finally:
+                httpx_response.close()
+        return response
+
+    def abort(self):
+        """Shut down the sockets of all connections, failing in-flight requests."""
+        super().abort()
+        with self._connections_lock:
+            sockets = list(self._sockets)
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        super().close()
+        with self._client_lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+
+class RecordingHTTP2Adapter(RecordingHTTPAdapter, HTTP2Adapter):
+    """Record/replay adapter (see http_cache.py) over the HTTP/2 transport."""
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Record/replay cache of HTTP responses for development runs and reproducible benchmarks.
+
+In record mode every response received through the session (pages, probes
+and assets) is stored: status, headers and URL in an SQLite index and the
+body in a file named by its SHA-256 hash, so identical bodies are stored
+once. Bodies are recorded as the caller reads them, so streamed responses
+that are closed early (non-HTML pages, oversized assets) are not downloaded
+completely; only the part that was read is stored. In replay mode the same
+requests are answered from the cache without any network access; requests
+that were not recorded get a 404 response with the reason "Not Recorded".
+"""
+
+import io
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from cancellation import CancellableHTTPAdapter
+
+RECORD = 'record'
+REPLAY = 'replay'
+MODES = (RECORD, REPLAY)
+
+# Headers describing the transfer, not the stored (decoded) body
+TRANSFER_HEADERS = frozenset(('content-encoding', 'transfer-encoding', 'content-length', 'connection'))
+
+# Request headers that make a request conditional (answered with 304 if unchanged)
+CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+# Size of the chunks read from responses without a stream() method
+READ_CHUNK_SIZE = 65536
+
+
+class ResponseStore:
+    """
+    On-disk store of HTTP responses indexed by method, URL and Range header.
+
+    A 304 response is stored next to the full response of the same request,
+    so conditional requests are revalidated in replay as they were recorded.
+    """
+
+    def __init__(self, directory, batch_size=200):
+        """
+        Initialization of the store.
+
+        Args:
+            directory (str): Directory with the index database and response bodies
+            batch_size (int): Number of recorded responses per transaction
+        """
+        self.directory = directory
+        self.batch_size = batch_size
+        self.conn = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, 'bodies'), exist_ok=True)
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "method TEXT NOT NULL, url TEXT NOT NULL, range TEXT NOT NULL, "
+                "not_modified INTEGER NOT NULL, status INTEGER NOT NULL, reason TEXT, headers TEXT NOT NULL, "
+                "sha256 TEXT NOT NULL, complete INTEGER NOT NULL, recorded_at REAL NOT NULL, "
+                "PRIMARY KEY (method, url, range, not_modified))"
+            )
+        return self.conn
+
+    def _get_body_path(self, sha256):
+        return os.path.join(self.directory, 'bodies', sha256[:2], sha256)
+
+    def _get_body_size(self, sha256):
+        try:
+            return os.path.getsize(self._get_body_path(sha256))
+        except OSError:
+            return 0
+
+    def get(self, method, url, range_header='', conditional=False):
+        """
+        Get a recorded response.
+
+        Args:
+            method (str): HTTP method
+            url (str): Requested URL
+            range_header (str): Range header of the request ('' if none)
+            conditional (bool): Whether the request is conditional; a recorded
+                304 response is preferred over the full response
+
+        Returns:
+            tuple: (status, reason, headers, body, complete) or None if not recorded;
+                complete is False if only the beginning of the body was read
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT status, reason, headers, sha256, complete FROM responses "
+                "WHERE method = ? AND url = ? AND range = ? AND not_modified <= ? "
+                "ORDER BY not_modified DESC LIMIT 1",
+                (method, url, range_header, int(conditional))
+            ).fetchone()
+        if row is None:
+            return None
+        status, reason, headers, sha256, complete = row
+        try:
+            with open(self._get_body_path(sha256), 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        return status, reason, json.loads(headers), body, bool(complete)
+
+    def put(self, method, url, range_header, status, reason, headers, body, complete=True):
+        """
+        Record a response.
+
+        Args:
+            method (str): HTTP method
+            url (str): Requested URL
+            range_header (str): Range header of the request ('' if none)
+            status (int): Status code
+            reason (str): Reason phrase
+            headers (dict): Response headers
+            body (bytes): Decoded response body
+            complete (bool): False if the body was closed before it was read to the end
+        """
+        not_modified = status == 304
+        if not complete:
+            # Keep a complete or longer body recorded by an earlier request
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT complete, sha256 FROM responses WHERE method = ? AND url = ? AND range = ? "
+                    "AND not_modified = ?",
+                    (method, url, range_header, int(not_modified))
+                ).fetchone()
+            if row is not None and (row[0] or self._get_body_size(row[1]) >= len(body)):
+                return
+
+        sha256 = hashlib.sha256(body).hexdigest()
+        path = self._get_body_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(body)
+            os.replace(temp_path, path)
+
+        headers = {key: value for key, value in headers.items() if key.lower() not in TRANSFER_HEADERS}
+        with self._lock:
+            conn = self._connect()
+            if not not_modified:
+                # A newer full response replaces an earlier revalidation
+                conn.execute(
+                    "DELETE FROM responses WHERE method = ? AND url = ? AND range = ? AND not_modified = 1",
+                    (method, url, range_header)
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(method, url, range, not_modified, status, reason, headers, sha256, complete, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (method, url, range_header, int(not_modified), status, reason, json.dumps(headers),
+                 sha256, int(complete), time.time())
+            )
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self.conn.commit()
+                self._pending = 0
+
+    def commit(self):
+        """Commit recorded responses."""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self._pending = 0
+
+    def close(self):
+        """Commit recorded responses and close the index."""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self.conn.close()
+                self.conn = None
+                self._pending = 0
+
+
+class _RecordingBody:
+    """
+    Response.raw wrapper that keeps the body as it is read and records it.
+
+    The body is recorded once it was read to the end, or with what was read
+    so far when the response is closed early.
+    """
+
+    def __init__(self, raw, record):
+        self._raw = raw
+        self._record = record
+        self._chunks = []
+        self._recorded = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _finish(self, complete):
+        if not self._recorded:
+            self._recorded = True
+            self._record(b''.join(self._chunks), complete)
+            self._chunks = []
+
+    def stream(self, amt=READ_CHUNK_SIZE, decode_content=None):
+        if hasattr(self._raw, 'stream'):
+            chunks = self._raw.stream(amt, decode_content=decode_content)
+        else:
+            chunks = iter(lambda: self._raw.read(amt), b'')
+        for chunk in chunks:
+            self._chunks.append(chunk)
+            yield chunk
+        self._finish(True)
+
+    def read(self, amt=None, *args, **kwargs):
+        data = self._raw.read(amt, *args, **kwargs)
+        self._chunks.append(data)
+        if amt is None or not data:
+            self._finish(True)
+        return data
+
+    def close(self):
+        self._finish(False)
+        self._raw.close()
+
+
+class _RecordedPrefix(io.BytesIO):
+    """Replayed body of which only the beginning was recorded."""
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if size is None or size < 0 or (size and not data):
+            raise OSError("Response body was only partly recorded")
+        return data
+
+
+class RecordingHTTPAdapter(CancellableHTTPAdapter):
+    """
+    HTTP adapter that records responses to a ResponseStore or replays them.
+
+    Bodies are recorded while the caller reads them, so streamed requests are
+    not downloaded beyond what the caller uses. Reading further than was
+    recorded raises an error in replay. Redirects are recorded hop by hop, so
+    replayed redirects are followed by the session as usual.
+    """
+
+    def __init__(self, cancel_token, store, mode=RECORD, *args, **kwargs):
+        """
+        Initialization of the adapter.
+
+        Args:
+            cancel_token (CancelToken): Token that aborts the requests of the adapter
+            store (ResponseStore): Store of recorded responses
+            mode (str): 'record' or 'replay'
+            *args, **kwargs: Arguments of requests.adapters.HTTPAdapter
+
+        Raises:
+            ValueError: If the mode is not supported
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unsupported HTTP cache mode: {mode}")
+        self.store = store
+        self.mode = mode
+        super().__init__(cancel_token, *args, **kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        self.cancel_token.raise_if_cancelled()
+        range_header = request.headers.get('Range', '')
+
+        if self.mode == REPLAY:
+            conditional = any(name in request.headers for name in CONDITIONAL_HEADERS)
+            return self._build_response(request, self.store.get(request.method, request.url,
+                                                                range_header, conditional))
+
+        # Always streamed from the transport, so the body is read through the
+        # recording wrapper (HTTP2Adapter reads non-streamed bodies before returning)
+        response = super().send(request, stream=True, **kwargs)
+
+        def record(body, complete):
+            self.store.put(request.method, request.url, range_header, response.status_code,
+                           response.reason, response.headers, body, complete)
+
+        response.raw = _RecordingBody(response.raw, record)
+        if not stream:
+            try:
+                response.content
+            finally:
+                response.close()
+        return response
+
+    def _build_response(self, request, recorded):
+        """Create a response from a recorded entry (404 if not recorded)."""
+        status, reason, headers, body, complete = recorded or (404, 'Not Recorded', {}, b'', True)
+
+        response = Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        if complete:
+            response.raw = io.BytesIO(body)
+            response._content = body
+            response._content_consumed = True
+        else:
+            response.raw = _RecordedPrefix(body)
+        return response
+
+    def close(self):
+        super().close()
+        self.store.close()
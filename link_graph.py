@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Link graph of a crawled site with PageRank-style scoring.
+
+During the crawl links are stored as pairs of integer node IDs in compact
+arrays. For analysis the graph is converted to CSR form (indptr/indices) and
+metrics are computed with NumPy.
+
+Usage:
+    python link_graph.py scrap/link_graph.npz --base-url https://example.com --top 20
+"""
+
+import csv
+import argparse
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Link graph metrics require the 'numpy' package")
+
+
+class LinkGraph:
+    """Directed link graph with integer node IDs."""
+
+    def __init__(self):
+        self.node_ids = {}
+        self.urls = []
+        self._sources = array('I')
+        self._targets = array('I')
+        self._csr = None
+
+    @property
+    def num_nodes(self):
+        return len(self.urls)
+
+    @property
+    def num_edges(self):
+        return len(self._sources)
+
+    def get_node_id(self, url):
+        """Return the node ID of a URL, adding the node if needed."""
+        node_id = self.node_ids.get(url)
+        if node_id is None:
+            node_id = self.node_ids[url] = len(self.urls)
+            self.urls.append(url)
+        return node_id
+
+    def add_links(self, source_url, target_urls):
+        """
+        Add links from one page.
+
+        Args:
+            source_url (str): URL of the linking page
+            target_urls (iterable): URLs linked from the page (duplicates are ignored)
+        """
+        source = self.get_node_id(source_url)
+        targets = {self.get_node_id(url) for url in target_urls}
+        for target in sorted(targets):
+            self._sources.append(source)
+            self._targets.append(target)
+        self._csr = None
+
+    def to_csr(self):
+        """
+        Convert the graph to CSR form.
+
+        Returns:
+            tuple: (indptr, indices) where the targets of node i are
+                indices[indptr[i]:indptr[i + 1]]
+        """
+        _require_numpy()
+        if self._csr is None:
+            n = self.num_nodes
+            sources = np.frombuffer(self._sources, dtype=np.uint32) if self._sources else np.zeros(0, np.uint32)
+            targets = np.frombuffer(self._targets, dtype=np.uint32) if self._targets else np.zeros(0, np.uint32)
+            order = np.argsort(sources, kind='stable')
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+            self._csr = (indptr, targets[order].astype(np.uint32))
+        return self._csr
+
+    def save(self, path):
+        """
+        Save the graph in CSR form to a compressed .npz file.
+
+        Args:
+            path (str): Target path
+        """
+        indptr, indices = self.to_csr()
+        urls = np.frombuffer("\n".join(self.urls).encode('utf-8'), dtype=np.uint8)
+        np.savez_compressed(path, indptr=indptr, indices=indices, urls=urls)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a graph saved with save().
+
+        Args:
+            path (str): Path to the .npz file
+
+        Returns:
+            LinkGraph: Loaded graph
+        """
+        _require_numpy()
+        graph = cls()
+        with np.load(path) as data:
+            text = data['urls'].tobytes().decode('utf-8')
+            graph.urls = text.split("\n") if text else []
+            graph.node_ids = {url: node_id for node_id, url in enumerate(graph.urls)}
+            indptr, indices = data['indptr'], data['indices']
+
+        # Keep edge arrays so that further links can be added
+        sources = np.repeat(np.arange(len(graph.urls), dtype=np.uint32), np.diff(indptr))
+        graph._sources.frombytes(sources.astype(np.uint32).tobytes())
+        graph._targets.frombytes(indices.astype(np.uint32).tobytes())
+        graph._csr = (indptr, indices)
+        return graph
+
+    def in_degree(self):
+        """Return the number of incoming links of every node."""
+        indptr, indices = self.to_csr()
+        return np.bincount(indices, minlength=self.num_nodes)
+
+    def out_degree(self):
+        """Return the number of outgoing links of every node."""
+        indptr, indices = self.to_csr()
+        return np.diff(indptr)
+
+    def pagerank(self, damping=0.85, tolerance=1e-8, max_iterations=100):
+        """
+        Compute PageRank of all nodes by power iteration.
+
+        Rank of pages without outgoing links is spread evenly over all nodes.
+
+        Args:
+            damping (float): Probability of following a link
+            tolerance (float): Convergence threshold on the L1 change
+            max_iterations (int): Maximum number of iterations
+
+        Returns:
+            numpy.ndarray: PageRank values summing to 1
+        """
+        n = self.num_nodes
+        if n == 0:
+            return np.zeros(0)
+
+        indptr, indices = self.to_csr()
+        out_degree = np.diff(indptr)
+        edge_sources = np.repeat(np.arange(n), out_degree)
+        edge_weights = 1.0 / out_degree[edge_sources]
+        dangling = out_degree == 0
+
+        rank = np.full(n, 1.0 / n)
+        for _ in range(max_iterations):
+            flow = np.bincount(indices, weights=rank[edge_sources] * edge_weights, minlength=n)
+            new_rank = damping * flow + (1.0 - damping + damping * rank[dangling].sum()) / n
+            change = np.abs(new_rank - rank).sum()
+            rank = new_rank
+            if change < tolerance:
+                break
+        return rank
+
+    def depths(self, root_url):
+        """
+        Compute link depth of all nodes from a root page by breadth-first search.
+
+        Args:
+            root_url (str): URL of the root page
+
+        Returns:
+            numpy.ndarray: Depth of every node, -1 for unreachable nodes
+        """
+        n = self.num_nodes
+        depth = np.full(n, -1, dtype=np.int64)
+        root = self.node_ids.get(root_url)
+        if root is None:
+            return depth
+
+        indptr, indices = self.to_csr()
+        depth[root] = 0
+        frontier = np.array([root], dtype=np.int64)
+        level = 0
+        while frontier.size:
+            starts = indptr[frontier]
+            lengths = indptr[frontier + 1] - starts
+            total = int(lengths.sum())
+            if total == 0:
+                break
+            # Positions of all outgoing edges of the frontier nodes
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+            neighbors = indices[positions]
+            neighbors = np.unique(neighbors[depth[neighbors] < 0])
+            level += 1
+            depth[neighbors] = level
+            frontier = neighbors.astype(np.int64)
+        return depth
+
+    def compute_scores(self, root_url=None):
+        """
+        Compute all page metrics.
+
+        Args:
+            root_url (str): URL from which depth is measured
+
+        Returns:
+            dict: Arrays 'in_degree', 'out_degree', 'pagerank' and 'depth'
+        """
+        return {
+            'in_degree': self.in_degree(),
+            'out_degree': self.out_degree(),
+            'pagerank': self.pagerank(),
+            'depth': self.depths(root_url) if root_url else np.full(self.num_nodes, -1),
+        }
+
+    def top_pages(self, count=10, root_url=None):
+        """
+        Return the pages with the highest PageRank.
+
+        Args:
+            count (int): Number of pages
+            root_url (str): URL from which depth is measured
+
+        Returns:
+            list: Dicts with url, pagerank, in_degree, out_degree and depth
+        """
+        scores = self.compute_scores(root_url)
+        order = np.argsort(-scores['pagerank'], kind='stable')[:count]
+        return [{
+            'url': self.urls[node],
+            'pagerank': float(scores['pagerank'][node]),
+            'in_degree': int(scores['in_degree'][node]),
+            'out_degree': int(scores['out_degree'][node]),
+            'depth': int(scores['depth'][node]),
+        } for node in order]
+
+    def save_scores(self, path, root_url=None):
+        """
+        Save page metrics to a CSV file sorted by PageRank.
+
+        Args:
+            path (str): Target path
+            root_url (str): URL from which depth is measured
+        """
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['url', 'pagerank', 'in_degree', 'out_degree', 'depth'])
+            for page in self.top_pages(self.num_nodes, root_url):
+                writer.writerow([page['url'], f"{page['pagerank']:.8g}", page['in_degree'],
+                                 page['out_degree'], page['depth']])
+
+
+def main():
+    """Print the highest ranked pages of a saved link graph."""
+    parser = argparse.ArgumentParser(description="Analyze a link graph saved by RobopolScraper")
+    parser.add_argument('graph', help="Path to the .npz link graph")
+    parser.add_argument('--base-url', help="URL from which depth is measured")
+    parser.add_argument('--top', type=int, default=20, help="Number of pages to print")
+    parser.add_argument('--csv', help="Save metrics of all pages to a CSV file")
+    args = parser.parse_args()
+
+    graph = LinkGraph.load(args.graph)
+    print(f"{graph.num_nodes} pages, {graph.num_edges} links")
+    for page in graph.top_pages(args.top, args.base_url):
+        print(f"{page['pagerank']:.6f} in={page['in_degree']:<5} out={page['out_degree']:<5} "
+              f"depth={page['depth']:<3} {page['url']}")
+
+    if args.csv:
+        graph.save_scores(args.csv, args.base_url)
+
+
+if __name__ == "__main__":
+    main()
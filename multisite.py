@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Crawling of many sites in one process.
+
+Every site gets its own RobopolScraper (filters, limits and output), while
+the HTTP session with its connection pool, the page workers and the asset
+download workers are shared. Sites are scheduled round-robin with at most one
+page of a site in flight, so a large site cannot starve small ones and no
+host gets more than one concurrent page request.
+
+The sites file is a JSON list of base URLs or of objects with 'base_url' and
+any RobopolScraper options (e.g. 'url_include_patterns', 'max_pages'), or an
+object {"defaults": {...}, "sites": [...]} with options applied to all sites.
+Results of each site are saved to <output-dir>/<site>/scraped_data.json.
+
+Usage:
+    python multisite.py sites.json --output-dir scrap_sites --workers 8
+"""
+
+import os
+import re
+import json
+import logging
+import argparse
+import threading
+from collections import deque
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper import RobopolScraper, create_session
+from http_cache import RECORD
+from cancellation import CancelToken, ScrapeCancelled
+
+logger = logging.getLogger('RobopolScraper')
+
+# Options whose default directory is created inside the output directory of a site
+ASSET_DIRS = (('download_images', 'images_dir', 'images'),
+              ('download_css', 'styles_dir', 'css'),
+              ('download_js', 'scripts_dir', 'js'))
+
+
+def get_site_name(base_url):
+    """Get a directory name for a site from its base URL."""
+    return re.sub(r'[^\w.-]', '_', urlparse(base_url).netloc) or 'site'
+
+
+class SiteCrawl:
+    """Crawl state of one site."""
+
+    def __init__(self, name, scraper, output_json):
+        self.name = name
+        self.scraper = scraper
+        self.output_json = output_json
+        self.finished = False
+
+
+class MultiSiteScraper:
+    """Crawls many sites with shared connections and fair scheduling."""
+
+    def __init__(self, sites, output_dir="scrap_sites", workers=8, asset_workers=8,
+                 status_callback=None, progress_callback=None, **options):
+        """
+        Initialization of the multi-site scraper.
+
+        Args:
+            sites (list): Base URLs or dicts with 'base_url' and RobopolScraper
+                options of the site ('name' and 'output_dir' are optional)
+            output_dir (str): Directory with one subdirectory per site
+            workers (int): Number of pages scraped concurrently (on different sites)
+            asset_workers (int): Number of concurrent asset downloads of all sites
+            status_callback (callable): Function for recording status messages
+            progress_callback (callable): Function called with (percent, done, total) URL counts
+            **options: RobopolScraper options applied to all sites
+        """
+        self.output_dir = output_dir
+        self.workers = workers
+        self.status_callback = status_callback or logger.info
+        self.progress_callback = progress_callback or (lambda value, done_count=None, total_count=None: None)
+
+        # Resources shared by all sites
+        self.cancel_token = CancelToken()
+        self.session = create_session(self.cancel_token, pool_connections=max(10, len(sites)),
+                                      pool_maxsize=max(10, asset_workers),
+                                      http_cache_dir=options.get('http_cache_dir'),
+                                      http_cache_mode=options.get('http_cache_mode', RECORD),
+                                      http2=options.get('http2', False))
+        self.asset_executor = ThreadPoolExecutor(max_workers=asset_workers,
+                                                 thread_name_prefix='AssetDownloader')
+
+        used_names = set()
+        self.sites = []
+        for site in sites:
+            self.sites.append(self._create_site(site, options, used_names))
+
+        # Round-robin queue of sites with pending URLs and no page in flight
+        self._ready = deque()
+        self._active = 0
+        self._condition = threading.Condition()
+        self.cancel_token.add_callback(self._wake_workers)
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """
+        Create a multi-site scraper from a JSON sites file.
+
+        Args:
+            path (str): Path to the sites file
+            **kwargs: Arguments of MultiSiteScraper (override the file defaults)
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        if isinstance(config, list):
+            config = {'sites': config}
+        return cls(config['sites'], **dict(config.get('defaults', {}), **kwargs))
+
+    def _create_site(self, site, options, used_names):
+        """Create the scraper of one site."""
+        if isinstance(site, str):
+            site = {'base_url': site}
+        site_options = dict(options, **site)
+
+        name = site_options.pop('name', None) or get_site_name(site_options['base_url'])
+        unique_name, index = name, 2
+        while unique_name in used_names:
+            unique_name, index = f"{name}_{index}", index + 1
+        used_names.add(unique_name)
+
+        output_dir = site_options.pop('output_dir', None) or os.path.join(self.output_dir, unique_name)
+        for enabled, directory, default in ASSET_DIRS:
+            if site_options.get(enabled) and not site_options.get(directory):
+                site_options[directory] = os.path.join(output_dir, default)
+        site_options.setdefault('recursive', True)
+
+        scraper = RobopolScraper(
+            output_dir=output_dir,
+            status_callback=lambda message, name=unique_name: self.status_callback(f"[{name}] {message}"),
+            progress_callback=lambda *args: None,
+            session=self.session, cancel_token=self.cancel_token, asset_executor=self.asset_executor,
+            **site_options
+        )
+        return SiteCrawl(unique_name, scraper, os.path.join(output_dir, 'scraped_data.json'))
+
+    def _wake_workers(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def _next_site(self):
+        """
+        Take the next site to scrape a page of.
+
+        Returns:
+            SiteCrawl: Site with pending URLs or None when the crawl is finished
+        """
+        with self._condition:
+            while not self.cancel_token.is_cancelled():
+                if self._ready:
+                    self._active += 1
+                    return self._ready.popleft()
+                if not self._active:
+                    return None
+                # Sites in flight may still discover URLs
+                self._condition.wait()
+            return None
+
+    def _release_site(self, site):
+        """
+        Put a site back at the end of the queue after one of its pages.
+
+        Returns:
+            bool: True if the site has no more pending URLs
+        """
+        with self._condition:
+            self._active -= 1
+            done = not site.scraper.has_pending_urls()
+            if not done:
+                self._ready.append(site)
+            self._condition.notify_all()
+        return done and not self.cancel_token.is_cancelled()
+
+    def _finish_site(self, site, stopped=False):
+        """Save the results of a site."""
+        site.finished = True
+        try:
+            site.scraper.finish_run(site.output_json, stopped)
+        except Exception as e:
+            site.output_json = None
+            self.status_callback(f"[{site.name}] Error saving results: {e}")
+
+    def _update_progress(self):
+        done = total = 0
+        for site in self.sites:
+            done += len(site.scraper.visited_urls)
+            total += len(site.scraper.visited_urls) + len(site.scraper.queue)
+        if total > 0:
+            self.progress_callback(int((done / total) * 100), done, total)
+
+    def _worker(self):
+        """Scrape pages of the sites taken from the round-robin queue."""
+        while True:
+            site = self._next_site()
+            if site is None:
+                return
+
+            try:
+                url = site.scraper.queue.pop()
+                data, links = site.scraper.scrape_url(url)
+                site.scraper.queue.update(links)
+            except ScrapeCancelled:
+                pass
+            except Exception as e:
+                self.status_callback(f"[{site.name}] Error scraping page: {e}")
+
+            if self._release_site(site):
+                self._finish_site(site)
+            self._update_progress()
+
+    def request_stop(self):
+        """Stop all sites; partial results are saved."""
+        self.status_callback("Stop requested, finishing current pages...")
+        self.cancel_token.cancel()
+
+    def run(self):
+        """
+        Crawl all sites.
+
+        Returns:
+            dict: Site name mapped to the path of its output JSON file
+                (None if the results could not be saved)
+        """
+        try:
+            for site in self.sites:
+                site.scraper.start_run()
+                self._ready.append(site)
+            self.status_callback(f"Crawling {len(self.sites)} sites with {self.workers} workers")
+
+            threads = [threading.Thread(target=self._worker, name=f'SiteWorker-{index}', daemon=True)
+                       for index in range(max(1, min(self.workers, len(self.sites))))]
+            for thread in threads:
+                thread.start()
+            try:
+                for thread in threads:
+                    thread.join()
+            except KeyboardInterrupt:
+                self.request_stop()
+                for thread in threads:
+                    thread.join()
+
+            # Sites left unfinished by a stop get their partial results saved
+            stopped = self.cancel_token.is_cancelled()
+            for site in self.sites:
+                if not site.finished:
+                    self._finish_site(site, stopped)
+
+            self.status_callback("Crawl of all sites " + ("stopped" if stopped else "completed"))
+            return {site.name: site.output_json for site in self.sites}
+        finally:
+            self.close()
+
+    def close(self):
+        """Close the scrapers of all sites and the shared resources."""
+        for site in self.sites:
+            site.scraper.close()
+        self.asset_executor.shutdown(wait=True)
+        self.session.close()
+
+
+def main():
+    """Crawl the sites of a sites file from the command line."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Crawl many sites in one process with RobopolScraper")
+    parser.add_argument('sites', help="JSON file with the sites to crawl")
+    parser.add_argument('--output-dir', default='scrap_sites', help="Directory with one subdirectory per site")
+    parser.add_argument('--workers', type=int, default=8, help="Number of sites scraped concurrently")
+    parser.add_argument('--asset-workers', type=int, default=8, help="Number of concurrent asset downloads")
+    parser.add_argument('--max-pages', type=int, help="Maximum number of URLs per site")
+    parser.add_argument('--delay', type=float, help="Delay between requests to one host in seconds")
+    args = parser.parse_args()
+
+    options = {}
+    if args.max_pages is not None:
+        options['max_pages'] = args.max_pages
+    if args.delay is not None:
+        options['request_delay'] = args.delay
+
+    scraper = MultiSiteScraper.from_file(args.sites, output_dir=args.output_dir, workers=args.workers,
+                                         asset_workers=args.asset_workers, **options)
+    results = scraper.run()
+    for name, output_json in results.items():
+        print(f"{name}: {output_json or 'failed'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Page record and link extraction shared by RobopolScraper and reprocess.py.
+
+PageExtractor holds everything needed to turn a parsed page into its record
+and its links: the output directory, URL filters, the extraction schema and
+a writer for full text. RobopolScraper builds on it and adds fetching and
+crawl state; reprocess.py workers use it directly, so they do not create an
+HTTP session, asset downloader or stores.
+"""
+
+import os
+import re
+import logging
+from urllib.parse import urlparse, urljoin
+
+from extraction import extract_snippet, extract_main_text
+from extraction_rules import ExtractionSchema
+from records import PageRecord
+
+logger = logging.getLogger('RobopolScraper')
+
+
+class PageExtractor:
+    """Extraction of page records and links from parsed pages."""
+
+    def __init__(self, output_dir, base_url, full_text=False, extraction_schema=None,
+                 filter_eshop=True, filter_english=True, url_include_patterns=None,
+                 url_exclude_patterns=None, writer=None, search_index=None, status_callback=None):
+        """
+        Initialization of the extractor.
+
+        Args:
+            output_dir (str): Directory of saved pages
+            base_url (str): Base URL of the site; links to other hosts are filtered
+            full_text (bool): Whether to save the main text of pages
+            extraction_schema (ExtractionSchema, dict or str): Structured data rules
+                (compiled schema, schema dict or path to a JSON schema file)
+            filter_eshop (bool): Whether to filter e-shop links
+            filter_english (bool): Whether to filter English links
+            url_include_patterns (list): Regex patterns of URLs to keep
+            url_exclude_patterns (list): Regex patterns of URLs to filter
+            writer (AsyncFileWriter): Writer of full-text files
+            search_index (SearchIndex): Full-text index pages are added to
+            status_callback (callable): Function for recording status messages
+        """
+        self.output_dir = output_dir
+        self.base_url = base_url
+        self.domain = urlparse(base_url).netloc
+        self.full_text = full_text
+        self.filter_eshop = filter_eshop
+        self.filter_english = filter_english
+        self.writer = writer
+        self.search_index = search_index
+        self.status_callback = status_callback or logger.info
+
+        # Structured data extraction rules, compiled once for the whole crawl
+        if isinstance(extraction_schema, str):
+            extraction_schema = ExtractionSchema.from_file(extraction_schema)
+        elif isinstance(extraction_schema, dict):
+            extraction_schema = ExtractionSchema(extraction_schema)
+        self.extraction_schema = extraction_schema
+
+        # Compile regex patterns for URL filters
+        self.url_include_patterns = None
+        if url_include_patterns:
+            self.url_include_patterns = [re.compile(pattern) for pattern in url_include_patterns]
+
+        self.url_exclude_patterns = None
+        if url_exclude_patterns:
+            self.url_exclude_patterns = [re.compile(pattern) for pattern in url_exclude_patterns]
+
+    def _get_page_file_path(self, url):
+        """
+        Get the path of the HTML file for a URL.
+
+        Args:
+            url (str): URL of the page
+
+        Returns:
+            str: Path of the HTML file (without compression suffix)
+        """
+        parsed_url = urlparse(url)
+        path_elements = parsed_url.path.strip('/').split('/')
+
+        # Directory structure based on URL path (created by the writer)
+        dir_path = self.output_dir
+        if path_elements and path_elements[0]:
+            dir_path = os.path.join(self.output_dir, *path_elements[:-1]) if len(path_elements) > 1 else self.output_dir
+
+        # Filename
+        filename = path_elements[-1] if path_elements and path_elements[-1] else "index"
+        if not filename.endswith('.html'):
+            filename = f"{filename}.html"
+
+        return os.path.join(dir_path, filename)
+
+    def save_text_to_file(self, url, text):
+        """
+        Save extracted text gzip-compressed next to the HTML file of a page.
+
+        Args:
+            url (str): URL of the page
+            text (str): Extracted text
+
+        Returns:
+            str: Path to the saved file or None
+        """
+        try:
+            file_path = self._get_page_file_path(url)[:-len('.html')] + '.txt'
+            return self.writer.write(file_path, text, compress='gzip')
+        except Exception as e:
+            self.status_callback(f"Error saving text for {url}: {e}")
+            return None
+
+    def should_filter_url(self, url):
+        """
+        Check if a URL should be filtered.
+
+        Args:
+            url (str): URL to check
+
+        Returns:
+            bool: True if the URL should be filtered, False otherwise
+        """
+        # Domain check
+        parsed_url = urlparse(url)
+        if parsed_url.netloc != self.domain:
+            return True
+
+        # E-shop filtering
+        if self.filter_eshop and ('/e-shop/' in url or '/eshop/' in url or '/shop/' in url):
+            return True
+
+        # English page filtering
+        if self.filter_english and ('/en/' in url):
+            return True
+
+        # Filtering based on Include regex patterns
+        if self.url_include_patterns:
+            if not any(pattern.search(url) for pattern in self.url_include_patterns):
+                return True
+
+        # Filtering based on Exclude regex patterns
+        if self.url_exclude_patterns:
+            if any(pattern.search(url) for pattern in self.url_exclude_patterns):
+                return True
+
+        return False
+
+    def normalize_link(self, href, current_url):
+        """
+        Turn the href of a link into the absolute URL used for crawling.
+
+        Args:
+            href (str): Value of the href attribute
+            current_url (str): URL relative links are resolved against
+
+        Returns:
+            str: Absolute URL without fragment and parameters or None for
+                empty, anchor and JavaScript links
+        """
+        # Skip empty links, anchors, and JavaScript links
+        if not href or href.startswith('#') or href.startswith('javascript:'):
+            return None
+
+        # Create absolute URL
+        absolute_url = urljoin(current_url, href)
+
+        # Remove fragments and parameters
+        parsed_url = urlparse(absolute_url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
+
+    def find_links(self, soup, current_url):
+        """
+        Find the links of a page, normalized but not filtered.
+
+        Args:
+            soup (BeautifulSoup): Analyzed page content
+            current_url (str): Current URL for relative links
+
+        Yields:
+            str: Absolute URL of each link in document order
+        """
+        for a_tag in soup.find_all('a', href=True):
+            clean_url = self.normalize_link(a_tag['href'], current_url)
+            if clean_url is not None:
+                yield clean_url
+
+    def extract_page_data(self, soup, url, html_content, html_file=None,
+                          downloaded_images=None, downloaded_css=None, downloaded_js=None):
+        """
+        Extract the record of a page from its parsed content.
+
+        Args:
+            soup (BeautifulSoup): Analyzed page content
+            url (str): URL of the page
+            html_content (bytes or str): HTML content of the page
+            html_file (str): Path to the saved HTML file
+            downloaded_images (list): Paths to downloaded images
+            downloaded_css (list): Paths to downloaded CSS files
+            downloaded_js (list): Paths to downloaded JavaScript files
+
+        Returns:
+            PageRecord: Page record
+        """
+        title = soup.title.text if soup.title else "No Title"
+
+        # Get content snippet (stops reading text once the snippet is complete)
+        content_snippet = ""
+        main_content = soup.find("main") or soup.find("div", class_="content") or soup.find("article")
+        if main_content:
+            content_snippet = extract_snippet(main_content)
+        elif soup.body:
+            content_snippet = extract_snippet(soup.body)
+
+        # Get full text without boilerplate if enabled
+        text_file = None
+        if self.full_text or self.search_index:
+            text = extract_main_text(soup)
+            if self.full_text:
+                text_file = self.save_text_to_file(url, text)
+            if self.search_index:
+                try:
+                    self.search_index.add_page(url, title, text)
+                except Exception as e:
+                    self.status_callback(f"Error indexing {url}: {e}")
+
+        # Create page record
+        data = PageRecord(url, title, html_file, content_snippet, text_file,
+                          downloaded_images, downloaded_css, downloaded_js)
+
+        # Extract structured data defined by the schema
+        if self.extraction_schema:
+            try:
+                data.update(self.extraction_schema.extract(soup, url, html_content))
+            except Exception as e:
+                self.status_callback(f"Error extracting structured data for {url}: {e}")
+
+        return data
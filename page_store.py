@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Versioned store of scraped pages across crawls.
+
+Every URL keeps its latest HTML as a full zlib-compressed copy, while earlier
+versions are stored as reverse deltas: the tokens an older version shares
+with the next newer one are referenced, only the differing bytes are kept,
+and the delta is compressed. Unchanged pages add no data, only the time they
+were last seen is updated. Every keyframe_interval-th version of a page is
+kept in full, which bounds the number of deltas applied to restore a version;
+so are versions too large to diff quickly (max_delta_bytes, max_delta_tokens).
+Deltas are computed and stored on a background thread, so put() only costs
+the hash of the page and one index lookup.
+
+Versions are identified by the timestamp of the crawl that found them, so any
+page can be restored as it was at any crawl and the pages that changed
+between two crawls can be listed without reading page contents.
+
+Usage:
+    python page_store.py scrap/pages.db crawls
+    python page_store.py scrap/pages.db changes --since 2026-10-01 --until 2026-10-02
+    python page_store.py scrap/pages.db get https://example.com/page --at 2026-10-01 --output page.html
+"""
+
+import re
+import sys
+import time
+import queue
+import zlib
+import struct
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from difflib import SequenceMatcher
+
+# Kinds of stored versions
+FULL = 0
+DELTA = 1
+
+# Tokens of the delta encoding: tags and lines, so minified pages are split as well
+TOKEN_PATTERN = re.compile(rb'[^>\n]*[>\n]|[^>\n]+')
+
+# Delta operations: copy tokens of the newer version, or insert literal bytes
+COPY_OP = struct.Struct('<cII')
+INSERT_OP = struct.Struct('<cI')
+
+
+def tokenize(content):
+    """Split a document into the tokens deltas refer to."""
+    return TOKEN_PATTERN.findall(content)
+
+
+def create_delta(old, new):
+    """
+    Encode an older version of a document relative to a newer one.
+
+    Args:
+        old (bytes): Older version
+        new (bytes): Newer version
+
+    Returns:
+        bytes: Uncompressed delta restoring old from new (see apply_delta)
+    """
+    old_tokens = tokenize(old)
+    new_tokens = tokenize(new)
+    parts = []
+    matcher = SequenceMatcher(None, old_tokens, new_tokens)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            parts.append(COPY_OP.pack(b'C', j1, j2))
+        elif tag in ('replace', 'delete'):
+            literal = b''.join(old_tokens[i1:i2])
+            parts.append(INSERT_OP.pack(b'I', len(literal)))
+            parts.append(literal)
+    return b''.join(parts)
+
+
+def apply_delta(new, delta):
+    """
+    Restore an older version of a document from a newer one and a delta.
+
+    Args:
+        new (bytes): Newer version
+        delta (bytes): Delta created by create_delta
+
+    Returns:
+        bytes: Older version
+    """
+    new_tokens = tokenize(new)
+    parts = []
+    pos = 0
+    while pos < len(delta):
+        if delta[pos:pos + 1] == b'C':
+            _, start, end = COPY_OP.unpack_from(delta, pos)
+            pos += COPY_OP.size
+            parts.append(b''.join(new_tokens[start:end]))
+        else:
+            _, length = INSERT_OP.unpack_from(delta, pos)
+            pos += INSERT_OP.size
+            parts.append(delta[pos:pos + length])
+            pos += length
+    return b''.join(parts)
+
+
+def parse_timestamp(value):
+    """Parse a Unix timestamp or an ISO date/time (local time) from the command line."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class PageStore:
+    """SQLite store of page versions with reverse delta compression."""
+
+    def __init__(self, path, keyframe_interval=16, compression_level=6, batch_size=200,
+                 max_delta_bytes=524288, max_delta_tokens=20000, max_queue=64, async_writes=True,
+                 status_callback=None):
+        """
+        Initialization of the store.
+
+        Args:
+            path (str): Path to the store database
+            keyframe_interval (int): Every n-th version of a page is stored in full
+            compression_level (int): zlib compression level of stored versions
+            batch_size (int): Number of stored pages per transaction
+            max_delta_bytes (int): Versions larger than this are kept in full instead
+                of being diffed (diffing time grows faster than the size)
+            max_delta_tokens (int): Versions with more tokens than this are kept in full
+            max_queue (int): Maximum number of pages waiting to be stored before put() waits
+            async_writes (bool): Whether to compute deltas and store pages on a background thread
+            status_callback (callable): Function for reporting errors of background writes
+        """
+        self.path = path
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.compression_level = compression_level
+        self.batch_size = batch_size
+        self.max_delta_bytes = max_delta_bytes
+        self.max_delta_tokens = max_delta_tokens
+        self.async_writes = async_writes
+        self.status_callback = status_callback or (lambda message: None)
+        self.crawled_at = None
+        self.conn = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._queued = {}
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS crawls (crawled_at REAL PRIMARY KEY)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS versions ("
+                "url TEXT NOT NULL, version INTEGER NOT NULL, crawled_at REAL NOT NULL, "
+                "last_seen REAL NOT NULL, sha256 TEXT NOT NULL, size INTEGER NOT NULL, "
+                "kind INTEGER NOT NULL, data BLOB NOT NULL, PRIMARY KEY (url, version))"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS versions_crawled_at ON versions (crawled_at)")
+        return self.conn
+
+    def _changed(self):
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.conn.commit()
+            self._pending = 0
+
+    def begin_crawl(self, crawled_at=None):
+        """
+        Start a crawl; pages put afterwards are versioned with its timestamp.
+
+        Args:
+            crawled_at (float): Unix timestamp of the crawl (default: now)
+
+        Returns:
+            float: Timestamp of the crawl
+        """
+        self.crawled_at = crawled_at if crawled_at is not None else time.time()
+        with self._lock:
+            self._connect().execute("INSERT OR IGNORE INTO crawls (crawled_at) VALUES (?)", (self.crawled_at,))
+            self._changed()
+        return self.crawled_at
+
+    def put(self, url, content):
+        """
+        Store the content of a page found by the current crawl.
+
+        The page is stored on the background thread; call commit() to wait
+        for pending pages.
+
+        Args:
+            url (str): URL of the page
+            content (bytes or str): HTML of the page, str is encoded as UTF-8
+
+        Returns:
+            bool: True if a new version is stored, False if the page is unchanged
+        """
+        if self.crawled_at is None:
+            self.begin_crawl()
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        sha256 = hashlib.sha256(content).hexdigest()
+
+        with self._lock:
+            latest_sha256 = self._queued.get(url)
+            if latest_sha256 is None:
+                row = self._connect().execute(
+                    "SELECT sha256 FROM versions WHERE url = ? ORDER BY version DESC LIMIT 1", (url,)
+                ).fetchone()
+                latest_sha256 = row[0] if row else None
+            changed = latest_sha256 != sha256
+            self._queued[url] = sha256
+
+        item = (url, content, sha256, self.crawled_at)
+        if not self.async_writes:
+            self._store(item)
+            return changed
+
+        self._ensure_started()
+        self._queue.put(item)
+        return changed
+
+    def _ensure_started(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='PageStore', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Main loop of the background thread."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._store(item)
+            finally:
+                self._queue.task_done()
+
+    def _can_diff(self, content):
+        """Check if a version is small enough to be diffed quickly."""
+        return len(content) <= self.max_delta_bytes and len(tokenize(content)) <= self.max_delta_tokens
+
+    def _store(self, item):
+        """Store a page, turning the previous version into a delta against it."""
+        url, content, sha256, crawled_at = item
+        try:
+            self._store_version(url, content, sha256, crawled_at)
+        except Exception as e:
+            self.status_callback(f"Error storing version of {url}: {e}")
+        finally:
+            with self._lock:
+                if self._queued.get(url) == sha256:
+                    del self._queued[url]
+
+    def _store_version(self, url, content, sha256, crawled_at):
+        with self._lock:
+            latest = self._connect().execute(
+                "SELECT version, sha256, data FROM versions WHERE url = ? ORDER BY version DESC LIMIT 1", (url,)
+            ).fetchone()
+            if latest is not None and latest[1] == sha256:
+                self.conn.execute("UPDATE versions SET last_seen = ? WHERE url = ? AND version = ?",
+                                  (crawled_at, url, latest[0]))
+                self._changed()
+                return
+
+        # The previous version becomes a delta against the new one, unless it is a
+        # keyframe or one of the versions is too large to diff
+        delta = None
+        version = 1
+        if latest is not None:
+            version = latest[0] + 1
+            if latest[0] % self.keyframe_interval and self._can_diff(content):
+                previous = zlib.decompress(latest[2])
+                if self._can_diff(previous):
+                    delta = zlib.compress(create_delta(previous, content), self.compression_level)
+        data = zlib.compress(content, self.compression_level)
+
+        with self._lock:
+            conn = self._connect()
+            if delta is not None:
+                conn.execute("UPDATE versions SET kind = ?, data = ? WHERE url = ? AND version = ?",
+                             (DELTA, delta, url, latest[0]))
+            conn.execute(
+                "INSERT OR REPLACE INTO versions (url, version, crawled_at, last_seen, sha256, size, kind, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, version, crawled_at, crawled_at, sha256, len(content), FULL, data)
+            )
+            self._changed()
+
+    def get(self, url, at=None):
+        """
+        Get a page as it was at a given time.
+
+        Args:
+            url (str): URL of the page
+            at (float): Unix timestamp (default: latest version)
+
+        Returns:
+            bytes: HTML of the newest version crawled at or before the time, or None
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT version FROM versions WHERE url = ? AND crawled_at <= ? ORDER BY version DESC LIMIT 1",
+                (url, at if at is not None else float('inf'))
+            ).fetchone()
+            if row is None:
+                return None
+
+            # Deltas from the requested version up to the nearest newer full copy
+            chain = []
+            for kind, data in conn.execute(
+                    "SELECT kind, data FROM versions WHERE url = ? AND version >= ? ORDER BY version",
+                    (url, row[0])):
+                chain.append(data)
+                if kind == FULL:
+                    break
+
+        content = zlib.decompress(chain.pop())
+        for delta in reversed(chain):
+            content = apply_delta(content, zlib.decompress(delta))
+        return content
+
+    def get_versions(self, url):
+        """
+        List the stored versions of a page.
+
+        Args:
+            url (str): URL of the page
+
+        Returns:
+            list: Dicts with version, crawled_at, last_seen, sha256 and size, oldest first
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT version, crawled_at, last_seen, sha256, size FROM versions WHERE url = ? ORDER BY version",
+                (url,)
+            ).fetchall()
+        return [{'version': version, 'crawled_at': crawled_at, 'last_seen': last_seen,
+                 'sha256': sha256, 'size': size}
+                for version, crawled_at, last_seen, sha256, size in rows]
+
+    def get_crawls(self):
+        """Return the timestamps of all crawls, oldest first."""
+        with self._lock:
+            return [row[0] for row in self._connect().execute("SELECT crawled_at FROM crawls ORDER BY crawled_at")]
+
+    def get_changes(self, since, until=None):
+        """
+        List pages with a new version crawled after one time and up to another.
+
+        Use the timestamps of two crawls (see get_crawls) to compare the crawls.
+
+        Args:
+            since (float): Unix timestamp, versions crawled at this time are excluded
+            until (float): Unix timestamp (default: now)
+
+        Returns:
+            list: Dicts with url, crawled_at and change ('added' for pages first
+                found, 'modified' otherwise), sorted by URL
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT url, MAX(crawled_at), MIN(version) FROM versions "
+                "WHERE crawled_at > ? AND crawled_at <= ? GROUP BY url ORDER BY url",
+                (since, until if until is not None else float('inf'))
+            ).fetchall()
+        return [{'url': url, 'crawled_at': crawled_at, 'change': 'added' if version == 1 else 'modified'}
+                for url, crawled_at, version in rows]
+
+    def get_stats(self):
+        """Return the number of pages and versions, and their raw and stored sizes in bytes."""
+        with self._lock:
+            pages, versions, raw_bytes, stored_bytes = self._connect().execute(
+                "SELECT COUNT(DISTINCT url), COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) "
+                "FROM versions"
+            ).fetchone()
+        return {'pages': pages, 'versions': versions, 'raw_bytes': raw_bytes, 'stored_bytes': stored_bytes}
+
+    def flush(self):
+        """Wait until all pages put so far are stored."""
+        if self._thread and self._thread.is_alive():
+            self._queue.join()
+
+    def commit(self):
+        """Store pending pages and commit them."""
+        self.flush()
+        with self._lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self._pending = 0
+
+    def close(self):
+        """Store and commit pending pages, stop the background thread and close the database."""
+        with self._thread_lock:
+            thread = self._thread
+            self._thread = None
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+        with self._lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self.conn.close()
+                self.conn = None
+                self._pending = 0
+
+
+def format_timestamp(timestamp):
+    """Format a Unix timestamp as local date and time."""
+    return datetime.fromtimestamp(timestamp).isoformat(sep=' ', timespec='seconds')
+
+
+def main():
+    """Query a page store from the command line."""
+    parser = argparse.ArgumentParser(description="Query page versions stored by RobopolScraper")
+    parser.add_argument('store', help="Path to the page store database")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('crawls', help="List crawls")
+    commands.add_parser('stats', help="Show the number and size of stored versions")
+    changes = commands.add_parser('changes', help="List pages changed between two times")
+    changes.add_argument('--since', type=parse_timestamp,
+                         help="Timestamp or ISO date (default: the second latest crawl)")
+    changes.add_argument('--until', type=parse_timestamp, help="Timestamp or ISO date (default: now)")
+    versions = commands.add_parser('versions', help="List versions of a page")
+    versions.add_argument('url', help="URL of the page")
+    get = commands.add_parser('get', help="Print a page as it was at a given time")
+    get.add_argument('url', help="URL of the page")
+    get.add_argument('--at', type=parse_timestamp, help="Timestamp or ISO date (default: latest version)")
+    get.add_argument('--output', help="Save the page to this file instead of printing it")
+    args = parser.parse_args()
+
+    store = PageStore(args.store)
+    try:
+        if args.command == 'crawls':
+            for crawled_at in store.get_crawls():
+                print(f"{crawled_at:.6f}  {format_timestamp(crawled_at)}")
+        elif args.command == 'stats':
+            stats = store.get_stats()
+            ratio = stats['raw_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0
+            print(f"{stats['pages']} pages, {stats['versions']} versions, {stats['raw_bytes']} bytes "
+                  f"stored in {stats['stored_bytes']} bytes ({ratio:.1f}x)")
+        elif args.command == 'changes':
+            since = args.since
+            if since is None:
+                crawls = store.get_crawls()
+                since = crawls[-2] if len(crawls) > 1 else 0
+            for change in store.get_changes(since, args.until):
+                print(f"{change['change']:<9} {format_timestamp(change['crawled_at'])}  {change['url']}")
+        elif args.command == 'versions':
+            for version in store.get_versions(args.url):
+                print(f"{version['version']:>4}  {format_timestamp(version['crawled_at'])}  "
+                      f"last seen {format_timestamp(version['last_seen'])}  {version['size']:>9} bytes  "
+                      f"{version['sha256'][:12]}")
+        else:
+            content = store.get(args.url, args.at)
+            if content is None:
+                parser.exit(1, f"No version of {args.url} found\n")
+            if args.output:
+                with open(args.output, 'wb') as f:
+                    f.write(content)
+            else:
+                sys.stdout.buffer.write(content)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compact page records and result export.
+
+PageRecord stores one scraped page in slots instead of a dict, while keeping
+dict-style access (record['url'], record.get('title'), 'fields' in record)
+for code written against the former dict records. Results are written as a
+JSON stream (one record per line inside the usual {"stats", "scraped_data"}
+document) and can be exported to CSV or Parquet, so analysis tools can load
+only the columns they need.
+
+Usage:
+    python records.py scraped_data.json scraped_data.parquet
+    python records.py scraped_data.json scraped_data.csv --columns url title
+"""
+
+import csv
+import json
+import argparse
+
+# Fields of a record in output order
+RECORD_FIELDS = (
+    'url', 'title', 'html_file', 'content_snippet', 'text_file',
+    'downloaded_images', 'downloaded_css', 'downloaded_js', 'fields', 'metadata',
+)
+
+# Fields omitted from the output when not set (structured data extraction)
+OPTIONAL_FIELDS = frozenset(('fields', 'metadata'))
+
+# Columns of the columnar export
+LIST_COLUMNS = ('downloaded_images', 'downloaded_css', 'downloaded_js')
+JSON_COLUMNS = ('fields', 'metadata', 'extra')
+EXPORT_COLUMNS = RECORD_FIELDS + ('extra',)
+
+_FIELD_SET = frozenset(RECORD_FIELDS)
+
+
+class PageRecord:
+    """Record of one scraped page."""
+
+    __slots__ = RECORD_FIELDS + ('extra',)
+
+    def __init__(self, url, title=None, html_file=None, content_snippet="", text_file=None,
+                 downloaded_images=(), downloaded_css=(), downloaded_js=(),
+                 fields=None, metadata=None, extra=None):
+        """
+        Initialization of a record.
+
+        Args:
+            url (str): URL of the page
+            title (str): Title of the page
+            html_file (str): Path to the saved HTML file
+            content_snippet (str): Beginning of the page text
+            text_file (str): Path to the extracted full text
+            downloaded_images (list): Paths to downloaded images
+            downloaded_css (list): Paths to downloaded CSS files
+            downloaded_js (list): Paths to downloaded JavaScript files
+            fields (dict): Fields extracted by an extraction schema
+            metadata (dict): Built-in structured metadata of the page
+            extra (dict): Additional keys (e.g. 'worker' in distributed crawls)
+        """
+        self.url = url
+        self.title = title
+        self.html_file = html_file
+        self.content_snippet = content_snippet
+        self.text_file = text_file
+        self.downloaded_images = tuple(downloaded_images or ())
+        self.downloaded_css = tuple(downloaded_css or ())
+        self.downloaded_js = tuple(downloaded_js or ())
+        self.fields = fields
+        self.metadata = metadata
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a record from a dict as stored in the JSON output."""
+        values = {key: value for key, value in data.items() if key in _FIELD_SET}
+        extra = {key: value for key, value in data.items() if key not in _FIELD_SET}
+        return cls(extra=extra or None, **values)
+
+    def keys(self):
+        """Return the keys present in the record, in output order."""
+        keys = [key for key in RECORD_FIELDS
+                if key not in OPTIONAL_FIELDS or getattr(self, key) is not None]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return key not in OPTIONAL_FIELDS or getattr(self, key) is not None
+        return bool(self.extra) and key in self.extra
+
+    def __getitem__(self, key):
+        if key in self:
+            if key in _FIELD_SET:
+                return getattr(self, key)
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in LIST_COLUMNS:
+            value = tuple(value or ())
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def update(self, values):
+        for key, value in values.items():
+            self[key] = value
+
+    def to_dict(self):
+        """Return the record as a dict (lists instead of tuples)."""
+        return {key: list(value) if isinstance(value, tuple) else value for key, value in self.items()}
+
+    def __eq__(self, other):
+        if isinstance(other, (PageRecord, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, PageRecord) else other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"PageRecord(url={self.url!r}, title={self.title!r})"
+
+
+def _as_dict(record):
+    return record.to_dict() if isinstance(record, PageRecord) else record
+
+
+def save_results_json(output_json, stats, scraped_data):
+    """
+    Save scraping results to a JSON file.
+
+    Records are streamed one per line, so the output is built without
+    holding the whole document in memory.
+
+    Args:
+        output_json (str): Path to output JSON file
+        stats (dict): Summary statistics
+        scraped_data (iterable): Scraped page records (PageRecord or dict)
+    """
+    with open(output_json, 'w', encoding='utf-8') as f:
+        f.write('{\n  "stats": ')
+        f.write(json.dumps(stats, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+        f.write(',\n  "scraped_data": [')
+        separator = '\n    '
+        for record in scraped_data:
+            f.write(separator)
+            f.write(json.dumps(_as_dict(record), ensure_ascii=False))
+            separator = ',\n    '
+        f.write('\n  ]\n}\n' if separator != '\n    ' else ']\n}\n')
+
+
+def _export_row(record, columns):
+    """Get the values of a record for the columnar export."""
+    data = _as_dict(record)
+    row = []
+    for column in columns:
+        if column == 'extra':
+            value = {key: v for key, v in data.items() if key not in _FIELD_SET} or None
+        else:
+            value = data.get(column)
+        if column in LIST_COLUMNS:
+            value = list(value or [])
+        row.append(value)
+    return row
+
+
+def export_csv(records, path, columns=EXPORT_COLUMNS):
+    """
+    Export records to a CSV file.
+
+    List and dict columns are stored as JSON strings.
+
+    Args:
+        records (iterable): Page records
+        path (str): Target path
+        columns (tuple): Columns to export
+
+    Returns:
+        int: Number of exported records
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for record in records:
+            row = _export_row(record, columns)
+            writer.writerow([json.dumps(value, ensure_ascii=False)
+                             if column in LIST_COLUMNS or (column in JSON_COLUMNS and value is not None)
+                             else value
+                             for column, value in zip(columns, row)])
+            count += 1
+    return count
+
+
+def export_parquet(records, path, columns=EXPORT_COLUMNS, batch_size=10000):
+    """
+    Export records to a Parquet file, written in row groups of batch_size records.
+
+    Asset path columns are lists of strings, dict columns are JSON strings.
+
+    Args:
+        records (iterable): Page records
+        path (str): Target path
+        columns (tuple): Columns to export
+        batch_size (int): Number of records per row group
+
+    Returns:
+        int: Number of exported records
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    # Imported on demand, pyarrow is large and only needed for this export
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet export requires the 'pyarrow' package")
+
+    schema = pyarrow.schema([
+        (column, pyarrow.list_(pyarrow.string()) if column in LIST_COLUMNS else pyarrow.string())
+        for column in columns
+    ])
+
+    def write_batch(writer, batch):
+        arrays = []
+        for index, column in enumerate(columns):
+            values = [row[index] for row in batch]
+            if column in JSON_COLUMNS:
+                values = [json.dumps(v, ensure_ascii=False) if v is not None else None for v in values]
+            arrays.append(pyarrow.array(values, type=schema.field(column).type))
+        writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+
+    count = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        batch = []
+        for record in records:
+            batch.append(_export_row(record, columns))
+            if len(batch) >= batch_size:
+                write_batch(writer, batch)
+                count += len(batch)
+                batch = []
+        if batch or count == 0:
+            write_batch(writer, batch)
+            count += len(batch)
+    return count
+
+
+def export_records(records, path, export_format=None, columns=EXPORT_COLUMNS):
+    """
+    Export records in a columnar format.
+
+    Args:
+        records (iterable): Page records
+        path (str): Target path
+        export_format (str): 'csv' or 'parquet' (default: from the file suffix)
+        columns (tuple): Columns to export
+
+    Returns:
+        int: Number of exported records
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    export_format = export_format or path.rsplit('.', 1)[-1].lower()
+    if export_format == 'csv':
+        return export_csv(records, path, columns)
+    if export_format == 'parquet':
+        return export_parquet(records, path, columns)
+    raise ValueError(f"Unsupported export format: {export_format}")
+
+
+def main():
+    """Convert a JSON output of the scraper to CSV or Parquet."""
+    parser = argparse.ArgumentParser(description="Export RobopolScraper results to CSV or Parquet")
+    parser.add_argument('input', help="JSON output of the scraper")
+    parser.add_argument('output', help="Target .csv or .parquet file")
+    parser.add_argument('--format', choices=('csv', 'parquet'), help="Export format (default: from suffix)")
+    parser.add_argument('--columns', nargs='+', choices=EXPORT_COLUMNS, help="Columns to export")
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        records = json.load(f).get('scraped_data', [])
+    count = export_records(records, args.output, args.format, tuple(args.columns or EXPORT_COLUMNS))
+    print(f"Exported {count} records to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
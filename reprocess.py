@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Offline re-extraction of scraped pages without refetching.
+
+Walks the HTML files saved by RobopolScraper (a directory tree or a zip/tar
+archive of it), runs the page extraction and link extraction of the scraper
+on every file in parallel worker processes and writes a new JSON output.
+This makes it possible to change extraction logic (snippets, full text,
+extraction schemas) and rebuild results locally in minutes.
+
+URLs are taken from a previous JSON output when given (--from-json).
+Otherwise they are reconstructed from file paths relative to the output
+directory, which cannot tell "/a/b" from "/a/b/" or "/a/b.html".
+
+Usage:
+    python reprocess.py scrap --base-url https://example.com --output scrap/reprocessed.json
+    python reprocess.py scrap --base-url https://example.com --from-json scrap/scraped_data.json \\
+        --schema schema.json --full-text --workers 8
+    python reprocess.py scrap.tar.gz --base-url https://example.com --output reprocessed.json
+"""
+
+import os
+import gzip
+import time
+import tarfile
+import zipfile
+import logging
+import argparse
+from itertools import islice
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger('RobopolScraper')
+
+# Suffixes of saved HTML files, optionally compressed
+HTML_SUFFIXES = ('.html', '.html.gz', '.html.zst')
+
+# Pages sent to a worker process in one task
+PAGES_PER_TASK = 16
+
+# Tasks submitted ahead per worker process (bounds archive contents held in memory)
+TASKS_PER_WORKER = 4
+
+# RobopolScraper settings that affect page and link extraction (see page_extraction.py)
+EXTRACTION_OPTIONS = ('full_text', 'extraction_schema', 'filter_eshop', 'filter_english',
+                      'url_include_patterns', 'url_exclude_patterns')
+
+# Page extractor of a worker process
+_worker_extractor = None
+
+
+class _CollectingIndex:
+    """Stand-in search index of a worker that keeps pages for the main process."""
+
+    def __init__(self):
+        self.pages = []
+
+    def add_page(self, url, title, text):
+        self.pages.append((url, title, text))
+
+    def take_pages(self):
+        """Return the pages added since the last call."""
+        pages, self.pages = self.pages, []
+        return pages
+
+
+def _decompress_html(path, data):
+    """Decompress a saved HTML file according to its suffix."""
+    if path.endswith('.gz'):
+        data = gzip.decompress(data)
+    elif path.endswith('.zst'):
+        if zstandard is None:
+            raise ValueError("Reading .zst files requires the 'zstandard' package")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def path_to_url(relative_path, base_url):
+    """
+    Reconstruct the URL of a page from its path relative to the output directory.
+
+    This is the inverse of RobopolScraper.save_html_to_file.
+
+    Args:
+        relative_path (str): Path of the HTML file relative to the output directory
+        base_url (str): Base URL of the site
+
+    Returns:
+        str: URL of the page
+    """
+    path = relative_path.replace(os.sep, '/')
+    for suffix in HTML_SUFFIXES:
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+            break
+
+    parsed_url = urlparse(base_url)
+    root = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    if path == 'index':
+        return root + '/'
+    return f"{root}/{path}"
+
+
+def _init_worker(options, index_pages):
+    """Create the page extractor used by a worker process."""
+    global _worker_extractor
+    logging.disable(logging.CRITICAL)
+
+    from page_extraction import PageExtractor
+    from writer import AsyncFileWriter
+
+    _worker_extractor = PageExtractor(writer=AsyncFileWriter(async_writes=False),
+                                      search_index=_CollectingIndex() if index_pages else None,
+                                      status_callback=lambda message: None, **options)
+
+
+def _take_indexed_pages(extractor):
+    """Return the pages a worker collected for the search index since the last call."""
+    return extractor.search_index.take_pages() if extractor.search_index is not None else []
+
+
+def _process_page(task):
+    """
+    Extract the record and links of one saved page in a worker process.
+
+    Args:
+        task (tuple): (url, html_file, data or None, previous record or None)
+
+    Returns:
+        tuple: (record, links, indexed pages) or (None, [], []) on error
+    """
+    from bs4 import BeautifulSoup
+    from extraction import release_tree
+    from charset import detect_encoding, is_utf8
+
+    url, html_file, raw_data, previous = task
+    extractor = _worker_extractor
+    try:
+        if raw_data is None:
+            with open(html_file, 'rb') as f:
+                raw_data = f.read()
+        html_content = _decompress_html(html_file, raw_data)
+
+        # Files saved by older versions were re-encoded to UTF-8 regardless of their <meta> charset
+        encoding = 'utf-8' if is_utf8(html_content) else detect_encoding(html_content)[0]
+        soup = BeautifulSoup(html_content, 'html.parser', from_encoding=encoding)
+
+        previous = previous or {}
+        data = extractor.extract_page_data(
+            soup, url, html_content, html_file,
+            previous.get('downloaded_images'),
+            previous.get('downloaded_css'),
+            previous.get('downloaded_js')
+        )
+        links = sorted({link for link in extractor.find_links(soup, url) if not extractor.should_filter_url(link)})
+        release_tree(soup)
+        return data, links, _take_indexed_pages(extractor)
+    except Exception as e:
+        logger.warning(f"Error reprocessing {html_file}: {e}")
+        _take_indexed_pages(extractor)
+        return None, [], []
+
+
+def _process_pages(tasks):
+    """Process a batch of saved pages in a worker process (see _process_page)."""
+    return [_process_page(task) for task in tasks]
+
+
+def iter_saved_pages(source, base_url, previous_records=None):
+    """
+    Find saved HTML pages in a directory or archive.
+
+    Args:
+        source (str): Output directory of a crawl or a zip/tar archive of it
+        base_url (str): Base URL of the site
+        previous_records (list): Records of a previous JSON output
+
+    Yields:
+        tuple: (url, html_file, data or None, previous record or None); data is
+            the file content for archives and None for files read by workers
+    """
+    by_file = {}
+    if previous_records is not None:
+        records = [r for r in previous_records if r.get('html_file')]
+        if os.path.isdir(source):
+            for record in records:
+                if os.path.exists(record['html_file']):
+                    yield record['url'], record['html_file'], None, record
+            return
+
+        # Archive members are matched by their path relative to the output directory
+        paths = [os.path.normpath(r['html_file']) for r in records]
+        prefix = os.path.commonpath(paths) if len(paths) > 1 else ''
+        by_file = {os.path.relpath(p, prefix) if prefix else p: r for p, r in zip(paths, records)}
+
+    def make_task(relative_path, full_path, data):
+        record = by_file.get(os.path.normpath(relative_path))
+        url = record['url'] if record else path_to_url(relative_path, base_url)
+        return url, full_path, data, record
+
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.endswith(HTML_SUFFIXES):
+                    full_path = os.path.join(root, name)
+                    yield make_task(os.path.relpath(full_path, source), full_path, None)
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [n for n in archive.namelist() if n.endswith(HTML_SUFFIXES)]
+            prefix = os.path.commonpath(names) if len(names) > 1 else ''
+            for name in names:
+                relative = os.path.relpath(name, prefix) if prefix else name
+                yield make_task(relative, name, archive.read(name))
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as archive:
+            members = [m for m in archive if m.isfile() and m.name.endswith(HTML_SUFFIXES)]
+            names = [m.name for m in members]
+            prefix = os.path.commonpath(names) if len(names) > 1 else ''
+            for member in members:
+                relative = os.path.relpath(member.name, prefix) if prefix else member.name
+                yield make_task(relative, member.name, archive.extractfile(member).read())
+    else:
+        raise ValueError(f"{source} is neither a directory nor a zip/tar archive")
+
+
+def reprocess(source, base_url, output_json, previous_json=None, workers=None,
+              link_graph_path=None, search_index_path=None, status_callback=None,
+              **scraper_options):
+    """
+    Rebuild scraping results from saved HTML files.
+
+    Args:
+        source (str): Output directory of a crawl or a zip/tar archive of it
+        base_url (str): Base URL of the site
+        output_json (str): Path to the new output JSON file
+        previous_json (str): Previous JSON output providing URLs and asset paths
+        workers (int): Number of worker processes (default: number of CPUs)
+        link_graph_path (str): Path to save the link graph (requires numpy)
+        search_index_path (str): Path to a full-text search index to update
+        status_callback (callable): Function for recording status messages
+        **scraper_options: RobopolScraper extraction settings (see EXTRACTION_OPTIONS)
+
+    Returns:
+        str: Path to output JSON file
+
+    Raises:
+        TypeError: If a setting does not affect extraction
+    """
+    import json
+    from scraper import save_results_json
+    from link_graph import LinkGraph
+    from search_index import SearchIndex
+
+    unsupported = sorted(set(scraper_options) - set(EXTRACTION_OPTIONS))
+    if unsupported:
+        raise TypeError(f"Unsupported reprocessing options: {', '.join(unsupported)}")
+
+    status_callback = status_callback or logger.info
+    start_time = time.time()
+
+    previous_records = None
+    if previous_json:
+        with open(previous_json, 'r', encoding='utf-8') as f:
+            previous_records = json.load(f).get('scraped_data', [])
+
+    output_dir = source if os.path.isdir(source) else os.path.dirname(os.path.abspath(output_json))
+    options = dict(scraper_options, output_dir=output_dir, base_url=base_url)
+
+    link_graph = LinkGraph() if link_graph_path else None
+    search_index = SearchIndex(search_index_path) if search_index_path else None
+
+    records_by_batch = {}
+    linked_urls = set()
+    processed = 0
+    failed = 0
+
+    tasks = iter_saved_pages(source, base_url, previous_records)
+    max_pending = (workers or os.cpu_count() or 1) * TASKS_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(options, search_index is not None)) as executor:
+        # Keep a bounded number of batches in flight and refill as each one completes,
+        # so workers stay busy without all archive contents being held in memory
+        pending = {}
+        while True:
+            while len(pending) < max_pending:
+                batch = list(islice(tasks, PAGES_PER_TASK))
+                if not batch:
+                    break
+                pending[executor.submit(_process_pages, batch)] = len(records_by_batch) + len(pending)
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                records = records_by_batch[pending.pop(future)] = []
+                for data, links, indexed in future.result():
+                    if data is None:
+                        failed += 1
+                        continue
+
+                    records.append(data)
+                    linked_urls.update(links)
+                    if link_graph is not None:
+                        link_graph.add_links(data['url'], links)
+                    if search_index is not None:
+                        for url, title, text in indexed:
+                            search_index.add_page(url, title, text)
+
+                    processed += 1
+                    if processed % 1000 == 0:
+                        status_callback(f"Reprocessed {processed} pages")
+
+    # Records in the order of the saved files, independent of completion order
+    scraped_data = [data for batch in sorted(records_by_batch) for data in records_by_batch[batch]]
+
+    if search_index is not None:
+        search_index.close()
+    if link_graph is not None:
+        link_graph.save(link_graph_path)
+        link_graph.save_scores(os.path.splitext(link_graph_path)[0] + "_scores.csv", base_url)
+
+    saved_urls = {data['url'] for data in scraped_data}
+    duration = time.time() - start_time
+    save_results_json(output_json, {
+        'total_urls': len(scraped_data) + failed,
+        'successful_scrapes': len(scraped_data),
+        'failed_scrapes': failed,
+        'linked_pages_not_saved': len(linked_urls - saved_urls),
+        'duration_seconds': duration,
+        'reprocessed_from': source,
+    }, scraped_data)
+
+    status_callback(f"Reprocessed {len(scraped_data)} pages in {duration:.2f} seconds "
+                    f"({failed} failed). Results saved to {output_json}")
+    return output_json
+
+
+def main():
+    """Run reprocessing from the command line."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Rebuild RobopolScraper results from saved HTML files")
+    parser.add_argument('source', help="Output directory of a crawl or a zip/tar archive of it")
+    parser.add_argument('--base-url', required=True, help="Base URL of the crawled site")
+    parser.add_argument('--output', default='reprocessed_data.json', help="Output JSON file")
+    parser.add_argument('--from-json', help="Previous JSON output providing URLs and asset paths")
+    parser.add_argument('--workers', type=int, help="Number of worker processes (default: CPU count)")
+    parser.add_argument('--schema', help="Extraction schema JSON file")
+    parser.add_argument('--full-text', action='store_true', help="Extract and save full text")
+    parser.add_argument('--search-index', help="Path to a full-text search index to update")
+    parser.add_argument('--link-graph', help="Path to save the link graph (.npz)")
+    parser.add_argument('--no-filter-eshop', action='store_true', help="Do not filter e-shop links")
+    parser.add_argument('--no-filter-english', action='store_true', help="Do not filter English links")
+    args = parser.parse_args()
+
+    reprocess(
+        args.source, args.base_url, args.output,
+        previous_json=args.from_json,
+        workers=args.workers,
+        link_graph_path=args.link_graph,
+        search_index_path=args.search_index,
+        full_text=args.full_text,
+        extraction_schema=args.schema,
+        filter_eshop=not args.no_filter_eshop,
+        filter_english=not args.no_filter_english
+    )
+
+
+if __name__ == "__main__":
+    main()
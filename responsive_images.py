@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Selection of one image variant per <img> element.
+
+Pages offer several variants of an image: srcset candidates with width (w)
+or density (x) descriptors, <source> elements of a <picture> with media
+conditions and formats, and lazy-loading attributes (data-src, data-srcset)
+whose src is only a placeholder. ImageSelector picks the single candidate a
+browser with the configured target width would use, preferring configured
+formats, and recognizes tracking pixels and other tiny images by their
+width and height attributes.
+"""
+
+import re
+
+# Attributes holding the real image of lazy-loaded images, checked before src
+LAZY_SRC_ATTRIBUTES = ('data-src', 'data-lazy-src', 'data-original', 'data-lazy')
+SRCSET_ATTRIBUTES = ('data-srcset', 'data-lazy-srcset', 'srcset')
+
+MEDIA_WIDTH_PATTERN = re.compile(r'\(\s*(min|max)-width\s*:\s*([\d.]+)\s*(px|r?em)?\s*\)', re.IGNORECASE)
+DIMENSION_PATTERN = re.compile(r'\s*(\d+(?:\.\d+)?)\s*(?:px)?\s*$', re.IGNORECASE)
+
+# Pixels per em in media queries
+EM_PIXELS = 16
+
+
+class ImageCandidate:
+    """One candidate of a srcset."""
+
+    __slots__ = ('url', 'width', 'density')
+
+    def __init__(self, url, width=None, density=None):
+        self.url = url
+        self.width = width
+        self.density = density
+
+
+def parse_srcset(value):
+    """
+    Parse a srcset attribute.
+
+    URLs may contain commas (e.g. image CDN parameters); a comma only ends a
+    candidate after whitespace or at the end of a URL.
+
+    Args:
+        value (str): Value of the srcset attribute
+
+    Returns:
+        list: ImageCandidate objects in order of appearance
+    """
+    candidates = []
+    pos = 0
+    length = len(value)
+    while pos < length:
+        # Skip whitespace and separators before the URL
+        while pos < length and (value[pos].isspace() or value[pos] == ','):
+            pos += 1
+        start = pos
+        while pos < length and not value[pos].isspace():
+            pos += 1
+        url = value[start:pos]
+
+        descriptors = ''
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            start = pos
+            depth = 0
+            while pos < length and (value[pos] != ',' or depth):
+                if value[pos] == '(':
+                    depth += 1
+                elif value[pos] == ')' and depth:
+                    depth -= 1
+                pos += 1
+            descriptors = value[start:pos]
+        if not url:
+            continue
+
+        width = density = None
+        for descriptor in descriptors.split():
+            try:
+                if descriptor[-1] in 'wW':
+                    width = int(descriptor[:-1])
+                elif descriptor[-1] in 'xX':
+                    density = float(descriptor[:-1])
+            except ValueError:
+                pass
+        candidates.append(ImageCandidate(url, width, density))
+    return candidates
+
+
+def parse_dimension(value):
+    """Parse a width or height attribute in pixels (None for missing or relative values)."""
+    if not value:
+        return None
+    match = DIMENSION_PATTERN.match(value)
+    return int(float(match.group(1))) if match else None
+
+
+def media_matches(media, viewport_width):
+    """
+    Check a media condition of a <source> against a viewport width.
+
+    Only min-width and max-width conditions are evaluated; queries with
+    other conditions only do not match, so the default source is used.
+
+    Args:
+        media (str): Value of the media attribute
+        viewport_width (int): Viewport width in pixels (None = unknown)
+
+    Returns:
+        bool: True if the source applies
+    """
+    if not media or media.strip().lower() in ('all', 'screen'):
+        return True
+    if viewport_width is None:
+        return False
+
+    for query in media.split(','):
+        conditions = MEDIA_WIDTH_PATTERN.findall(query)
+        if not conditions:
+            continue
+        matches = True
+        for kind, value, unit in conditions:
+            limit = float(value) * (EM_PIXELS if unit.lower() in ('em', 'rem') else 1)
+            if (kind.lower() == 'min' and viewport_width < limit) or (kind.lower() == 'max' and viewport_width > limit):
+                matches = False
+                break
+        if matches:
+            return True
+    return False
+
+
+def _get_attribute(tag, names):
+    """Return the first non-empty attribute of a tag from a list of names."""
+    for name in names:
+        value = tag.get(name)
+        if value and value.strip():
+            return value.strip()
+    return None
+
+
+class ImageSelector:
+    """Chooses the variant of an image to download."""
+
+    def __init__(self, target_width=None, formats=None, min_size=2):
+        """
+        Initialization of the selector.
+
+        Args:
+            target_width (int): Preferred image width in pixels, also used as the
+                viewport width for media conditions; None keeps the src image
+                when there is one
+            formats (list): Accepted MIME types of <picture> sources in order of
+                preference (e.g. ['image/webp', 'image/jpeg']); None accepts all
+                and takes the first applicable source like a browser
+            min_size (int): Images with a width or height attribute below this
+                are skipped as tracking pixels or spacers
+        """
+        self.target_width = target_width
+        self.formats = [value.lower() for value in formats] if formats else None
+        self.min_size = min_size
+
+    def is_tiny(self, img):
+        """Check if an <img> is declared smaller than min_size pixels."""
+        for attribute in ('width', 'height'):
+            size = parse_dimension(img.get(attribute))
+            if size is not None and size < self.min_size:
+                return True
+        return False
+
+    def _get_format_rank(self, mime_type):
+        """Return the preference of a source type (lower is better) or None if not accepted."""
+        if self.formats is None:
+            return 0
+        if not mime_type:
+            # Untyped sources come after all preferred formats
+            return len(self.formats)
+        mime_type = mime_type.split(';')[0].strip().lower()
+        return self.formats.index(mime_type) if mime_type in self.formats else None
+
+    def get_source_candidates(self, img):
+        """
+        Get the candidates of the <source> chosen for an image inside a <picture>.
+
+        Returns:
+            list: ImageCandidate objects or None if no source applies
+        """
+        picture = img.parent
+        if picture is None or picture.name != 'picture':
+            return None
+
+        best, best_rank = None, None
+        for source in picture.find_all('source', recursive=False):
+            srcset = _get_attribute(source, SRCSET_ATTRIBUTES)
+            if not srcset or not media_matches(source.get('media'), self.target_width):
+                continue
+            rank = self._get_format_rank(source.get('type'))
+            if rank is None:
+                continue
+            if best_rank is None or rank < best_rank:
+                best, best_rank = srcset, rank
+            if self.formats is None:
+                break
+        return parse_srcset(best) if best else None
+
+    def get_src(self, img):
+        """Return the real src of an image, skipping data: placeholders of lazy loading."""
+        for name in LAZY_SRC_ATTRIBUTES + ('src',):
+            value = img.get(name)
+            if value and value.strip() and not value.strip().lower().startswith('data:'):
+                return value.strip()
+        return None
+
+    def select(self, img):
+        """
+        Choose the URL to download for an <img> element.
+
+        Width-described candidates are chosen by the width attribute of the
+        image or the target width, whichever is smaller: the narrowest
+        candidate at least that wide, or the widest one. Without either, they
+        are only used when the image has no src (the widest is taken). Of
+        density-described candidates the 1x variant is taken.
+
+        Args:
+            img (Tag): <img> element
+
+        Returns:
+            str: URL as written in the page (may be relative) or None
+        """
+        candidates = self.get_source_candidates(img)
+        if not candidates:
+            srcset = _get_attribute(img, SRCSET_ATTRIBUTES)
+            candidates = parse_srcset(srcset) if srcset else []
+        src = self.get_src(img)
+
+        width = self.target_width
+        declared_width = parse_dimension(img.get('width'))
+        if declared_width and (width is None or declared_width < width):
+            width = declared_width
+
+        described = [candidate for candidate in candidates if candidate.width]
+        if described and (width is not None or not src):
+            if width is None:
+                return max(described, key=lambda candidate: candidate.width).url
+            wide_enough = [candidate for candidate in described if candidate.width >= width]
+            if wide_enough:
+                return min(wide_enough, key=lambda candidate: candidate.width).url
+            return max(described, key=lambda candidate: candidate.width).url
+
+        densities = [candidate for candidate in candidates if not candidate.width]
+        if densities:
+            sharp_enough = [candidate for candidate in densities if (candidate.density or 1.0) >= 1.0]
+            if sharp_enough:
+                return min(sharp_enough, key=lambda candidate: candidate.density or 1.0).url
+            return max(densities, key=lambda candidate: candidate.density or 1.0).url
+        return src
@@ -3,17 +3,34 @@
 
 import os
 import requests
-import json
-import re
 import time
+import asyncio
 import logging
+import threading
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
-import urllib.request
+
+from throttle import RetryPolicy, HostThrottle
+from writer import AsyncFileWriter
+from extraction import release_tree
+from page_extraction import PageExtractor
+from search_index import SearchIndex
+from page_store import PageStore
+from responsive_images import ImageSelector
+from link_graph import LinkGraph
+from assets import AssetDownloader
+from asset_cache import AssetCache
+from cancellation import CancelToken, CancellableHTTPAdapter, ScrapeCancelled
+from records import save_results_json, export_records
+from charset import detect_encoding
+from http_cache import RecordingHTTPAdapter, ResponseStore, RECORD, REPLAY
+from http2_adapter import HTTP2Adapter, RecordingHTTP2Adapter
+import dns_cache
+from url_classifier import URLClassifier, NonHTMLContent, route_content_type, PAGE, BINARY
 
 # Logging system configuration
 logging.basicConfig(
@@ -22,7 +39,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger('RobopolScraper')
 
-class RobopolScraper:
+# Counters of a run saved with the results (and merged from workers by distributed.py)
+RESULT_STATS = ('successful_scrapes', 'failed_scrapes', 'filtered_urls', 'downloaded_images',
+                'downloaded_css', 'downloaded_js', 'downloaded_css_assets', 'cached_assets',
+                'downloaded_files', 'skipped_non_html', 'probed_urls', 'changed_pages',
+                'skipped_images', 'oversized_assets', 'retries')
+
+def create_session(cancel_token, pool_connections=10, pool_maxsize=10,
+                   http_cache_dir=None, http_cache_mode=RECORD, http2=False):
+    """
+    Create an HTTP session whose requests are aborted by a cancel token.
+    
+    Args:
+        cancel_token (CancelToken): Token that aborts the requests of the session
+        pool_connections (int): Number of hosts with pooled connections
+        pool_maxsize (int): Maximum number of pooled connections per host
+        http_cache_dir (str): Directory of a record/replay cache of all responses
+        http_cache_mode (str): 'record' to store responses, 'replay' to serve them offline
+        http2 (bool or str): Whether to use HTTP/2 (requires httpx[http2]); 'h2c' also
+            uses it for plain http:// URLs without negotiation
+        
+    Returns:
+        requests.Session: New session
+    """
+    session = requests.Session()
+    pool_args = {'pool_connections': pool_connections, 'pool_maxsize': pool_maxsize}
+    if http2:
+        pool_args['prior_knowledge'] = http2 == 'h2c'
+    
+    if http_cache_dir:
+        adapter_class = RecordingHTTP2Adapter if http2 else RecordingHTTPAdapter
+        adapter = adapter_class(cancel_token, ResponseStore(http_cache_dir), http_cache_mode, **pool_args)
+    elif http2:
+        adapter = HTTP2Adapter(cancel_token, **pool_args)
+    else:
+        adapter = CancellableHTTPAdapter(cancel_token, **pool_args)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class RobopolScraper(PageExtractor):
     """Class for scraping web pages from the robopol.sk domain."""
     
     def __init__(self, output_dir="scrap", base_url="your domain", 
@@ -30,7 +86,17 @@ class RobopolScraper:
                  filter_eshop=True, filter_english=True, recursive=True,
                  request_delay=0.0, url_include_patterns=None, url_exclude_patterns=None,
                  download_images=False, images_dir=None,
-                 download_css=False, download_js=False, styles_dir=None, scripts_dir=None):
+                 download_css=False, download_js=False, styles_dir=None, scripts_dir=None,
+                 download_css_assets=True, max_retries=3, backoff_base=0.5, backoff_max=30.0,
+                 adaptive_throttle=True, max_request_delay=30.0,
+                 async_writes=True, compress_html=None, full_text=False, search_index_path=None,
+                 link_graph_path=None, extraction_schema=None,
+                 asset_workers=8, asset_workers_per_page=4, asset_cache_path=None, asset_cache_ttl=0,
+                 export_format=None, classify_urls=True, probe_urls=True, binary_dir=None,
+                 max_pages=None, session=None, cancel_token=None, asset_executor=None,
+                 http_cache_dir=None, http_cache_mode=RECORD, http2=False, dns_cache_ttl=None,
+                 page_store_path=None, image_target_width=None, image_formats=None, min_image_size=2,
+                 max_image_bytes=None):
         """
         Initialization of the scraper.
         
@@ -51,34 +117,136 @@ class RobopolScraper:
             download_js (bool): Whether to download JavaScript files
             styles_dir (str): Directory for downloaded CSS files
             scripts_dir (str): Directory for downloaded JavaScript files
+            download_css_assets (bool): Whether to download fonts, images and stylesheets
+                referenced from downloaded CSS files (url(), @import)
+            max_retries (int): Maximum number of retries for temporary errors (429, 5xx, network)
+            backoff_base (float): Base delay for exponential backoff between retries in seconds
+            backoff_max (float): Upper bound of the backoff delay in seconds
+            adaptive_throttle (bool): Whether to slow down per host on errors and high latency
+            max_request_delay (float): Upper bound of the adaptive per-host delay in seconds
+            async_writes (bool): Whether to write files on a background writer thread
+            compress_html (str): Compression of saved HTML pages: None, 'gzip' or 'zstd'
+            full_text (bool): Whether to extract the main text without boilerplate and
+                store it gzip-compressed next to the HTML file
+            search_index_path (str): Path to a full-text search index updated during the crawl
+            link_graph_path (str): Path to a .npz file for the link graph of the site; page
+                scores are saved next to it as CSV (requires numpy)
+            extraction_schema (dict or str): Structured data extraction schema or path to
+                its JSON file (see extraction_rules.py)
+            asset_workers (int): Maximum number of concurrent asset downloads
+            asset_workers_per_page (int): Maximum number of concurrent asset downloads of one page
+            asset_cache_path (str): Path to a persistent asset cache; unchanged assets from
+                previous runs are revalidated with conditional requests instead of downloaded
+            asset_cache_ttl (float): Seconds during which cached assets are reused without revalidation
+            export_format (str): Also export records next to the JSON output as 'csv' or
+                'parquet' (requires pyarrow)
+            classify_urls (bool): Whether to route URLs by extension and Content-Type, so
+                documents and media are never downloaded as pages
+            probe_urls (bool): Whether to probe URLs with unknown extensions with a HEAD
+                request (cached per path pattern)
+            binary_dir (str): Directory for documents (PDF, office files, archives) linked
+                from pages; None skips them
+            max_pages (int): Maximum number of URLs processed in one run (None = unlimited)
+            session (requests.Session): HTTP session shared with other scrapers; it must
+                be created with the same cancel_token (see multisite.py)
+            cancel_token (CancelToken): Cancellation shared with other scrapers
+            asset_executor (ThreadPoolExecutor): Worker pool for asset downloads shared
+                with other scrapers
+            http_cache_dir (str): Directory of a record/replay cache of all HTTP responses
+            http_cache_mode (str): 'record' stores every response in http_cache_dir, 'replay'
+                serves recorded responses offline without request delays
+            http2 (bool or str): Whether to multiplex requests over one HTTP/2 connection per
+                host (requires httpx[http2]); 'h2c' also uses HTTP/2 for plain http:// URLs
+            dns_cache_ttl (float): Seconds for which resolved host names are reused while the
+                scraper is open (None disables the DNS cache); the cache replaces
+                socket.getaddrinfo for the whole process until the scraper is closed
+            page_store_path (str): Path to a versioned page store keeping the HTML of
+                every crawl, with earlier versions delta-compressed (see page_store.py)
+            image_target_width (int): Preferred width of downloaded images in pixels; one
+                variant per image is chosen from srcset and <picture> sources (None keeps
+                the src image when there is one)
+            image_formats (list): Accepted MIME types of <picture> sources in order of
+                preference, e.g. ['image/webp', 'image/jpeg'] (None accepts all)
+            min_image_size (int): Images with a width or height attribute below this many
+                pixels (tracking pixels, spacers) are not downloaded
+            max_image_bytes (int): Images larger than this are not downloaded (None = no limit)
         """
-        self.output_dir = output_dir
-        self.base_url = base_url
-        self.domain = urlparse(base_url).netloc
-        self.status_callback = status_callback or self._default_status_callback
+        # Output paths, URL filters and extraction rules (the writer and search index are set below)
+        super().__init__(output_dir, base_url, full_text=full_text, extraction_schema=extraction_schema,
+                         filter_eshop=filter_eshop, filter_english=filter_english,
+                         url_include_patterns=url_include_patterns, url_exclude_patterns=url_exclude_patterns,
+                         status_callback=status_callback or self._default_status_callback)
         self.progress_callback = progress_callback or self._default_progress_callback
-        self.filter_eshop = filter_eshop
-        self.filter_english = filter_english
         self.recursive = recursive
         self.request_delay = request_delay
         self.download_images = download_images
         self.images_dir = images_dir
+        self.image_selector = ImageSelector(target_width=image_target_width, formats=image_formats,
+                                            min_size=min_image_size)
+        self.max_image_bytes = max_image_bytes
         self.download_css = download_css
         self.download_js = download_js
         self.styles_dir = styles_dir
         self.scripts_dir = scripts_dir
+        self.download_css_assets = download_css_assets
+        self.export_format = export_format
+        self.binary_dir = binary_dir
+        self.max_pages = max_pages
+        self.dns_cache_ttl = dns_cache_ttl
+        self.dns_cache = None
+        self._install_dns_cache()
         
-        # Flag to request stopping the scraper
-        self.stop_requested = False
+        # Cancellation of running requests, sleeps and downloads by request_stop
+        self.cancel_token = cancel_token or CancelToken()
         
-        # Compile regex patterns for URL filters
-        self.url_include_patterns = None
-        if url_include_patterns:
-            self.url_include_patterns = [re.compile(pattern) for pattern in url_include_patterns]
-            
-        self.url_exclude_patterns = None
-        if url_exclude_patterns:
-            self.url_exclude_patterns = [re.compile(pattern) for pattern in url_exclude_patterns]
+        # HTTP session shared by all requests (keeps connections alive)
+        self._owns_session = session is None
+        self.session = session or create_session(self.cancel_token, pool_maxsize=max(10, asset_workers),
+                                                 http_cache_dir=http_cache_dir, http_cache_mode=http_cache_mode,
+                                                 http2=http2)
+        
+        # Replayed responses come from disk, there is no server to be polite to
+        if http_cache_dir and http_cache_mode == REPLAY:
+            request_delay = 0.0
+            adaptive_throttle = False
+        
+        # Retry policy and per-host pacing of requests
+        self.retry_policy = RetryPolicy(max_retries=max_retries, backoff_base=backoff_base,
+                                        backoff_max=backoff_max)
+        self.throttle = HostThrottle(min_delay=request_delay, max_delay=max_request_delay,
+                                     adaptive=adaptive_throttle)
+        
+        # Writer for HTML pages and downloaded assets
+        self.writer = AsyncFileWriter(compression=compress_html, async_writes=async_writes,
+                                      status_callback=self.status_callback)
+        
+        # Shared queue for deduplicated, concurrent asset downloads
+        self.asset_downloader = AssetDownloader(
+            self._http_get, self.writer,
+            max_workers=asset_workers, max_per_page=asset_workers_per_page,
+            status_callback=self.status_callback, count_callback=self._increment_stat,
+            cache=AssetCache(asset_cache_path, ttl=asset_cache_ttl) if asset_cache_path else None,
+            executor=asset_executor
+        )
+        self.cancel_token.add_callback(self.asset_downloader.cancel)
+        
+        # Routing of URLs to the page pipeline, the binary sink or nowhere
+        self.url_classifier = None
+        if classify_urls:
+            self.url_classifier = URLClassifier(probe=self._probe_content_type if probe_urls else None)
+        
+        # Full-text search index of scraped pages
+        self.search_index = SearchIndex(search_index_path) if search_index_path else None
+        
+        # Version history of pages across crawls
+        self.page_store = None
+        if page_store_path:
+            self.page_store = PageStore(page_store_path, async_writes=async_writes,
+                                        status_callback=self.status_callback)
+        
+        # Link graph of the site
+        self.link_graph_path = link_graph_path
+        self.link_graph = LinkGraph() if link_graph_path else None
         
         # Initialize sets for tracking visited URLs
         self.visited_urls = set()
@@ -86,18 +254,12 @@ class RobopolScraper:
         self.skipped_urls = set()
         self.scraped_data = []
         
-        # Scraping statistics
-        self.stats = {
-            'total_urls_processed': 0,
-            'successful_scrapes': 0,
-            'failed_scrapes': 0,
-            'filtered_urls': 0,
-            'downloaded_images': 0,
-            'downloaded_css': 0,
-            'downloaded_js': 0,
-            'start_time': None,
-            'end_time': None
-        }
+        # Scraping statistics (updated from several threads)
+        self._stats_lock = threading.Lock()
+        self.stats = {'total_urls_processed': 0}
+        self.stats.update(dict.fromkeys(RESULT_STATS, 0))
+        self.stats['start_time'] = None
+        self.stats['end_time'] = None
         
         # Webdriver for dynamic pages (initialized later)
         self.driver = None
@@ -110,15 +272,22 @@ class RobopolScraper:
             os.makedirs(styles_dir, exist_ok=True)
         if download_js and scripts_dir:
             os.makedirs(scripts_dir, exist_ok=True)
+        if binary_dir:
+            os.makedirs(binary_dir, exist_ok=True)
     
     def _default_status_callback(self, message):
         """Default function for printing status messages."""
         logger.info(message)
         
-    def _default_progress_callback(self, value):
+    def _default_progress_callback(self, value, done_count=None, total_count=None):
         """Default function for updating progress state."""
         logger.info(f"Progress: {value}%")
     
+    def _increment_stat(self, key, value=1):
+        """Increase a statistics counter (thread-safe)."""
+        with self._stats_lock:
+            self.stats[key] += value
+    
     def _setup_webdriver(self):
         """Initialization and setup of webdriver for Selenium."""
         try:
@@ -138,8 +307,31 @@ class RobopolScraper:
             self.status_callback(f"Error initializing webdriver: {e}")
             return False
     
+    def _install_dns_cache(self):
+        """Resolve host names through the shared DNS cache while the scraper is open."""
+        if self.dns_cache_ttl and self.dns_cache is None:
+            self.dns_cache = dns_cache.install(self.dns_cache_ttl)
+    
     def close(self):
         """Close the webdriver and clean up resources."""
+        # Finish pending downloads and file writes
+        self.asset_downloader.close()
+        self.writer.close()
+        
+        if self.search_index:
+            self.search_index.close()
+        
+        if self.page_store:
+            self.page_store.close()
+        
+        # Close pooled connections (and commit recorded responses)
+        if self._owns_session:
+            self.session.close()
+        
+        if self.dns_cache is not None:
+            dns_cache.uninstall()
+            self.dns_cache = None
+        
         if self.driver:
             try:
                 self.driver.quit()
@@ -147,6 +339,94 @@ class RobopolScraper:
             except Exception as e:
                 self.status_callback(f"Error closing webdriver: {e}")
     
+    @property
+    def stop_requested(self):
+        """Whether stopping the scraper was requested."""
+        return self.cancel_token.is_cancelled()
+    
+    @stop_requested.setter
+    def stop_requested(self, value):
+        if value:
+            self.cancel_token.cancel()
+        else:
+            self.cancel_token.reset()
+    
+    def _http_get(self, url, method='GET', **kwargs):
+        """
+        Send a request (GET by default) with per-host throttling and retries.
+        
+        Temporary failures (429, 5xx and network errors) are retried with
+        jittered exponential backoff, honoring the Retry-After header.
+        
+        Args:
+            url (str): URL to request
+            method (str): HTTP method
+            **kwargs: Additional arguments for requests
+            
+        Returns:
+            requests.Response: Last received response
+            
+        Raises:
+            requests.RequestException: If the request failed after all retries
+            ScrapeCancelled: If a stop was requested while waiting or during the request
+        """
+        host = urlparse(url).netloc
+        attempt = 0
+        
+        while True:
+            self.throttle.wait(host, sleep=self.cancel_token.sleep)
+            start = time.monotonic()
+            
+            try:
+                response = self.session.request(method, url, timeout=10, **kwargs)
+            except requests.RequestException as e:
+                # Connection shut down by request_stop
+                self.cancel_token.raise_if_cancelled()
+                self.throttle.record(host, time.monotonic() - start, error=True)
+                if not self.retry_policy.should_retry(attempt):
+                    raise
+                delay = self.retry_policy.get_delay(attempt)
+                reason = str(e)
+            else:
+                retryable = response.status_code in self.retry_policy.retry_statuses
+                retry_after = None
+                if retryable:
+                    retry_after = self.retry_policy.parse_retry_after(response.headers.get('Retry-After'))
+                self.throttle.record(host, time.monotonic() - start, error=retryable, retry_after=retry_after)
+                
+                if not retryable or not self.retry_policy.should_retry(attempt, response.status_code):
+                    return response
+                
+                delay = self.retry_policy.get_delay(attempt, retry_after)
+                reason = f"server response {response.status_code}"
+                response.close()
+            
+            attempt += 1
+            self._increment_stat('retries')
+            self.status_callback(f"Retrying {url} in {delay:.1f} s ({reason}, attempt {attempt}/{self.retry_policy.max_retries})")
+            self.cancel_token.sleep(delay)
+    
+    def _probe_content_type(self, url):
+        """
+        Get the Content-Type of a URL without transferring its body.
+        
+        Args:
+            url (str): URL to probe
+            
+        Returns:
+            str: Content-Type header or None
+        """
+        self._increment_stat('probed_urls')
+        response = self._http_get(url, method='HEAD', allow_redirects=True)
+        response.close()
+        content_type = response.headers.get('Content-Type')
+        if response.status_code in (405, 501) or not content_type:
+            # Servers without HEAD support: ask for a single byte
+            response = self._http_get(url, headers={'Range': 'bytes=0-0'}, stream=True)
+            response.close()
+            content_type = response.headers.get('Content-Type')
+        return content_type
+    
     def get_page_content(self, url, use_selenium=False):
         """
         Get the HTML content of a page.
@@ -155,13 +435,19 @@ class RobopolScraper:
             url (str): URL of the page to retrieve
             use_selenium (bool): Whether to use Selenium for JavaScript pages
             
+        Pages fetched over HTTP are returned as raw bytes, decoded only once by
+        the parser using the encoding found by detect_encoding.
+        
         Returns:
-            tuple: (soup, html_content) or (None, None) on error
+            tuple: (soup, html_content) with html_content as bytes (str for
+                Selenium) or (None, None) on error
+        
+        Raises:
+            NonHTMLContent: If URL classification is enabled and the response
+                is not HTML (its body is not downloaded)
         """
         try:
-            if self.request_delay > 0:
-                time.sleep(self.request_delay)
-                
+            encoding = None
             if use_selenium:
                 if not self.driver and not self._setup_webdriver():
                     return None, None
@@ -169,15 +455,28 @@ class RobopolScraper:
                 self.driver.get(url)
                 html_content = self.driver.page_source
             else:
-                response = requests.get(url, timeout=10)
+                # Streamed, so that the headers can be checked before the body is read
+                response = self._http_get(url, stream=True)
                 if response.status_code != 200:
+                    response.close()
                     self.status_callback(f"Invalid server response: {response.status_code} for {url}")
                     return None, None
-                html_content = response.text
+                content_type = response.headers.get('Content-Type')
+                if self.url_classifier is not None and route_content_type(content_type) != PAGE:
+                    response.close()
+                    raise NonHTMLContent(content_type)
+                html_content = response.content
+                encoding, _ = detect_encoding(html_content, response.headers.get('Content-Type'))
+                response.close()
+                del response
             
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, 'html.parser', from_encoding=encoding)
             return soup, html_content
+        except (ScrapeCancelled, NonHTMLContent):
+            raise
         except Exception as e:
+            # Body read interrupted by request_stop
+            self.cancel_token.raise_if_cancelled()
             self.status_callback(f"Error getting page content for {url}: {e}")
             return None, None
     
@@ -185,73 +484,38 @@ class RobopolScraper:
         """
         Save HTML content to a file.
         
+        The file is written by the background writer, so the returned path
+        may not exist yet when this method returns.
+        
         Args:
             url (str): URL of the page
-            html_content (str): HTML content to save
+            html_content (bytes or str): HTML content to save (bytes are saved unchanged)
             
         Returns:
             str: Path to the saved file or None
         """
         try:
-            parsed_url = urlparse(url)
-            path_elements = parsed_url.path.strip('/').split('/')
-            
-            # Create directory structure based on URL path
-            dir_path = self.output_dir
-            if path_elements and path_elements[0]:
-                dir_path = os.path.join(self.output_dir, *path_elements[:-1]) if len(path_elements) > 1 else self.output_dir
-                os.makedirs(dir_path, exist_ok=True)
-            
-            # Filename
-            filename = path_elements[-1] if path_elements and path_elements[-1] else "index"
-            if not filename.endswith('.html'):
-                filename = f"{filename}.html"
-            
-            file_path = os.path.join(dir_path, filename)
+            file_path = self._get_page_file_path(url)
             
             # Save HTML content
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            
-            return file_path
+            return self.writer.write(file_path, html_content, compress=True)
         except Exception as e:
             self.status_callback(f"Error saving HTML for {url}: {e}")
             return None
     
-    def should_filter_url(self, url):
+    def save_page_version(self, url, html_content):
         """
-        Check if a URL should be filtered.
+        Store the HTML of a page in the page store, as a new version if it changed.
         
         Args:
-            url (str): URL to check
-            
-        Returns:
-            bool: True if the URL should be filtered, False otherwise
+            url (str): URL of the page
+            html_content (bytes or str): HTML content of the page
         """
-        # Domain check
-        parsed_url = urlparse(url)
-        if parsed_url.netloc != self.domain:
-            return True
-        
-        # E-shop filtering
-        if self.filter_eshop and ('/e-shop/' in url or '/eshop/' in url or '/shop/' in url):
-            return True
-        
-        # English page filtering
-        if self.filter_english and ('/en/' in url):
-            return True
-        
-        # Filtering based on Include regex patterns
-        if self.url_include_patterns:
-            if not any(pattern.search(url) for pattern in self.url_include_patterns):
-                return True
-        
-        # Filtering based on Exclude regex patterns
-        if self.url_exclude_patterns:
-            if any(pattern.search(url) for pattern in self.url_exclude_patterns):
-                return True
-        
-        return False
+        try:
+            if self.page_store.put(url, html_content):
+                self._increment_stat('changed_pages')
+        except Exception as e:
+            self.status_callback(f"Error storing version of {url}: {e}")
     
     def extract_links(self, soup, current_url):
         """
@@ -265,191 +529,233 @@ class RobopolScraper:
             list: List of URL links
         """
         links = []
+        page_links = set()
         
         if not soup:
             return links
         
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
-            
-            # Skip empty links, anchors, and JavaScript links
-            if not href or href.startswith('#') or href.startswith('javascript:'):
-                continue
-            
-            # Create absolute URL
-            absolute_url = urljoin(current_url, href)
-            
-            # Remove fragments and parameters
-            parsed_url = urlparse(absolute_url)
-            clean_url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
-            
+        for clean_url in self.find_links(soup, current_url):
             # Add to list if not already processed and not filtered
             if clean_url not in self.visited_urls and clean_url not in self.queue:
                 if not self.should_filter_url(clean_url):
                     links.append(clean_url)
+                    page_links.add(clean_url)
                 else:
                     self.skipped_urls.add(clean_url)
                     self.stats['filtered_urls'] += 1
+            elif self.link_graph is not None:
+                page_links.add(clean_url)
+        
+        # Record all links of the page in the link graph
+        if self.link_graph is not None:
+            self.link_graph.add_links(current_url, page_links)
         
         return links
     
-    def download_page_images(self, soup, url):
+    def save_link_graph(self):
         """
-        Download images from a page and save them to a directory.
+        Save the link graph and PageRank-style page scores.
+        
+        Returns:
+            str: Path to the saved graph or None on error
+        """
+        try:
+            self.link_graph.save(self.link_graph_path)
+            scores_path = os.path.splitext(self.link_graph_path)[0] + "_scores.csv"
+            self.link_graph.save_scores(scores_path, self.base_url)
+            self.status_callback(f"Link graph with {self.link_graph.num_nodes} pages and "
+                                 f"{self.link_graph.num_edges} links saved to {self.link_graph_path}")
+            return self.link_graph_path
+        except Exception as e:
+            self.status_callback(f"Error saving link graph: {e}")
+            return None
+    
+    def _get_page_name(self, url):
+        """Get the name of a page used for its asset directories."""
+        path_elements = urlparse(url).path.strip('/').split('/')
+        return path_elements[-1] if path_elements and path_elements[-1] else "index"
+    
+    def find_page_images(self, soup, url):
+        """
+        Find images of a page to download.
         
         Args:
             soup (BeautifulSoup): Analyzed page content
             url (str): URL of the page
             
         Returns:
-            list: List of paths to downloaded images
+            list: (image URL, filename) pairs, empty if image downloading is disabled
         """
+        images = []
         if not self.download_images or not self.images_dir or not soup:
-            return []
+            return images
         
-        downloaded_images = []
-        
-        try:
-            parsed_url = urlparse(url)
-            path_elements = parsed_url.path.strip('/').split('/')
-            page_name = path_elements[-1] if path_elements and path_elements[-1] else "index"
+        # Choose one variant of every image (srcset, <picture>, lazy loading)
+        for img_num, img_tag in enumerate(soup.find_all('img')):
+            if self.image_selector.is_tiny(img_tag):
+                self._increment_stat('skipped_images')
+                continue
+            src = self.image_selector.select(img_tag)
+            if not src:
+                continue
             
-            # Directory for images for this page
-            page_images_dir = os.path.join(self.images_dir, page_name)
-            os.makedirs(page_images_dir, exist_ok=True)
+            # Create absolute URL for the image
+            img_url = urljoin(url, src)
             
-            # Find all img tags with src attribute
-            for img_num, img_tag in enumerate(soup.find_all('img', src=True)):
-                src = img_tag['src']
-                if not src:
+            # Get filename
+            img_filename = os.path.basename(urlparse(img_url).path)
+            if not img_filename:
+                img_filename = f"image_{img_num}.jpg"
+            
+            images.append((img_url, img_filename))
+        
+        return images
+    
+    def find_page_resources(self, soup, url):
+        """
+        Find CSS and JavaScript files of a page to download.
+        
+        Args:
+            soup (BeautifulSoup): Analyzed page content
+            url (str): URL of the page
+            
+        Returns:
+            tuple: (stylesheets, scripts) lists of (URL, filename) pairs,
+                empty for disabled resource types
+        """
+        stylesheets = []
+        scripts = []
+        if not soup:
+            return stylesheets, scripts
+        
+        # Find all link tags with rel="stylesheet"
+        if self.download_css and self.styles_dir:
+            for css_num, link_tag in enumerate(soup.find_all('link', rel="stylesheet", href=True)):
+                href = link_tag['href']
+                if not href:
                     continue
                 
-                # Create absolute URL for the image
-                img_url = urljoin(url, src)
+                # Create absolute URL for the CSS
+                css_url = urljoin(url, href)
                 
                 # Get filename
-                img_filename = os.path.basename(urlparse(img_url).path)
-                if not img_filename:
-                    img_filename = f"image_{img_num}.jpg"
+                css_filename = os.path.basename(urlparse(css_url).path)
+                if not css_filename or not css_filename.endswith('.css'):
+                    css_filename = f"style_{css_num}.css"
                 
-                # Target path for the image
-                img_path = os.path.join(page_images_dir, img_filename)
+                stylesheets.append((css_url, css_filename))
+        
+        # Find all script tags with src attribute
+        if self.download_js and self.scripts_dir:
+            for js_num, script_tag in enumerate(soup.find_all('script', src=True)):
+                src = script_tag['src']
+                if not src:
+                    continue
                 
-                try:
-                    # Download and save the image
-                    if self.request_delay > 0:
-                        time.sleep(self.request_delay)
-                    
-                    urllib.request.urlretrieve(img_url, img_path)
-                    downloaded_images.append(img_path)
-                    self.stats['downloaded_images'] += 1
-                except Exception as e:
-                    self.status_callback(f"Error downloading image {img_url}: {e}")
-        except Exception as e:
-            self.status_callback(f"Error processing images for {url}: {e}")
+                # Create absolute URL for the JavaScript
+                js_url = urljoin(url, src)
+                
+                # Get filename
+                js_filename = os.path.basename(urlparse(js_url).path)
+                if not js_filename or not js_filename.endswith(('.js', '.jsx')):
+                    js_filename = f"script_{js_num}.js"
+                
+                scripts.append((js_url, js_filename))
         
-        return downloaded_images
+        return stylesheets, scripts
     
-    def download_page_resources(self, soup, url):
+    def download_page_assets(self, url, images=(), stylesheets=(), scripts=()):
         """
-        Download CSS and JavaScript files from a page.
+        Download assets of a page through the shared asset queue.
+        
+        Each asset URL is fetched once per crawl, even when referenced repeatedly.
+        Works on URL lists only, so the parsed page can be released before the
+        downloads start.
         
         Args:
-            soup (BeautifulSoup): Analyzed page content
             url (str): URL of the page
+            images (list): (URL, filename) pairs from find_page_images
+            stylesheets (list): (URL, filename) pairs from find_page_resources
+            scripts (list): (URL, filename) pairs from find_page_resources
             
         Returns:
-            tuple: (downloaded_css, downloaded_js) with paths to downloaded files
+            tuple: (downloaded_images, downloaded_css, downloaded_js) with paths to downloaded files
         """
+        downloaded_images = []
         downloaded_css = []
         downloaded_js = []
+        page_name = self._get_page_name(url)
         
-        if not soup:
-            return downloaded_css, downloaded_js
+        # Directories for this page are created by the writer
+        if self.download_images and self.images_dir:
+            try:
+                downloaded_images = self.asset_downloader.download(
+                    images, os.path.join(self.images_dir, page_name), 'downloaded_images',
+                    max_bytes=self.max_image_bytes)
+            except Exception as e:
+                self.status_callback(f"Error processing images for {url}: {e}")
+            self.status_callback(f"Downloaded {len(downloaded_images)} images for {url}")
         
         try:
-            parsed_url = urlparse(url)
-            path_elements = parsed_url.path.strip('/').split('/')
-            page_name = path_elements[-1] if path_elements and path_elements[-1] else "index"
-            
-            # Download CSS files
             if self.download_css and self.styles_dir:
-                # Directory for CSS files for this page
-                page_styles_dir = os.path.join(self.styles_dir, page_name)
-                os.makedirs(page_styles_dir, exist_ok=True)
-                
-                # Find all link tags with rel="stylesheet"
-                for css_num, link_tag in enumerate(soup.find_all('link', rel="stylesheet", href=True)):
-                    href = link_tag['href']
-                    if not href:
-                        continue
-                    
-                    # Create absolute URL for the CSS
-                    css_url = urljoin(url, href)
-                    
-                    # Get filename
-                    css_filename = os.path.basename(urlparse(css_url).path)
-                    if not css_filename or not css_filename.endswith('.css'):
-                        css_filename = f"style_{css_num}.css"
-                    
-                    # Target path for the CSS
-                    css_path = os.path.join(page_styles_dir, css_filename)
-                    
-                    try:
-                        # Download and save the CSS
-                        if self.request_delay > 0:
-                            time.sleep(self.request_delay)
-                        
-                        response = requests.get(css_url, timeout=10)
-                        if response.status_code == 200:
-                            with open(css_path, 'wb') as f:
-                                f.write(response.content)
-                            downloaded_css.append(css_path)
-                            self.stats['downloaded_css'] += 1
-                    except Exception as e:
-                        self.status_callback(f"Error downloading CSS {css_url}: {e}")
-            
-            # Download JavaScript files
+                downloaded_css = self.asset_downloader.download(
+                    stylesheets, os.path.join(self.styles_dir, page_name), 'downloaded_css',
+                    scan_css=self.download_css_assets)
+                self.status_callback(f"Downloaded {len(downloaded_css)} CSS files for {url}")
             if self.download_js and self.scripts_dir:
-                # Directory for JS files for this page
-                page_scripts_dir = os.path.join(self.scripts_dir, page_name)
-                os.makedirs(page_scripts_dir, exist_ok=True)
-                
-                # Find all script tags with src attribute
-                for js_num, script_tag in enumerate(soup.find_all('script', src=True)):
-                    src = script_tag['src']
-                    if not src:
-                        continue
-                    
-                    # Create absolute URL for the JavaScript
-                    js_url = urljoin(url, src)
-                    
-                    # Get filename
-                    js_filename = os.path.basename(urlparse(js_url).path)
-                    if not js_filename or not js_filename.endswith(('.js', '.jsx')):
-                        js_filename = f"script_{js_num}.js"
-                    
-                    # Target path for the JavaScript
-                    js_path = os.path.join(page_scripts_dir, js_filename)
-                    
-                    try:
-                        # Download and save the JavaScript
-                        if self.request_delay > 0:
-                            time.sleep(self.request_delay)
-                        
-                        response = requests.get(js_url, timeout=10)
-                        if response.status_code == 200:
-                            with open(js_path, 'wb') as f:
-                                f.write(response.content)
-                            downloaded_js.append(js_path)
-                            self.stats['downloaded_js'] += 1
-                    except Exception as e:
-                        self.status_callback(f"Error downloading JavaScript {js_url}: {e}")
-                        
+                downloaded_js = self.asset_downloader.download(
+                    scripts, os.path.join(self.scripts_dir, page_name), 'downloaded_js')
+                self.status_callback(f"Downloaded {len(downloaded_js)} JavaScript files for {url}")
         except Exception as e:
             self.status_callback(f"Error processing resources for {url}: {e}")
         
-        return downloaded_css, downloaded_js
+        return downloaded_images, downloaded_css, downloaded_js
+    
+    def download_page_images(self, soup, url):
+        """
+        Download images from a page and save them to a directory.
+        
+        Args:
+            soup (BeautifulSoup): Analyzed page content
+            url (str): URL of the page
+            
+        Returns:
+            list: List of paths to downloaded images
+        """
+        return self.download_page_assets(url, images=self.find_page_images(soup, url))[0]
+    
+    def download_page_resources(self, soup, url):
+        """
+        Download CSS and JavaScript files from a page.
+        
+        Args:
+            soup (BeautifulSoup): Analyzed page content
+            url (str): URL of the page
+            
+        Returns:
+            tuple: (downloaded_css, downloaded_js) with paths to downloaded files
+        """
+        stylesheets, scripts = self.find_page_resources(soup, url)
+        return self.download_page_assets(url, stylesheets=stylesheets, scripts=scripts)[1:]
+    
+    def handle_non_page(self, url, route, content_type=None):
+        """
+        Queue a document for the binary sink or skip a URL that is not a page.
+        
+        Args:
+            url (str): URL that is not an HTML page
+            route (str): Route of the URL (BINARY or SKIP)
+            content_type (str): Content-Type of the response, if known
+        """
+        if route == BINARY and self.binary_dir:
+            filename = os.path.basename(urlparse(url).path) or 'file'
+            self.asset_downloader.submit(url, self.binary_dir, filename, 'downloaded_files')
+            self.status_callback(f"Queued file download: {url}")
+            return
+        
+        self._increment_stat('skipped_non_html')
+        kind = f" ({content_type})" if content_type else ""
+        self.status_callback(f"Skipping non-HTML content{kind}: {url}")
     
     def scrape_url(self, url):
         """
@@ -460,66 +766,60 @@ class RobopolScraper:
             
         Returns:
             tuple: (data_dict, links) or (None, [])
+        
+        Raises:
+            ScrapeCancelled: If a stop was requested while the page was processed
         """
         self.status_callback(f"Processing: {url}")
         self.visited_urls.add(url)
         self.stats['total_urls_processed'] += 1
         
+        # Route documents and media away from the page pipeline before any download
+        if self.url_classifier is not None:
+            route = self.url_classifier.classify(url)
+            if route != PAGE:
+                self.handle_non_page(url, route)
+                return None, []
+        
         # Get page content
-        soup, html_content = self.get_page_content(url)
+        try:
+            soup, html_content = self.get_page_content(url)
+        except NonHTMLContent as e:
+            route = self.url_classifier.learn(url, e.content_type)
+            self.handle_non_page(url, route, e.content_type)
+            return None, []
         if not soup or not html_content:
             self.stats['failed_scrapes'] += 1
             return None, []
         
-        # Save HTML to file
+        # Hand the HTML over to the writer
         html_file = self.save_html_to_file(url, html_content)
+        if self.page_store:
+            self.save_page_version(url, html_content)
         
-        # Download images if enabled
-        downloaded_images = []
-        if self.download_images:
-            downloaded_images = self.download_page_images(soup, url)
-            self.status_callback(f"Downloaded {len(downloaded_images)} images for {url}")
+        # Take everything needed from the parsed page: asset URLs, the record and links
+        images = self.find_page_images(soup, url)
+        stylesheets, scripts = self.find_page_resources(soup, url)
+        data = self.extract_page_data(soup, url, html_content, html_file)
+        links = self.extract_links(soup, url) if self.recursive else []
         
-        # Download CSS and JavaScript if enabled
-        downloaded_css = []
-        downloaded_js = []
-        if self.download_css or self.download_js:
-            downloaded_css, downloaded_js = self.download_page_resources(soup, url)
-            if self.download_css:
-                self.status_callback(f"Downloaded {len(downloaded_css)} CSS files for {url}")
-            if self.download_js:
-                self.status_callback(f"Downloaded {len(downloaded_js)} JavaScript files for {url}")
+        # Release the tree and the HTML before the (slow) asset downloads
+        release_tree(soup)
+        del soup, html_content
         
-        # Extract information
-        title = soup.title.text if soup.title else "No Title"
+        # Download images, CSS and JavaScript if enabled
+        if images or stylesheets or scripts:
+            (data['downloaded_images'], data['downloaded_css'],
+             data['downloaded_js']) = self.download_page_assets(url, images, stylesheets, scripts)
         
-        # Get content text
-        content = ""
-        main_content = soup.find("main") or soup.find("div", class_="content") or soup.find("article")
-        if main_content:
-            content = main_content.get_text(strip=True, separator=" ")
-        else:
-            content = soup.body.get_text(strip=True, separator=" ") if soup.body else ""
-        
-        # Create data dictionary
-        data = {
-            'url': url,
-            'title': title,
-            'html_file': html_file,
-            'content_snippet': content[:500] + "..." if len(content) > 500 else content,
-            'downloaded_images': downloaded_images,
-            'downloaded_css': downloaded_css,
-            'downloaded_js': downloaded_js
-        }
+        # Downloads of a stopped crawl are incomplete, drop the page
+        self.cancel_token.raise_if_cancelled()
         
         # Add to scraped data
         self.scraped_data.append(data)
         self.stats['successful_scrapes'] += 1
         
-        # Find additional links if recursive
-        links = []
         if self.recursive:
-            links = self.extract_links(soup, url)
             self.status_callback(f"Found {len(links)} new links on {url}")
         
         return data, links
@@ -534,10 +834,247 @@ class RobopolScraper:
             else:
                 logger.info(f"Progress: {progress}% ({done_count}/{total_count})")
             
+    def get_result_stats(self, duration):
+        """
+        Get summary statistics stored together with the results.
+        
+        Args:
+            duration (float): Duration of the scraping in seconds
+            
+        Returns:
+            dict: Summary statistics
+        """
+        stats = {'total_urls': len(self.visited_urls)}
+        for key in RESULT_STATS:
+            stats[key] = self.stats[key]
+        stats['duration_seconds'] = duration
+        return stats
+    
     def request_stop(self):
-        """Request the scraper to stop processing."""
-        self.stop_requested = True
-        self.status_callback("Stop requested, finishing current operation...")
+        """
+        Request the scraper to stop processing.
+        
+        Running requests are aborted, waits are interrupted and queued asset
+        downloads are dropped; run_scraper then saves the results collected so far.
+        """
+        self.status_callback("Stop requested, aborting current operation...")
+        self.cancel_token.cancel()
+    
+    def start_run(self):
+        """Reset the state of previous runs and queue the base URL."""
+        self.status_callback(f"Starting scraping from {self.base_url}")
+        self.stats['start_time'] = time.time()
+        self._install_dns_cache()
+        
+        # Clear state from previous runs
+        self.visited_urls.clear()
+        self.queue.clear()
+        self.skipped_urls.clear()
+        self.scraped_data.clear()
+        self.asset_downloader.reset()
+        if self.url_classifier is not None:
+            self.url_classifier.reset()
+        if self.link_graph is not None:
+            self.link_graph = LinkGraph()
+        self.stats['total_urls_processed'] = 0
+        for key in RESULT_STATS:
+            self.stats[key] = 0
+        self.cancel_token.reset()
+        
+        # Pages of this run are versioned with its start time
+        if self.page_store:
+            self.page_store.begin_crawl(self.stats['start_time'])
+        
+        # Start scraping from base URL
+        self.queue.add(self.base_url)
+    
+    def has_pending_urls(self):
+        """Check if there are queued URLs and the page limit is not reached."""
+        if self.max_pages is not None and len(self.visited_urls) >= self.max_pages:
+            return False
+        return bool(self.queue)
+    
+    def finish_run(self, output_json=None, stopped=False):
+        """
+        Complete a run: wait for pending downloads and writes, save the link
+        graph and the results.
+        
+        Args:
+            output_json (str): Path to output JSON file
+            stopped (bool): Whether the run was stopped (partial results are saved)
+        """
+        self.stats['end_time'] = time.time()
+        duration = self.stats['end_time'] - self.stats['start_time']
+        
+        if stopped:
+            self.status_callback(f"Scraping stopped by user request after {len(self.visited_urls)} URLs.")
+        else:
+            self.status_callback(f"Scraping completed. Processed {len(self.visited_urls)} URLs in {duration:.2f} seconds.")
+        self.status_callback(f"Successful: {self.stats['successful_scrapes']}, " +
+                           f"Failed: {self.stats['failed_scrapes']}, " +
+                           f"Filtered: {self.stats['filtered_urls']}, " +
+                           f"Retries: {self.stats['retries']}")
+        
+        if self.download_images:
+            self.status_callback(f"Total images downloaded: {self.stats['downloaded_images']}")
+            if self.stats['skipped_images'] or self.stats['oversized_assets']:
+                self.status_callback(f"Images skipped: {self.stats['skipped_images']} tiny, "
+                                     f"{self.stats['oversized_assets']} over the size limit")
+        if self.download_css:
+            self.status_callback(f"Total CSS files downloaded: {self.stats['downloaded_css']}")
+            if self.download_css_assets:
+                self.status_callback(f"Total files referenced from CSS downloaded: "
+                                     f"{self.stats['downloaded_css_assets']}")
+        if self.download_js:
+            self.status_callback(f"Total JavaScript files downloaded: {self.stats['downloaded_js']}")
+        if self.stats['cached_assets']:
+            self.status_callback(f"Unchanged assets reused from cache: {self.stats['cached_assets']}")
+        if self.stats['skipped_non_html']:
+            self.status_callback(f"Non-HTML URLs skipped: {self.stats['skipped_non_html']}")
+        
+        # Wait for queued documents, pending file writes and index updates
+        self.asset_downloader.wait()
+        if self.binary_dir:
+            self.status_callback(f"Total documents downloaded: {self.stats['downloaded_files']}")
+        self.writer.flush()
+        if self.search_index:
+            self.search_index.commit()
+        if self.page_store:
+            self.page_store.commit()
+            self.status_callback(f"New or changed page versions stored: {self.stats['changed_pages']}")
+        if self.asset_downloader.cache is not None:
+            self.asset_downloader.cache.commit()
+        
+        # Save link graph and page scores
+        if self.link_graph is not None:
+            self.save_link_graph()
+        
+        # Set progress to 100% and final counts
+        self._update_progress(len(self.visited_urls), len(self.visited_urls))
+        
+        # Save results to JSON (partial results when stopped)
+        if output_json:
+            stats = self.get_result_stats(duration)
+            if stopped:
+                stats['stopped'] = True
+            save_results_json(output_json, stats, self.scraped_data)
+            
+            self.status_callback(f"Results saved to {output_json}")
+            
+            # Columnar export for analysis tools
+            if self.export_format:
+                export_path = f"{os.path.splitext(output_json)[0]}.{self.export_format}"
+                try:
+                    export_records(self.scraped_data, export_path, self.export_format)
+                    self.status_callback(f"Records exported to {export_path}")
+                except Exception as e:
+                    self.status_callback(f"Error exporting records: {e}")
+    
+    def _crawl(self):
+        """Scrape queued URLs until the queue is empty, yielding the record of every scraped page."""
+        # Initialize progress bar at the beginning
+        self._update_progress(0, 1)
+        
+        while self.has_pending_urls() and not self.stop_requested:
+            # Get next URL from queue
+            url = self.queue.pop()
+            
+            # Scrape URL
+            try:
+                data, links = self.scrape_url(url)
+            except ScrapeCancelled:
+                self.status_callback("Stopping scraping as requested...")
+                break
+            
+            # Add new URLs to queue
+            for link in links:
+                self.queue.add(link)
+            
+            # Update progress bar
+            self._update_progress(len(self.visited_urls), len(self.visited_urls) + len(self.queue))
+            
+            if data is not None:
+                yield data
+    
+    def iter_pages(self, output_json=None):
+        """
+        Crawl from the base URL, yielding page records as they are scraped.
+        
+        The crawl advances only when the next record is requested, so a slow
+        consumer slows the crawl down instead of records piling up. Records
+        are kept for the JSON output only when output_json is given. Leaving
+        the loop early ends the crawl like a stop (partial results are saved).
+        
+        Args:
+            output_json (str): Path to output JSON file (optional)
+            
+        Yields:
+            PageRecord: Record of each scraped page
+        """
+        self.start_run()
+        completed = False
+        try:
+            for data in self._crawl():
+                if not output_json:
+                    self.scraped_data.clear()
+                yield data
+            completed = True
+        finally:
+            try:
+                self.finish_run(output_json, self.stop_requested or not completed)
+            finally:
+                self.close()
+    
+    async def aiter_pages(self, output_json=None, max_pending=16):
+        """
+        Asynchronous version of iter_pages.
+        
+        The crawl runs on a background thread and hands records over through a
+        queue of at most max_pending records; when the queue is full the crawl
+        waits for the consumer. Leaving the loop early stops the crawl; wrap
+        the generator in contextlib.aclosing() to stop it right away instead of
+        when the event loop finalizes it.
+        
+        Args:
+            output_json (str): Path to output JSON file (optional)
+            max_pending (int): Maximum number of records waiting for the consumer
+            
+        Yields:
+            PageRecord: Record of each scraped page
+        """
+        loop = asyncio.get_running_loop()
+        pending = asyncio.Queue(maxsize=max_pending)
+        
+        def put(item):
+            asyncio.run_coroutine_threadsafe(pending.put(item), loop).result()
+        
+        def produce():
+            try:
+                for data in self.iter_pages(output_json):
+                    put(('page', data))
+            except Exception as e:
+                put(('error', e))
+            else:
+                put(('done', None))
+        
+        thread = threading.Thread(target=produce, name='ScraperIterator', daemon=True)
+        thread.start()
+        try:
+            while True:
+                kind, value = await pending.get()
+                if kind == 'error':
+                    raise value
+                if kind == 'done':
+                    return
+                yield value
+        finally:
+            if thread.is_alive():
+                # Consumer left early: stop the crawl and let it finish
+                self.request_stop()
+                while thread.is_alive():
+                    while not pending.empty():
+                        pending.get_nowait()
+                    await asyncio.sleep(0.05)
     
     def run_scraper(self, output_json=None):
         """
@@ -550,93 +1087,16 @@ class RobopolScraper:
             str: Path to output JSON file or None on error
         """
         try:
-            self.status_callback(f"Starting scraping from {self.base_url}")
-            self.stats['start_time'] = time.time()
-            
-            # Clear state from previous runs
-            self.visited_urls.clear()
-            self.queue.clear()
-            self.skipped_urls.clear()
-            self.scraped_data.clear()
-            self.stats['total_urls_processed'] = 0
-            self.stats['successful_scrapes'] = 0
-            self.stats['failed_scrapes'] = 0
-            self.stats['filtered_urls'] = 0
-            self.stats['downloaded_images'] = 0
-            self.stats['downloaded_css'] = 0
-            self.stats['downloaded_js'] = 0
-            self.stop_requested = False
-            
-            # Start scraping from base URL
-            self.queue.add(self.base_url)
-            
-            # Initialize progress bar at the beginning
-            self._update_progress(0, 1)
-            
-            while self.queue and not self.stop_requested:
-                # Get next URL from queue
-                url = self.queue.pop()
-                
-                # Scrape URL
-                data, links = self.scrape_url(url)
-                
-                # Check if stop was requested during scraping
-                if self.stop_requested:
-                    self.status_callback("Stopping scraping as requested...")
-                    break
-                
-                # Add new URLs to queue
-                for link in links:
-                    self.queue.add(link)
-                
-                # Update progress bar
-                self._update_progress(len(self.visited_urls), len(self.visited_urls) + len(self.queue))
-            
-            # Check if scraping was stopped
-            if self.stop_requested:
-                self.status_callback("Scraping stopped by user request.")
-                return False
+            self.start_run()
+            for _ in self._crawl():
+                pass
             
             # Completion
-            self.stats['end_time'] = time.time()
-            duration = self.stats['end_time'] - self.stats['start_time']
-            
-            self.status_callback(f"Scraping completed. Processed {len(self.visited_urls)} URLs in {duration:.2f} seconds.")
-            self.status_callback(f"Successful: {self.stats['successful_scrapes']}, " +
-                               f"Failed: {self.stats['failed_scrapes']}, " +
-                               f"Filtered: {self.stats['filtered_urls']}")
-            
-            if self.download_images:
-                self.status_callback(f"Total images downloaded: {self.stats['downloaded_images']}")
-            if self.download_css:
-                self.status_callback(f"Total CSS files downloaded: {self.stats['downloaded_css']}")
-            if self.download_js:
-                self.status_callback(f"Total JavaScript files downloaded: {self.stats['downloaded_js']}")
-            
-            # Set progress to 100% and final counts
-            self._update_progress(len(self.visited_urls), len(self.visited_urls))
-            
-            # Save results to JSON
-            if output_json:
-                with open(output_json, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        'stats': {
-                            'total_urls': len(self.visited_urls),
-                            'successful_scrapes': self.stats['successful_scrapes'],
-                            'failed_scrapes': self.stats['failed_scrapes'],
-                            'filtered_urls': self.stats['filtered_urls'],
-                            'downloaded_images': self.stats['downloaded_images'],
-                            'downloaded_css': self.stats['downloaded_css'],
-                            'downloaded_js': self.stats['downloaded_js'],
-                            'duration_seconds': duration
-                        },
-                        'scraped_data': self.scraped_data
-                    }, f, ensure_ascii=False, indent=2)
-                
-                self.status_callback(f"Results saved to {output_json}")
+            stopped = self.stop_requested
+            self.finish_run(output_json, stopped)
+            if output_json and not stopped:
                 return output_json
-            
-            return True
+            return not stopped
         except Exception as e:
             self.status_callback(f"Critical error during scraping: {e}")
             return None
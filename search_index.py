@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Full-text search index of scraped pages.
+
+The index is an SQLite database with an FTS5 table of URL, title and text of
+every page. It is filled by RobopolScraper during the crawl and can be
+queried without loading the JSON output.
+
+Usage:
+    python search_index.py scrap/search.db "robot arm"
+    python search_index.py scrap/search.db "title:servo OR motor" --raw --limit 20
+"""
+
+import re
+import json
+import sqlite3
+import argparse
+import threading
+
+
+class SearchIndex:
+    """On-disk full-text index of pages based on SQLite FTS5."""
+
+    # Relative weights of the url, title and body columns in ranking
+    COLUMN_WEIGHTS = (2.0, 5.0, 1.0)
+
+    def __init__(self, path, batch_size=500):
+        """
+        Initialization of the index.
+
+        Args:
+            path (str): Path to the index database
+            batch_size (int): Number of added pages per transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5("
+                "url, title, body, tokenize='unicode61 remove_diacritics 2')"
+            )
+        return self.conn
+
+    def add_page(self, url, title, text):
+        """
+        Add a page to the index, replacing a previous version of the same URL.
+
+        Args:
+            url (str): URL of the page
+            title (str): Title of the page
+            text (str): Extracted text of the page
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR IGNORE INTO documents (url) VALUES (?)", (url,))
+            doc_id = conn.execute("SELECT id FROM documents WHERE url = ?", (url,)).fetchone()[0]
+            conn.execute("DELETE FROM pages WHERE rowid = ?", (doc_id,))
+            conn.execute(
+                "INSERT INTO pages (rowid, url, title, body) VALUES (?, ?, ?, ?)",
+                (doc_id, url, title or "", text or "")
+            )
+
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                conn.commit()
+                self._pending = 0
+
+    def commit(self):
+        """Commit pages added since the last commit."""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self._pending = 0
+
+    def close(self):
+        """Commit pending pages and close the database."""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self.conn.close()
+                self.conn = None
+                self._pending = 0
+
+    @staticmethod
+    def build_query(text):
+        """
+        Convert free text to an FTS5 query matching all its words.
+
+        Args:
+            text (str): Free text query
+
+        Returns:
+            str: FTS5 query
+        """
+        terms = re.findall(r'\w+', text, re.UNICODE)
+        return " ".join(f'"{term}"' for term in terms)
+
+    def search(self, query, limit=10, offset=0, raw=False):
+        """
+        Search the index.
+
+        Args:
+            query (str): Words to search for, or an FTS5 query when raw is True
+            limit (int): Maximum number of results
+            offset (int): Number of results to skip
+            raw (bool): Whether the query uses FTS5 syntax
+
+        Returns:
+            list: Results as dicts with url, title, snippet and score (lower is better)
+        """
+        match = query if raw else self.build_query(query)
+        if not match:
+            return []
+
+        weights = ", ".join(str(weight) for weight in self.COLUMN_WEIGHTS)
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT url, title, snippet(pages, 2, '[', ']', '...', 16), bm25(pages, {weights}) AS score "
+                f"FROM pages WHERE pages MATCH ? ORDER BY score LIMIT ? OFFSET ?",
+                (match, limit, offset)
+            ).fetchall()
+
+        return [{'url': url, 'title': title, 'snippet': snippet, 'score': score}
+                for url, title, snippet, score in rows]
+
+    def count(self):
+        """Return the number of indexed pages."""
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+def main():
+    """Query a search index from the command line."""
+    parser = argparse.ArgumentParser(description="Search pages indexed by RobopolScraper")
+    parser.add_argument('index', help="Path to the index database")
+    parser.add_argument('query', help="Words to search for")
+    parser.add_argument('--limit', type=int, default=10, help="Maximum number of results")
+    parser.add_argument('--raw', action='store_true', help="Interpret the query as FTS5 syntax")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    try:
+        results = index.search(args.query, limit=args.limit, raw=args.raw)
+    except sqlite3.OperationalError as e:
+        parser.error(f"Invalid query: {e}")
+    finally:
+        index.close()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    for result in results:
+        print(f"{result['url']}  {result['title']}")
+        print(f"    {result['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
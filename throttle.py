@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Retry policy and adaptive per-host request throttling for RobopolScraper."""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+
+class RetryPolicy:
+    """Decides whether a failed request is retried and how long to wait before it."""
+
+    # Status codes that indicate a temporary condition on the server side
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30.0,
+                 retry_statuses=None, max_retry_after=300.0):
+        """
+        Initialization of the retry policy.
+
+        Args:
+            max_retries (int): Maximum number of retries per request
+            backoff_base (float): Base delay for exponential backoff in seconds
+            backoff_max (float): Upper bound of the backoff delay in seconds
+            retry_statuses (tuple): HTTP status codes that are retried
+            max_retry_after (float): Upper bound for delays requested via Retry-After
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = tuple(retry_statuses) if retry_statuses else self.RETRY_STATUSES
+        self.max_retry_after = max_retry_after
+
+    def should_retry(self, attempt, status=None):
+        """
+        Check if a request should be retried.
+
+        Args:
+            attempt (int): Number of retries already made (0 for the first request)
+            status (int): HTTP status code, None for network errors
+
+        Returns:
+            bool: True if the request should be retried
+        """
+        if attempt >= self.max_retries:
+            return False
+        return status is None or status in self.retry_statuses
+
+    def get_delay(self, attempt, retry_after=None):
+        """
+        Compute delay before the next retry.
+
+        Uses exponential backoff with full jitter. A delay requested by the
+        server via Retry-After takes precedence when it is longer.
+
+        Args:
+            attempt (int): Number of retries already made
+            retry_after (float): Delay requested by the server in seconds
+
+        Returns:
+            float: Delay in seconds
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value):
+        """
+        Parse a Retry-After header value.
+
+        Args:
+            value (str): Header value, either seconds or an HTTP date
+
+        Returns:
+            float: Delay in seconds or None if the value is missing or invalid
+        """
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_time = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_time is None:
+            return None
+        return max(0.0, retry_time.timestamp() - time.time())
+
+
+class _HostState:
+    """Throttling state of a single host."""
+
+    __slots__ = ('delay', 'next_time', 'latency_ewma')
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.next_time = 0.0
+        self.latency_ewma = None
+
+
+class HostThrottle:
+    """
+    Per-host request pacing with adaptive delay.
+
+    Every host has its own delay between requests. Every error or response
+    much slower than usual multiplies the delay by backoff_factor, every
+    healthy response multiplies it by recovery_factor, down to the configured
+    minimum. The delay therefore settles at a level the host can sustain.
+    """
+
+    def __init__(self, min_delay=0.0, max_delay=30.0, adaptive=True,
+                 increase_step=0.25, backoff_factor=2.0, recovery_factor=0.8,
+                 latency_factor=3.0, min_slow_latency=1.0, smoothing=0.2):
+        """
+        Initialization of the throttle.
+
+        Args:
+            min_delay (float): Minimum delay between requests to one host in seconds
+            max_delay (float): Maximum delay between requests to one host in seconds
+            adaptive (bool): Whether to adjust the delay based on responses
+            increase_step (float): Smallest delay used after the first slowdown signal
+            backoff_factor (float): Multiplier applied to the delay on errors
+            recovery_factor (float): Multiplier applied to the delay on healthy responses
+            latency_factor (float): Latency above this multiple of the average counts as a slowdown
+            min_slow_latency (float): Latency in seconds below which a response never counts as slow
+            smoothing (float): Weight of the newest sample in the latency average
+        """
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, min_delay)
+        self.adaptive = adaptive
+        self.increase_step = increase_step
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.latency_factor = latency_factor
+        self.min_slow_latency = min_slow_latency
+        self.smoothing = smoothing
+
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _get_state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.min_delay)
+        return state
+
+    def get_delay(self, host):
+        """Return the current delay between requests to a host."""
+        with self._lock:
+            return self._get_state(host).delay
+
+    def wait(self, host, sleep=time.sleep):
+        """
+        Wait until a request to the host is allowed and reserve the slot.
+
+        Args:
+            host (str): Host (netloc) of the request
+            sleep (callable): Function used for waiting
+        """
+        with self._lock:
+            state = self._get_state(host)
+            now = time.monotonic()
+            start = max(now, state.next_time)
+            state.next_time = start + state.delay
+
+        if start > now:
+            sleep(start - now)
+
+    def record(self, host, latency, error=False, retry_after=None):
+        """
+        Record the outcome of a request and adapt the host delay.
+
+        Args:
+            host (str): Host (netloc) of the request
+            latency (float): Duration of the request in seconds
+            error (bool): Whether the request failed with a temporary error
+            retry_after (float): Pause requested by the server in seconds
+        """
+        with self._lock:
+            state = self._get_state(host)
+            alpha = self.smoothing
+
+            slow = (state.latency_ewma is not None and
+                    latency > max(state.latency_ewma * self.latency_factor, self.min_slow_latency))
+            if state.latency_ewma is None:
+                state.latency_ewma = latency
+            else:
+                state.latency_ewma = (1 - alpha) * state.latency_ewma + alpha * latency
+
+            if self.adaptive:
+                if error or slow:
+                    state.delay = min(self.max_delay,
+                                      max(state.delay * self.backoff_factor, self.increase_step))
+                elif state.delay > self.min_delay:
+                    state.delay = max(self.min_delay, state.delay * self.recovery_factor)
+                    if state.delay - self.min_delay < self.increase_step / 10:
+                        state.delay = self.min_delay
+
+            # Pause the whole host when the server asked for it
+            if retry_after:
+                state.next_time = max(state.next_time, time.monotonic() + retry_after)
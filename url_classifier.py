@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Classification of crawled URLs before their content is downloaded.
+
+Every URL taken from the crawl queue is routed to one of:
+
+- PAGE: fetched and parsed as an HTML page,
+- BINARY: a document (PDF, office file, archive, ...) handed to a download sink,
+- SKIP: media and other content that is not followed.
+
+Known file extensions decide directly. URLs with an unknown extension are
+probed with a HEAD request (or a one-byte Range request when HEAD is not
+supported); the result is cached per path pattern, so /files/1/a.do and
+/files/2/b.do share one probe. Extensionless URLs are treated as pages, and
+the scraper checks the Content-Type of the streamed response before reading
+its body, so a misrouted URL never transfers a full body.
+"""
+
+import re
+import threading
+import posixpath
+from urllib.parse import urlparse
+
+from cancellation import ScrapeCancelled
+
+PAGE = 'page'
+BINARY = 'binary'
+SKIP = 'skip'
+
+PAGE_EXTENSIONS = {
+    '', '.html', '.htm', '.xhtml', '.shtml', '.php', '.asp', '.aspx', '.jsp', '.jspx', '.cfm', '.cgi', '.pl',
+}
+
+# Documents worth keeping when a binary sink is configured
+BINARY_EXTENSIONS = {
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods', '.odp', '.rtf', '.csv',
+    '.epub', '.zip', '.gz', '.tgz', '.bz2', '.xz', '.tar', '.rar', '.7z', '.xml', '.json',
+}
+
+# Media, executables and page assets linked from <a> tags
+SKIP_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.ico', '.tif', '.tiff', '.avif',
+    '.mp4', '.webm', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.m4v', '.mp3', '.wav', '.ogg', '.flac',
+    '.m4a', '.aac', '.woff', '.woff2', '.ttf', '.otf', '.eot', '.css', '.js', '.exe', '.msi', '.dmg',
+    '.iso', '.apk', '.bin', '.deb', '.rpm',
+}
+
+HTML_CONTENT_TYPES = {'text/html', 'application/xhtml+xml'}
+# Other text/* types (plain text, XML, ...) stay on the page pipeline as before classification
+TEXT_CONTENT_TYPE_PREFIX = 'text/'
+SKIP_CONTENT_TYPE_PREFIXES = ('image/', 'video/', 'audio/', 'font/', 'text/css', 'text/javascript',
+                              'application/javascript', 'application/x-javascript')
+
+DIGITS = re.compile(r'\d+')
+
+
+class NonHTMLContent(Exception):
+    """Raised when a URL fetched as a page turns out not to be HTML."""
+
+    def __init__(self, content_type):
+        super().__init__(f"Not an HTML page: {content_type}")
+        self.content_type = content_type
+
+
+def route_content_type(content_type):
+    """
+    Route a response by its Content-Type header.
+
+    Args:
+        content_type (str): Content-Type header or None
+
+    Returns:
+        str: PAGE, BINARY or SKIP (PAGE when the type is missing and for
+            text/* types other than CSS and JavaScript)
+    """
+    if not content_type:
+        return PAGE
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    if not media_type or media_type in HTML_CONTENT_TYPES:
+        return PAGE
+    if media_type.startswith(SKIP_CONTENT_TYPE_PREFIXES):
+        return SKIP
+    if media_type.startswith(TEXT_CONTENT_TYPE_PREFIX):
+        return PAGE
+    return BINARY
+
+
+class URLClassifier:
+    """Routes URLs to the page pipeline, a binary sink or nowhere."""
+
+    def __init__(self, probe=None, max_patterns=10000):
+        """
+        Initialization of the classifier.
+
+        Args:
+            probe (callable): Function returning the Content-Type of a URL
+                without downloading its body; None disables probing
+            max_patterns (int): Maximum number of cached path patterns
+        """
+        self.probe = probe
+        self.max_patterns = max_patterns
+        self._patterns = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_extension(url):
+        """Return the lowercase file extension of a URL path ('' if none)."""
+        return posixpath.splitext(urlparse(url).path)[1].lower()
+
+    @staticmethod
+    def get_pattern(url):
+        """
+        Get the path pattern of a URL: host, directory with numbers
+        generalized and file extension.
+        """
+        parsed = urlparse(url)
+        directory, filename = posixpath.split(parsed.path)
+        return parsed.netloc, DIGITS.sub('#', directory), posixpath.splitext(filename)[1].lower()
+
+    def reset(self):
+        """Forget cached probe results."""
+        with self._lock:
+            self._patterns.clear()
+
+    def learn(self, url, content_type):
+        """
+        Remember the route of a URL's path pattern from an observed Content-Type.
+
+        Only URLs with an unknown extension are cached; extension rules and
+        the default for extensionless URLs are never overridden.
+
+        Returns:
+            str: Route of the content type
+        """
+        route = route_content_type(content_type)
+        if self.get_extension(url) not in PAGE_EXTENSIONS | BINARY_EXTENSIONS | SKIP_EXTENSIONS:
+            with self._lock:
+                if len(self._patterns) < self.max_patterns:
+                    self._patterns[self.get_pattern(url)] = route
+        return route
+
+    def classify(self, url):
+        """
+        Classify a URL before fetching it.
+
+        Args:
+            url (str): Absolute URL
+
+        Returns:
+            str: PAGE, BINARY or SKIP
+
+        Raises:
+            ScrapeCancelled: If a stop was requested during the probe
+        """
+        extension = self.get_extension(url)
+        if extension in PAGE_EXTENSIONS:
+            return PAGE
+        if extension in BINARY_EXTENSIONS:
+            return BINARY
+        if extension in SKIP_EXTENSIONS:
+            return SKIP
+
+        # Unknown extension (e.g. product pages like /item/1234.v2): probe once per pattern
+        pattern = self.get_pattern(url)
+        with self._lock:
+            route = self._patterns.get(pattern)
+        if route is not None or self.probe is None:
+            return route or PAGE
+
+        try:
+            content_type = self.probe(url)
+        except ScrapeCancelled:
+            raise
+        except Exception:
+            return PAGE
+        return self.learn(url, content_type)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Background file writer used by RobopolScraper for HTML pages and assets."""
+
+import os
+import gzip
+import queue
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# File suffixes of supported compression methods
+COMPRESSION_SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+
+class AsyncFileWriter:
+    """
+    Writes files on a background thread.
+
+    Writes are put into a bounded queue and processed in batches by a single
+    writer thread, so callers only pay for the queue insertion. Directories
+    that were already created are remembered and not created again.
+    """
+
+    def __init__(self, max_queue=256, batch_size=32, compression=None, compression_level=6,
+                 async_writes=True, status_callback=None):
+        """
+        Initialization of the writer.
+
+        Args:
+            max_queue (int): Maximum number of pending writes before callers wait
+            batch_size (int): Maximum number of writes processed in one batch
+            compression (str): Compression for compressible files: None, 'gzip' or 'zstd'
+            compression_level (int): Compression level
+            async_writes (bool): Whether to write on a background thread
+            status_callback (callable): Function for reporting write errors
+        """
+        if compression and compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.compression = compression
+        self.compression_level = compression_level
+        self.async_writes = async_writes
+        self.status_callback = status_callback or (lambda message: None)
+
+        self.stats = {
+            'files_written': 0,
+            'bytes_written': 0,
+            'write_errors': 0,
+        }
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._created_dirs = set()
+
+    def _get_method(self, compress):
+        """Return the compression method for a value of the compress argument."""
+        if isinstance(compress, str):
+            if compress not in COMPRESSION_SUFFIXES:
+                raise ValueError(f"Unsupported compression: {compress}")
+            return compress
+        return self.compression if compress else None
+    
+    def get_path(self, path, compress=False):
+        """Return the final path of a file, including the compression suffix."""
+        method = self._get_method(compress)
+        if method:
+            return path + COMPRESSION_SUFFIXES[method]
+        return path
+
+    def write(self, path, data, compress=False):
+        """
+        Schedule a file to be written.
+
+        Args:
+            path (str): Target path of the file
+            data (bytes or str): Content of the file, str is encoded as UTF-8
+            compress (bool or str): Whether to compress the content with the configured
+                method, or the name of the method to use for this file
+
+        Returns:
+            str: Final path of the file (with compression suffix if compressed)
+        """
+        method = self._get_method(compress)
+        final_path = self.get_path(path, method)
+        item = (final_path, data, method)
+
+        if not self.async_writes:
+            self._write_batch([item])
+            return final_path
+
+        self._ensure_started()
+        self._queue.put(item)
+        return final_path
+
+    def flush(self):
+        """Wait until all scheduled writes are finished."""
+        if self._thread and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Finish all scheduled writes and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='AsyncFileWriter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Main loop of the writer thread."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            # Collect further pending writes into one batch
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    next_item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_item is None:
+                    stop = True
+                    break
+                batch.append(next_item)
+
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def _compress(self, data, method):
+        if method == 'gzip':
+            return gzip.compress(data, compresslevel=self.compression_level)
+        return zstandard.ZstdCompressor(level=self.compression_level).compress(data)
+
+    def _write_batch(self, batch):
+        """Write a batch of files, creating each directory only once."""
+        for path, data, method in batch:
+            try:
+                dir_path = os.path.dirname(path)
+                if dir_path and dir_path not in self._created_dirs:
+                    os.makedirs(dir_path, exist_ok=True)
+                    self._created_dirs.add(dir_path)
+
+                if isinstance(data, str):
+                    data = data.encode('utf-8')
+                if method:
+                    data = self._compress(data, method)
+
+                with open(path, 'wb') as f:
+                    f.write(data)
+
+                self.stats['files_written'] += 1
+                self.stats['bytes_written'] += len(data)
+            except Exception as e:
+                self.stats['write_errors'] += 1
+                self.status_callback(f"Error writing file {path}: {e}")